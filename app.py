@@ -2,11 +2,20 @@ import streamlit as st
 from config2llmworkflow.utils.factory import AppFactory
 import yaml
 import os
-from datetime import datetime
+import hashlib
 from loguru import logger
 import argparse
+from config2llmworkflow.configs.logging.base import LoggingConfig
+from config2llmworkflow.utils.log import configure_logging
 
-logger.add(os.path.join("logs", f"{datetime.now().strftime('%Y-%m-%d-%H-%M-%S')}.log"))
+
+@st.cache_resource
+def setup_logging():
+    # Streamlit 每次交互都会重跑脚本，日志输出只在进程启动时设置一次
+    configure_logging(LoggingConfig(path=os.path.join("logs", "app.jsonl")))
+
+
+setup_logging()
 
 
 def save_uploaded_file(uploaded_file):
@@ -19,13 +28,27 @@ def save_uploaded_file(uploaded_file):
         return None
 
 
+@st.cache_data(show_spinner=False)
+def parse_config(text):
+    return yaml.safe_load(text)
+
+
 def load_config(file_path):
     with open(file_path, "r") as file:
-        return yaml.safe_load(file)
+        text = file.read()
+    # 以配置内容的哈希作为键，同一份配置在所有会话和重跑之间共享
+    return hashlib.sha256(text.encode("utf-8")).hexdigest(), parse_config(text)
+
+
+@st.cache_resource(show_spinner="正在加载工作流...")
+def get_app(config_hash, _config):
+    # 只构建一次 App 和工作流，_config 不参与缓存键的计算
+    logger.info("🏗️[App]构建工作流: {}", config_hash)
+    return AppFactory.create(config=_config["app"])
 
 
-def run_app(config):
-    AppFactory.create(config=config["app"]).run()
+def run_app(config_hash, config):
+    get_app(config_hash, config).run()
 
 
 def main(config_path=None):
@@ -34,9 +57,9 @@ def main(config_path=None):
     if config_path:
         # 从命令行参数指定的文件路径加载配置
         if os.path.exists(config_path):
-            config = load_config(config_path)
+            config_hash, config = load_config(config_path)
             # st.write("配置文件加载成功")
-            run_app(config)
+            run_app(config_hash, config)
         else:
             st.error(f"指定的配置文件不存在: {config_path}")
     else:
@@ -46,9 +69,9 @@ def main(config_path=None):
         if uploaded_file is not None:
             file_path = save_uploaded_file(uploaded_file)
             if file_path:
-                config = load_config(file_path)
+                config_hash, config = load_config(file_path)
                 st.write("配置文件加载成功")
-                run_app(config)
+                run_app(config_hash, config)
         else:
             st.write("Please upload a config file.")
 
@@ -0,0 +1,101 @@
+"""
+统计导入各模块的耗时，用于检查冷启动和 worker 启动的开销。
+
+每个模块在独立的子进程中用 `python -X importtime` 导入，按累计耗时列出
+最慢的依赖模块。指定 --budget 时，任意模块超过预算会以非零状态码退出。
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py config2llmworkflow.agents.litellm_agent_proxy --top 10
+    python benchmarks/import_time.py --budget 1.5
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+DEFAULT_MODULES = [
+    "config2llmworkflow",
+    "config2llmworkflow.utils.factory",
+    "config2llmworkflow.agents",
+    "config2llmworkflow.agents.openai_agent_proxy",
+    "config2llmworkflow.agents.together_agent_proxy",
+    "config2llmworkflow.agents.gemini_agent_proxy",
+    "config2llmworkflow.agents.litellm_agent_proxy",
+    "config2llmworkflow.agents.general_agent_proxy",
+    "config2llmworkflow.main",
+]
+
+# import time:  self [us] | cumulative | imported package
+_line_pattern = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module: str) -> Tuple[float, List[Tuple[str, int, int]]]:
+    """返回 (总耗时秒数, [(模块, 自身耗时us, 累计耗时us)])"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"Failed to import {module}:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _line_pattern.match(line)
+        if match:
+            self_us, cumulative_us, _, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us)))
+    return elapsed, entries
+
+
+def top_level(entries: List[Tuple[str, int, int]]) -> Dict[str, int]:
+    """按顶层包汇总自身耗时，方便看出是哪个第三方库拖慢了导入"""
+    totals: Dict[str, int] = {}
+    for name, self_us, _ in entries:
+        package = name.split(".", 1)[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return totals
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Per-module import time report.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--top", type=int, default=5, help="Packages listed per module.")
+    parser.add_argument(
+        "--budget", type=float, default=None, help="Max seconds allowed per module."
+    )
+    args = parser.parse_args()
+
+    over_budget = []
+    for module in args.modules:
+        elapsed, entries = measure(module)
+        total_us = sum(self_us for _, self_us, _ in entries)
+        print(f"{module}: {elapsed:.2f}s wall, {total_us / 1e6:.2f}s importing")
+
+        packages = sorted(top_level(entries).items(), key=lambda item: -item[1])
+        for package, self_us in packages[: args.top]:
+            print(f"    {self_us / 1e6:8.3f}s  {package}")
+
+        if args.budget is not None and elapsed > args.budget:
+            over_budget.append(module)
+
+    if over_budget:
+        print(f"Over the {args.budget:.2f}s budget: {', '.join(over_budget)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
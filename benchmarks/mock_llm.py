@@ -0,0 +1,331 @@
+"""
+本地的 OpenAI chat-completions 模拟服务，用于离线压测工作流引擎。
+
+延迟、生成速度、工具调用和错误都可以配置，随机数使用固定种子，多次运行结果可复现。
+工作流配置中把 base_url 指向 http://127.0.0.1:<port>/v1 即可。
+
+    python benchmarks/mock_llm.py --port 8900 --latency-ms 800 --jitter 0.3 --tokens-per-s 60
+    python benchmarks/mock_llm.py --port 8900 --error-rate 0.05 --tool-call-rate 0.2 --parallel-tool-calls 3
+
+GET /stats 返回累计的请求数、错误数和模拟的模型耗时。
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class MockProfile:
+    latency_ms: float = 0.0  # 首个 token 前的等待时间
+    distribution: str = "fixed"  # fixed, uniform, lognormal
+    jitter: float = 0.0  # uniform 为 ±比例，lognormal 为 sigma
+    completion_tokens: int = 32
+    tokens_per_s: float = 0.0  # 0 表示所有 token 同时返回
+    tool_call_rate: float = 0.0  # 请求中带 tools 时返回工具调用的概率
+    parallel_tool_calls: int = 1  # 每次返回的工具调用个数
+    error_rate: float = 0.0
+    error_statuses: List[int] = field(default_factory=lambda: [429, 500, 503])
+    retry_after: Optional[float] = 0.0
+    seed: int = 0
+
+
+def _schema_arguments(schema: Dict[str, Any]) -> Dict[str, Any]:
+    # 按工具 schema 的必填参数生成占位参数
+    parameters = schema.get("function", schema).get("parameters", {})
+    properties = parameters.get("properties", {})
+    return {
+        name: _placeholder(properties.get(name, {}))
+        for name in parameters.get("required", list(properties))
+    }
+
+
+def _placeholder(schema: Dict[str, Any]) -> Any:
+    kind = schema.get("type", "string")
+    if kind == "array":
+        return [_placeholder(schema.get("items", {})) for _ in range(2)]
+    if kind == "object":
+        return _schema_arguments({"parameters": schema})
+    return {"number": 1.0, "integer": 1, "boolean": True}.get(kind, "x")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 头部和正文分两次写入，不关闭 Nagle 时每个响应会多等一个延迟 ACK
+    disable_nagle_algorithm = True
+    server: "MockLLMServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: Any, headers: Dict[str, str] = None) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") == "/stats":
+            self._send_json(200, self.server.stats())
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self) -> None:
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        plan = self.server.plan(body)
+
+        if plan["error"] is not None:
+            headers = {}
+            if self.server.profile.retry_after is not None:
+                headers["Retry-After"] = str(self.server.profile.retry_after)
+            self._send_json(
+                plan["error"],
+                {"error": {"message": "Injected error", "type": "mock_error"}},
+                headers,
+            )
+            return
+
+        if body.get("stream"):
+            self._stream(body, plan)
+        else:
+            time.sleep(plan["ttft"] + plan["generation"])
+            self._send_json(200, self.server.completion(body, plan))
+
+    def _stream(self, body: Dict[str, Any], plan: Dict[str, Any]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send(data: str) -> None:
+            chunk = f"data: {data}\n\n".encode("utf-8")
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.flush()
+
+        def event(delta: Dict[str, Any], finish: Optional[str] = None, **extra) -> str:
+            return json.dumps(
+                {
+                    "id": plan["id"],
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "mock"),
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+                    **extra,
+                }
+            )
+
+        time.sleep(plan["ttft"])
+        if plan["tool_calls"]:
+            send(event({"role": "assistant", "tool_calls": plan["tool_calls"]}))
+        else:
+            tokens = plan["tokens"]
+            interval = plan["generation"] / len(tokens) if tokens else 0
+            for token in tokens:
+                send(event({"content": token}))
+                if interval:
+                    time.sleep(interval)
+        send(
+            event(
+                {},
+                "tool_calls" if plan["tool_calls"] else "stop",
+                usage=plan["usage"],
+            )
+        )
+        send("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, profile: MockProfile, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _Handler)
+        self.profile = profile
+        self._random = random.Random(profile.seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.reset_stats()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats = {
+                "requests": 0,
+                "errors": 0,
+                "tool_calls": 0,
+                "simulated_s": 0.0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "profile": asdict(self.profile)}
+
+    def _latency(self) -> float:
+        base = self.profile.latency_ms / 1000
+        if self.profile.distribution == "uniform":
+            spread = base * self.profile.jitter
+            return max(0.0, self._random.uniform(base - spread, base + spread))
+        if self.profile.distribution == "lognormal" and base > 0:
+            sigma = self.profile.jitter
+            # 中位数等于 latency_ms
+            return self._random.lognormvariate(math.log(base), sigma)
+        return base
+
+    def plan(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """决定这次请求的延迟、内容、工具调用或错误"""
+        profile = self.profile
+        prompt_chars = sum(len(str(m.get("content") or "")) for m in body.get("messages", []))
+        with self._lock:
+            self._stats["requests"] += 1
+            if self._random.random() < profile.error_rate:
+                self._stats["errors"] += 1
+                return {"error": self._random.choice(profile.error_statuses)}
+
+            ttft = self._latency()
+            count = profile.completion_tokens
+            generation = count / profile.tokens_per_s if profile.tokens_per_s else 0.0
+            tool_calls = []
+            tools = body.get("tools") or []
+            messages = body.get("messages") or [{}]
+            # 收到工具结果后直接回答，与真实模型一样不会无限调用工具
+            if (
+                tools
+                and messages[-1].get("role") != "tool"
+                and self._random.random() < profile.tool_call_rate
+            ):
+                for index in range(profile.parallel_tool_calls):
+                    tool = self._random.choice(tools)
+                    tool_calls.append(
+                        {
+                            "index": index,
+                            "id": f"call_{self._stats['requests']}_{index}",
+                            "type": "function",
+                            "function": {
+                                "name": tool.get("function", tool)["name"],
+                                "arguments": json.dumps(_schema_arguments(tool)),
+                            },
+                        }
+                    )
+                self._stats["tool_calls"] += len(tool_calls)
+                count, generation = 0, 0.0
+            usage = {
+                "prompt_tokens": prompt_chars // 4,
+                "completion_tokens": count,
+                "total_tokens": prompt_chars // 4 + count,
+            }
+            self._stats["simulated_s"] += ttft + generation
+            self._stats["prompt_tokens"] += usage["prompt_tokens"]
+            self._stats["completion_tokens"] += count
+            request_id = self._stats["requests"]
+
+        return {
+            "error": None,
+            "id": f"mock-{request_id}",
+            "ttft": ttft,
+            "generation": generation,
+            "tokens": [f"tok{i} " for i in range(count)],
+            "tool_calls": tool_calls,
+            "usage": usage,
+        }
+
+    def completion(self, body: Dict[str, Any], plan: Dict[str, Any]) -> Dict[str, Any]:
+        message: Dict[str, Any] = {"role": "assistant", "content": "".join(plan["tokens"])}
+        if plan["tool_calls"]:
+            calls = [
+                {key: value for key, value in call.items() if key != "index"}
+                for call in plan["tool_calls"]
+            ]
+            message = {"role": "assistant", "content": None, "tool_calls": calls}
+        return {
+            "id": plan["id"],
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": message,
+                    "finish_reason": "tool_calls" if plan["tool_calls"] else "stop",
+                }
+            ],
+            "usage": plan["usage"],
+        }
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Time to first token.")
+    parser.add_argument(
+        "--distribution", choices=["fixed", "uniform", "lognormal"], default="fixed"
+    )
+    parser.add_argument("--jitter", type=float, default=0.0, help="Spread or sigma.")
+    parser.add_argument("--completion-tokens", type=int, default=32)
+    parser.add_argument("--tokens-per-s", type=float, default=0.0, help="0 = instant.")
+    parser.add_argument("--tool-call-rate", type=float, default=0.0)
+    parser.add_argument("--parallel-tool-calls", type=int, default=1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def profile_from_args(args: argparse.Namespace) -> MockProfile:
+    return MockProfile(
+        latency_ms=args.latency_ms,
+        distribution=args.distribution,
+        jitter=args.jitter,
+        completion_tokens=args.completion_tokens,
+        tokens_per_s=args.tokens_per_s,
+        tool_call_rate=args.tool_call_rate,
+        parallel_tool_calls=args.parallel_tool_calls,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock LLM server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockLLMServer(profile_from_args(args), args.host, args.port)
+    print(f"Mock LLM listening on {server.base_url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
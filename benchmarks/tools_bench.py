@@ -0,0 +1,124 @@
+"""
+比较计算工具的标量版本和批量（NumPy）版本在大量病例上的单病例耗时，并校验两者结果完全一致。
+
+标量版本按工具调用的方式逐个病例调用（含结果字符串的格式化），批量版本一次处理所有病例。
+
+    python benchmarks/tools_bench.py
+    python benchmarks/tools_bench.py --cases 1000,100000 --repeat 5 --json tools.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config2llmworkflow.agents.agent_tools import (  # noqa: E402
+    tool_name_to_func_map,
+    tool_name_to_schema_map,
+)
+from config2llmworkflow.agents.agent_tools.batched import BatchResult  # noqa: E402
+
+TOOLS = [
+    "calculate_gap_requirements",
+    "calculate_space_requirements",
+    "calculate_spee_space",
+    "calculate_total_space_requirement",
+    "calculate_molar_space",
+]
+
+
+def _best(func: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _number(value: Any) -> float:
+    # 标量版本返回 "3.8mm" 或 "3.8 mm" 这样的字符串
+    return float(value.replace("mm", "")) if isinstance(value, str) else float(value)
+
+
+def _identical(scalar: List[Any], batch: BatchResult) -> bool:
+    for name in batch:
+        if isinstance(scalar[0], dict):
+            expected = [_number(result[name]) for result in scalar]
+        else:
+            # calculate_spee_space 直接返回数值
+            expected = [_number(result) for result in scalar]
+        if not np.array_equal(np.asarray(expected), batch[name]):
+            return False
+    return True
+
+
+def bench_tool(name: str, cases: int, repeat: int, seed: int) -> Dict[str, Any]:
+    scalar = tool_name_to_func_map[name]
+    batch = tool_name_to_func_map[f"{name}_batch"]
+    parameters = tool_name_to_schema_map[name]["function"]["parameters"]["required"]
+
+    rng = np.random.default_rng(seed)
+    columns = {
+        parameter: rng.uniform(-10, 10, cases).round(2) for parameter in parameters
+    }
+    rows = [
+        dict(zip(parameters, values))
+        for values in zip(*(column.tolist() for column in columns.values()))
+    ]
+
+    scalar_s = _best(lambda: [scalar(**row) for row in rows], repeat)
+    batch_s = _best(lambda: batch(**columns), repeat)
+
+    return {
+        "tool": name,
+        "cases": cases,
+        "scalar_us_per_case": round(scalar_s / cases * 1e6, 4),
+        "batch_us_per_case": round(batch_s / cases * 1e6, 4),
+        "speedup": round(scalar_s / batch_s, 1),
+        "identical": _identical([scalar(**row) for row in rows], batch(**columns)),
+    }
+
+
+def _print_table(rows: List[Dict[str, Any]]) -> None:
+    columns = list(rows[0])
+    widths = {
+        column: max(len(column), *(len(str(row[column])) for row in rows))
+        for column in columns
+    }
+    print("  ".join(column.rjust(widths[column]) for column in columns))
+    for row in rows:
+        print("  ".join(str(row[column]).rjust(widths[column]) for column in columns))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Scalar vs batched tool benchmark.")
+    parser.add_argument("--tools", default=",".join(TOOLS))
+    parser.add_argument("--cases", default="1000,10000,100000", help="Comma separated.")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of this many runs.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, help="Write results to this file.")
+    args = parser.parse_args()
+
+    rows = [
+        bench_tool(name, cases, args.repeat, args.seed)
+        for name in args.tools.split(",")
+        for cases in (int(n) for n in args.cases.split(","))
+    ]
+    _print_table(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(rows, file, ensure_ascii=False, indent=2)
+    # 结果不一致时以非零状态码退出
+    return 0 if all(row["identical"] for row in rows) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,427 @@
+"""
+用本地模拟的 LLM 服务压测工作流引擎，输出吞吐量和 p50/p95/p99 延迟，
+并把引擎自身的开销（调度、格式化、日志、客户端构建、传输）与模拟的模型耗时分开统计。
+
+    python benchmarks/workflow_bench.py
+    python benchmarks/workflow_bench.py --workflow default,loop --nodes 4,16 \\
+        --layout parallel,chain,layers --concurrency 1,8 --runs 50 --latency-ms 200
+    python benchmarks/workflow_bench.py --error-rate 0.05 --json results.json
+
+每个场景的延迟中，"llm" 是至少有一个 LLM 调用在进行中的时间，"engine" 是剩余的时间，
+即模型之外由引擎占用的关键路径时间。
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import math
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from loguru import logger  # noqa: E402
+
+from mock_llm import (  # noqa: E402
+    MockLLMServer,
+    MockProfile,
+    add_profile_arguments,
+    profile_from_args,
+)
+
+from config2llmworkflow.agents.agent_tools import tool_name_to_schema_map  # noqa: E402
+from config2llmworkflow.agents.base import BaseAgentProxy  # noqa: E402
+from config2llmworkflow.utils.cache import configure_cache  # noqa: E402
+from config2llmworkflow.utils.executor import get_executor  # noqa: E402
+from config2llmworkflow.utils.factory import WorkflowFactory  # noqa: E402
+
+# 当前运行中的 LLM 调用区间，由 _timed_acall 记录
+_intervals: contextvars.ContextVar[Optional[List[Tuple[float, float]]]] = (
+    contextvars.ContextVar("bench_intervals", default=None)
+)
+_original_acall = BaseAgentProxy._acall
+
+
+async def _timed_acall(self, messages):
+    start = time.perf_counter()
+    try:
+        return await _original_acall(self, messages)
+    finally:
+        sink = _intervals.get()
+        if sink is not None:
+            sink.append((start, time.perf_counter()))
+
+
+BaseAgentProxy._acall = _timed_acall
+
+
+def busy_time(intervals: List[Tuple[float, float]]) -> float:
+    """区间并集的总长度"""
+    total = 0.0
+    end = -math.inf
+    for start, stop in sorted(intervals):
+        if start > end:
+            total += stop - start
+            end = stop
+        elif stop > end:
+            total += stop - end
+            end = stop
+    return total
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = q * (len(ordered) - 1)
+    lower, upper = math.floor(position), math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _agent(name: str, priority: float, prompt: str, base_url: str, tools: List[str]):
+    return {
+        "name": name,
+        "node_type": "agent",
+        "provider": "openai",
+        "priority": priority,
+        "role": "You are a benchmark node.",
+        "prompt": prompt,
+        "output_vars": [{"name": name, "type": "str"}],
+        "base_url": base_url,
+        "api_key": "mock",
+        "model": "mock-model",
+        "temperature": 0.7,
+        "disable_python_run": True,
+        "cache": False,
+        "tools": tools,
+    }
+
+
+def build_workflow_config(
+    workflow: str,
+    nodes: int,
+    layout: str,
+    base_url: str,
+    loops: int = 2,
+    tools: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    生成基准测试用的工作流配置。
+
+    parallel：所有节点只依赖输入；chain：每个节点依赖上一个节点；
+    layers：约 sqrt(n) 层，每层的节点依赖上一层的所有节点，优先级等于层号。
+    """
+    tools = tools or []
+    agents = []
+    if layout == "parallel":
+        for i in range(nodes):
+            agents.append(_agent(f"n{i}", 1, f"Task {i}: {{question}}", base_url, tools))
+    elif layout == "chain":
+        for i in range(nodes):
+            source = "{question}" if i == 0 else f"{{n{i - 1}}}"
+            agents.append(_agent(f"n{i}", i + 1, f"Step {i}: {source}", base_url, tools))
+    elif layout == "layers":
+        width = max(1, math.ceil(math.sqrt(nodes)))
+        previous: List[str] = []
+        for i in range(nodes):
+            layer = i // width
+            if i % width == 0 and i:
+                previous = [f"n{j}" for j in range((layer - 1) * width, layer * width)]
+            sources = " ".join(f"{{{name}}}" for name in previous) or "{question}"
+            agents.append(
+                _agent(f"n{i}", layer + 1, f"Layer {layer}: {sources}", base_url, tools)
+            )
+    else:
+        raise ValueError(f"Unknown layout: {layout}")
+
+    config: Dict[str, Any] = {
+        "name": f"bench-{workflow}-{layout}-{nodes}",
+        "node_type": "workflow",
+        "provider": "default",
+        "input_vars": [{"name": "question", "type": "str"}],
+        "nodes": agents,
+    }
+    if workflow == "loop":
+        # 第一个节点引用 watchdog 的反馈，保证每一轮都会重新运行
+        agents[0]["prompt"] += " {feedback}"
+        config.update(
+            provider="loop",
+            node_type="loop",
+            end_condition="False",
+            max_loops=loops,
+            incremental=True,
+            watchdog_agent=_agent(
+                "watchdog",
+                1,
+                "Review: " + " ".join(f"{{{agent['name']}}}" for agent in agents[-2:]),
+                base_url,
+                [],
+            )
+            | {"output_vars": [{"name": "feedback", "type": "str"}]},
+        )
+    return config
+
+
+def _submit(coro) -> Any:
+    # 在共享执行器的事件循环中运行，与 App、批处理和服务模式的运行方式一致
+    return get_executor().submit(coro).result()
+
+
+def run_scenario(config: Dict[str, Any], runs: int, concurrency: int, warmup: int):
+    """以 concurrency 个并发槽位运行 runs 次工作流，返回每次运行的 (耗时, LLM 占用时间)"""
+    # 所有并发的运行共享一个工作流实例
+    workflow = WorkflowFactory.create(config=config)
+    workflow.validate()
+    inputs = {"question": "How much space is needed to level the curve of Spee?"}
+
+    async def run_once() -> Tuple[float, float, int]:
+        intervals: List[Tuple[float, float]] = []
+        token = _intervals.set(intervals)
+        try:
+            start = time.perf_counter()
+            await workflow.arun(inputs)
+            elapsed = time.perf_counter() - start
+        finally:
+            _intervals.reset(token)
+        return elapsed, busy_time(intervals), len(intervals)
+
+    async def drive(count: int):
+        queue: asyncio.Queue = asyncio.Queue()
+        for index in range(count):
+            queue.put_nowait(index)
+        results: List[Tuple[float, float, int]] = []
+        errors: List[str] = []
+
+        async def worker() -> None:
+            while not queue.empty():
+                queue.get_nowait()
+                try:
+                    results.append(await run_once())
+                except Exception as e:
+                    errors.append(f"{type(e).__name__}: {e}")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return results, time.perf_counter() - start, errors
+
+    if warmup:
+        _submit(drive(warmup))
+    return _submit(drive(runs))
+
+
+def summarize(
+    results: List[Tuple[float, float, int]], wall: float, errors: List[str]
+) -> Dict[str, Any]:
+    latencies = [latency for latency, _, _ in results]
+    busy = [llm for _, llm, _ in results]
+    runs = len(results)
+    return {
+        "runs": runs,
+        "errors": len(errors),
+        "throughput_rps": round(runs / wall, 3) if wall else 0.0,
+        "p50_s": round(percentile(latencies, 0.50), 4),
+        "p95_s": round(percentile(latencies, 0.95), 4),
+        "p99_s": round(percentile(latencies, 0.99), 4),
+        "mean_s": round(sum(latencies) / runs, 4) if runs else 0.0,
+        "llm_s": round(sum(busy) / runs, 4) if runs else 0.0,
+        "engine_s": round(sum(l - b for l, b in zip(latencies, busy)) / runs, 4)
+        if runs
+        else 0.0,
+        "llm_calls_per_run": round(sum(c for _, _, c in results) / runs, 2)
+        if runs
+        else 0.0,
+    }
+
+
+def measure_overheads(base_url: str, nodes: int, runs: int) -> Dict[str, Any]:
+    """
+    分别测量引擎各部分的开销（单位：秒）：
+
+    - client_first / client_build：第一个客户端（含 SDK 导入）和之后新建一个客户端的耗时
+    - formatting_per_node：渲染一个节点的提示词
+    - engine_per_node：模型瞬间返回（进程内）时每个节点的耗时，即调度与调用记录的开销
+    - logging_per_node：打开 DEBUG 日志（写入空设备）后每个节点增加的耗时
+    - transport_per_call：通过 HTTP 调用零延迟的模拟服务比进程内返回多出的耗时
+    """
+    from config2llmworkflow.utils.clients import get_client_registry
+
+    report: Dict[str, Any] = {}
+
+    async def build(url: str) -> float:
+        start = time.perf_counter()
+        get_client_registry().get("openai", url, "mock")
+        return time.perf_counter() - start
+
+    report["client_first"] = _submit(build(base_url + "?first"))
+    report["client_build"] = _submit(build(base_url + "?second"))
+
+    config = build_workflow_config("default", nodes, "layers", base_url)
+    workflow = WorkflowFactory.create(config=config)
+    variables = {"question": "q", **{f"n{i}": "x" * 200 for i in range(nodes)}}
+    templates = [node.prompt_template for node in workflow.nodes]
+    repeat = 2000
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for template in templates:
+            template.render(variables)
+    report["formatting_per_node"] = (time.perf_counter() - start) / repeat / nodes
+
+    def per_call_acall(results: List[Tuple[float, float, int]]) -> float:
+        calls = sum(count for _, _, count in results)
+        return sum(busy for _, busy, _ in results) / calls if calls else 0.0
+
+    # 模型在进程内立即返回，剩下的都是引擎开销
+    async def instant(self, messages):
+        return {
+            "content": "tok " * 32,
+            "tool_calls": [],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 32},
+        }
+
+    proxy_class = type(workflow.nodes[0])
+    original_aquery = proxy_class._aquery
+    proxy_class._aquery = instant
+    try:
+        results, _, _ = run_scenario(config, runs, 1, warmup=2)
+        engine = sum(latency for latency, _, _ in results) / len(results)
+        report["engine_per_node"] = engine / nodes
+        in_process_call = per_call_acall(results)
+
+        sink = logger.add(open(os.devnull, "w"), level="DEBUG")
+        try:
+            results, _, _ = run_scenario(config, runs, 1, warmup=1)
+        finally:
+            logger.remove(sink)
+        logged = sum(latency for latency, _, _ in results) / len(results)
+        report["logging_per_node"] = (logged - engine) / nodes
+    finally:
+        proxy_class._aquery = original_aquery
+
+    results, _, _ = run_scenario(config, runs, 1, warmup=2)
+    report["transport_per_call"] = per_call_acall(results) - in_process_call
+    return {key: round(value * 1000, 3) for key, value in report.items()}
+
+
+def _print_table(rows: List[Dict[str, Any]]) -> None:
+    columns = [
+        "workflow",
+        "layout",
+        "nodes",
+        "concurrency",
+        "runs",
+        "errors",
+        "throughput_rps",
+        "p50_s",
+        "p95_s",
+        "p99_s",
+        "llm_s",
+        "engine_s",
+        "llm_calls_per_run",
+    ]
+    widths = {
+        column: max(len(column), *(len(str(row[column])) for row in rows))
+        for column in columns
+    }
+    print("  ".join(column.rjust(widths[column]) for column in columns))
+    for row in rows:
+        print("  ".join(str(row[column]).rjust(widths[column]) for column in columns))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Workflow engine benchmark.")
+    parser.add_argument("--workflow", default="default,loop", help="default and/or loop")
+    parser.add_argument("--nodes", default="4,16", help="Comma separated node counts.")
+    parser.add_argument("--layout", default="parallel,chain,layers")
+    parser.add_argument("--concurrency", default="1,8", help="Concurrent workflow runs.")
+    parser.add_argument("--runs", type=int, default=20, help="Measured runs per scenario.")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--loops", type=int, default=2, help="max_loops of loop workflows.")
+    parser.add_argument("--tools", default="", help="Tools attached to every node.")
+    parser.add_argument("--base-url", default=None, help="Use an external mock server.")
+    parser.add_argument("--no-overhead", action="store_true", help="Skip the breakdown.")
+    parser.add_argument("--json", default=None, help="Write results to this file.")
+    add_profile_arguments(parser)
+    parser.set_defaults(latency_ms=100.0)
+    args = parser.parse_args()
+
+    logger.remove()
+    configure_cache({"enabled": False})
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server = MockLLMServer(profile_from_args(args)).start()
+        base_url = server.base_url
+    tools = [tool for tool in args.tools.split(",") if tool]
+    unknown = [tool for tool in tools if tool not in tool_name_to_schema_map]
+    if unknown:
+        parser.error(f"Unknown tools {unknown}, available: {list(tool_name_to_schema_map)}")
+
+    output: Dict[str, Any] = {"profile": vars(args), "scenarios": []}
+    if not args.no_overhead:
+        overhead_server = MockLLMServer(MockProfile()).start()
+        try:
+            output["overhead_ms"] = measure_overheads(
+                overhead_server.base_url, 16, max(args.runs, 10)
+            )
+        finally:
+            overhead_server.stop()
+        print("Engine overhead (ms):")
+        for key, value in output["overhead_ms"].items():
+            print(f"    {key:>22}: {value}")
+        print()
+
+    for workflow in args.workflow.split(","):
+        for nodes in (int(n) for n in args.nodes.split(",")):
+            for layout in args.layout.split(","):
+                config = build_workflow_config(
+                    workflow, nodes, layout, base_url, args.loops, tools
+                )
+                for concurrency in (int(c) for c in args.concurrency.split(",")):
+                    if server is not None:
+                        server.reset_stats()
+                    results, wall, errors = run_scenario(
+                        config, args.runs, concurrency, args.warmup
+                    )
+                    row = {
+                        "workflow": workflow,
+                        "layout": layout,
+                        "nodes": nodes,
+                        "concurrency": concurrency,
+                        **summarize(results, wall, errors),
+                    }
+                    if server is not None:
+                        stats = server.stats()
+                        row["simulated_s_per_run"] = round(
+                            stats["simulated_s"] / max(1, args.runs + args.warmup), 4
+                        )
+                        row["injected_errors"] = stats["errors"]
+                    if errors:
+                        row["first_error"] = errors[0]
+                    output["scenarios"].append(row)
+                    print(
+                        f"{workflow:>8} {layout:>8} nodes={nodes:<3} "
+                        f"concurrency={concurrency:<3} p50={row['p50_s']}s "
+                        f"p99={row['p99_s']}s engine={row['engine_s']}s",
+                        flush=True,
+                    )
+                    if errors:
+                        print(f"    {len(errors)} runs failed, first: {errors[0]}")
+
+    print()
+    _print_table(output["scenarios"])
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(output, file, ensure_ascii=False, indent=2)
+    if server is not None:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
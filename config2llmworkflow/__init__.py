@@ -1 +1,19 @@
-from config2llmworkflow.main import App  # noqa
+import importlib
+
+# App 依赖 streamlit，只在真正使用时才导入
+_lazy_imports = {
+    "App": "config2llmworkflow.main",
+}
+
+
+def __getattr__(name):
+    module_path = _lazy_imports.get(name)
+    if module_path is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_path), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_lazy_imports))
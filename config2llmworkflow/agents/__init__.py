@@ -1,9 +1,29 @@
+import importlib
+
 from config2llmworkflow.agents.base import BaseAgentProxy
-from config2llmworkflow.agents.general_agent_proxy import GeneralAgentProxy
-from config2llmworkflow.agents.together_agent_proxy import TogetherAgentProxy
-from config2llmworkflow.agents.openai_agent_proxy import OpenaiAgentProxy
-from config2llmworkflow.agents.gemini_agent_proxy import GeminiAgentProxy
-from config2llmworkflow.agents.litellm_agent_proxy import LitellmAgentProxy
+
+# 各 provider 依赖的 SDK（GeneralAgent、litellm、google.generativeai、together）
+# 导入很慢，只在配置实际用到时才加载对应模块
+_lazy_imports = {
+    "GeneralAgentProxy": "config2llmworkflow.agents.general_agent_proxy",
+    "TogetherAgentProxy": "config2llmworkflow.agents.together_agent_proxy",
+    "OpenaiAgentProxy": "config2llmworkflow.agents.openai_agent_proxy",
+    "GeminiAgentProxy": "config2llmworkflow.agents.gemini_agent_proxy",
+    "LitellmAgentProxy": "config2llmworkflow.agents.litellm_agent_proxy",
+}
+
+
+def __getattr__(name):
+    module_path = _lazy_imports.get(name)
+    if module_path is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_path), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_lazy_imports))
 
 
 __all__ = [
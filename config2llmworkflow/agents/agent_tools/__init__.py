@@ -1,32 +1,64 @@
-from config2llmworkflow.agents.agent_tools.tools import (
-    sum_floats,
-    sum_floats_tool,
-    calculate_gap_requirements,
-    calculate_gap_requirements_tool,
-    calculate_space_requirements,
-    calculate_space_requirements_tool,
-    calculate_spee_space,
-    calculate_space_requirements_tool,
-    calculate_total_space_requirement,
-    calculate_total_space_requirement_tool,
-    calculate_molar_space,
-    calculate_molar_space_tool,
+import importlib
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator
+
+
+class LazyRegistry(Mapping):
+    """
+    工具名到 "模块路径.属性名" 的映射，第一次访问某个工具时才导入对应模块。
+    """
+
+    def __init__(self, paths: Dict[str, str]):
+        self._paths = dict(paths)
+        self._loaded: Dict[str, Any] = {}
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self._loaded:
+            module_path, attr = self._paths[name].rsplit(".", 1)
+            self._loaded[name] = getattr(importlib.import_module(module_path), attr)
+        return self._loaded[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._paths
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+
+_tools = "config2llmworkflow.agents.agent_tools.tools"
+# 数组输入、数组输出的批量版本，与标量版本结果一致，单位在 BatchResult.units 中
+_batched = "config2llmworkflow.agents.agent_tools.batched"
+_batch_tools = [
+    "calculate_gap_requirements",
+    "calculate_space_requirements",
+    "calculate_spee_space",
+    "calculate_total_space_requirement",
+    "calculate_molar_space",
+]
+
+tool_name_to_func_map = LazyRegistry(
+    {
+        "sum_floats": f"{_tools}.sum_floats",
+        "calculate_gap_requirements": f"{_tools}.calculate_gap_requirements",
+        "calculate_space_requirements": f"{_tools}.calculate_space_requirements",
+        "calculate_spee_space": f"{_tools}.calculate_spee_space",
+        "calculate_total_space_requirement": f"{_tools}.calculate_total_space_requirement",
+        "calculate_molar_space": f"{_tools}.calculate_molar_space",
+        **{f"{name}_batch": f"{_batched}.{name}_batch" for name in _batch_tools},
+    }
 )
 
-tool_name_to_func_map = {
-    "sum_floats": sum_floats,
-    "calculate_gap_requirements": calculate_gap_requirements,
-    "calculate_space_requirements": calculate_space_requirements,
-    "calculate_spee_space": calculate_spee_space,
-    "calculate_total_space_requirement": calculate_total_space_requirement,
-    "calculate_molar_space": calculate_molar_space,
-}
-
-tool_name_to_schema_map = {
-    "sum_floats": sum_floats_tool,
-    "calculate_gap_requirements": calculate_gap_requirements_tool,
-    "calculate_space_requirements": calculate_space_requirements_tool,
-    "calculate_spee_space": calculate_space_requirements_tool,
-    "calculate_total_space_requirement": calculate_total_space_requirement_tool,
-    "calculate_molar_space": calculate_molar_space_tool,
-}
+tool_name_to_schema_map = LazyRegistry(
+    {
+        "sum_floats": f"{_tools}.sum_floats_tool",
+        "calculate_gap_requirements": f"{_tools}.calculate_gap_requirements_tool",
+        "calculate_space_requirements": f"{_tools}.calculate_space_requirements_tool",
+        "calculate_spee_space": f"{_tools}.calculate_spee_space_tool",
+        "calculate_total_space_requirement": f"{_tools}.calculate_total_space_requirement_tool",
+        "calculate_molar_space": f"{_tools}.calculate_molar_space_tool",
+        **{f"{name}_batch": f"{_batched}.{name}_batch_tool" for name in _batch_tools},
+    }
+)
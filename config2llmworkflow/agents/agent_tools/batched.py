@@ -0,0 +1,184 @@
+"""
+tools.py 中计算工具的批量版本，用于对成千上万个病例批量打分。
+
+参数可以是数组或标量（按 NumPy 规则广播），统一转换为 float64 计算，
+逐元素的运算顺序与标量版本相同，因此结果与逐个调用标量版本完全一致。
+标量版本把单位拼在字符串里（如 "3.8mm"），这里返回数值数组，单位放在 BatchResult.units 中。
+"""
+
+import copy
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from config2llmworkflow.agents.agent_tools import tools
+
+
+class BatchResult(Mapping):
+    """
+    字段名到 float64 数组的映射，units 记录每个字段的单位。
+
+        result = calculate_gap_requirements_batch(dL1, hL1, tL1, dU1, hU1, tU1)
+        result["L1"]        # array([...])
+        result.units["L1"]  # "mm"
+    """
+
+    def __init__(self, values: Dict[str, np.ndarray], units: Dict[str, str]):
+        self.values = values
+        self.units = units
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.values[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.values)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __repr__(self) -> str:
+        return f"BatchResult(values={self.values!r}, units={self.units!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        # 作为工具调用的结果返回给模型时需要能序列化为 JSON
+        return {
+            "values": {name: value.tolist() for name, value in self.values.items()},
+            "units": dict(self.units),
+        }
+
+
+def _arrays(*values: ArrayLike) -> List[np.ndarray]:
+    return np.broadcast_arrays(*(np.asarray(value, dtype=np.float64) for value in values))
+
+
+def _mm(**values: np.ndarray) -> BatchResult:
+    return BatchResult(values, {name: "mm" for name in values})
+
+
+def calculate_gap_requirements_batch(
+    dL1: ArrayLike,
+    hL1: ArrayLike,
+    tL1: ArrayLike,
+    dU1: ArrayLike,
+    hU1: ArrayLike,
+    tU1: ArrayLike,
+) -> BatchResult:
+    """批量版本的 tools.calculate_gap_requirements"""
+    dL1, hL1, tL1, dU1, hU1, tU1 = _arrays(dL1, hL1, tL1, dU1, hU1, tU1)
+    L1 = 2 * dL1 + hL1 + 0.8 * tL1
+    U1 = 2 * dU1 + hU1 + 0.8 * tU1
+    return _mm(L1=L1, U1=U1)
+
+
+def calculate_space_requirements_batch(
+    D1: ArrayLike,
+    D2: ArrayLike,
+    upper_left_torque: ArrayLike,
+    upper_right_torque: ArrayLike,
+    lower_left_torque: ArrayLike,
+    lower_right_torque: ArrayLike,
+) -> BatchResult:
+    """批量版本的 tools.calculate_space_requirements"""
+    (
+        D1,
+        D2,
+        upper_left_torque,
+        upper_right_torque,
+        lower_left_torque,
+        lower_right_torque,
+    ) = _arrays(
+        D1,
+        D2,
+        upper_left_torque,
+        upper_right_torque,
+        lower_left_torque,
+        lower_right_torque,
+    )
+    upper_torque_avg = (upper_left_torque + upper_right_torque) / 2
+    lower_torque_avg = (lower_left_torque + lower_right_torque) / 2
+
+    upper_space_impact = (upper_torque_avg + 9) * 0.2
+    lower_space_impact = (lower_torque_avg + 30) * 0.2
+
+    expansion_amount = D1 + 4 - D2
+
+    return _mm(
+        upper_total_space=upper_space_impact + expansion_amount,
+        lower_total_space=lower_space_impact + expansion_amount,
+    )
+
+
+def calculate_spee_space_batch(
+    left_spee_depth: ArrayLike, right_spee_depth: ArrayLike
+) -> BatchResult:
+    """批量版本的 tools.calculate_spee_space"""
+    left_spee_depth, right_spee_depth = _arrays(left_spee_depth, right_spee_depth)
+    average_depth = (left_spee_depth + right_spee_depth) / 2
+    return _mm(spee_space_required=average_depth + 0.5)
+
+
+def calculate_total_space_requirement_batch(
+    A1: ArrayLike,
+    A2: ArrayLike,
+    B1: ArrayLike,
+    B2: ArrayLike,
+    C1: ArrayLike,
+    C2: ArrayLike,
+    D1: ArrayLike,
+    D2: ArrayLike,
+    E2: ArrayLike,
+) -> BatchResult:
+    """批量版本的 tools.calculate_total_space_requirement"""
+    A1, A2, B1, B2, C1, C2, D1, D2, E2 = _arrays(A1, A2, B1, B2, C1, C2, D1, D2, E2)
+    return _mm(
+        **{
+            "上颌总间隙需求量": A1 + B1 + C1 + D1,
+            "下颌总间隙需求量": A2 + B2 + C2 + D2 + E2,
+        }
+    )
+
+
+def calculate_molar_space_batch(
+    upper_molar_space: ArrayLike, lower_distal_to_ramus: ArrayLike
+) -> BatchResult:
+    """批量版本的 tools.calculate_molar_space"""
+    upper_molar_space, lower_distal_to_ramus = _arrays(
+        upper_molar_space, lower_distal_to_ramus
+    )
+    return _mm(
+        **{
+            "上颌可用骨量空间": upper_molar_space.copy(),
+            "下颌可用骨量空间": (0.715 * lower_distal_to_ramus) - 0.22,
+        }
+    )
+
+
+def batch_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """由标量工具的 schema 生成批量版本的 schema：名称加 _batch 后缀，数值参数改为数组"""
+    schema = copy.deepcopy(schema)
+    function = schema["function"]
+    function["name"] += "_batch"
+    function["description"] = f"批量计算，每个参数为同样长度的数组。{function['description']}"
+    for name, prop in function["parameters"]["properties"].items():
+        if prop.get("type") == "number":
+            function["parameters"]["properties"][name] = {
+                "type": "array",
+                "items": {"type": "number"},
+                "description": prop.get("description", ""),
+            }
+    return schema
+
+
+calculate_gap_requirements_batch_tool = batch_schema(
+    tools.calculate_gap_requirements_tool
+)
+calculate_space_requirements_batch_tool = batch_schema(
+    tools.calculate_space_requirements_tool
+)
+calculate_spee_space_batch_tool = batch_schema(tools.calculate_spee_space_tool)
+calculate_total_space_requirement_batch_tool = batch_schema(
+    tools.calculate_total_space_requirement_tool
+)
+calculate_molar_space_batch_tool = batch_schema(tools.calculate_molar_space_tool)
@@ -1,3 +1,6 @@
+from typing import List
+
+
 # agent 2 tool
 def calculate_gap_requirements(
     dL1: float, hL1: float, tL1: float, dU1: float, hU1: float, tU1: float
@@ -134,7 +137,7 @@ def calculate_spee_space(left_spee_depth: float, right_spee_depth: float) -> flo
     return spee_space_required
 
 
-calculate_spee_space = {
+calculate_spee_space_tool = {
     "type": "function",
     "function": {
         "name": "calculate_spee_space",
@@ -295,8 +298,8 @@ calculate_molar_space_tool = {
 }
 
 
-def sum_floats(*args: float) -> float:
-    return sum(args)
+def sum_floats(values: List[float]) -> float:
+    return sum(values)
 
 
 sum_floats_tool = {
@@ -1,21 +1,97 @@
-from typing import Dict, Any, List
-from GeneralAgent import Agent
-from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional, Callable, Union
+from abc import abstractmethod
 from enum import Enum
-import sys
-import re
 import json
+import copy
+import time
+import asyncio
 from config2llmworkflow.nodes.base import Node
+from config2llmworkflow.nodes.context import run_state
 from config2llmworkflow.configs.agents.base import BaseAgentProxyConfig
-from config2llmworkflow.configs.nodes.base import BaseNodeConfig, NodeType
+from config2llmworkflow.configs.nodes.base import NodeType
+from config2llmworkflow.utils.aio import run_sync
+from config2llmworkflow.utils.executor import get_executor
+from config2llmworkflow.utils.cache import (
+    cache_read_bypassed,
+    get_response_cache,
+    make_cache_key,
+)
+from config2llmworkflow.utils.cassette import get_cassette
+from config2llmworkflow.utils.metrics import get_metrics
+from config2llmworkflow.utils.history import fit_history
+from config2llmworkflow.utils.log import payload
+from config2llmworkflow.utils.resilience import (
+    estimate_tokens,
+    get_resilience_registry,
+)
+from config2llmworkflow.utils.streaming import StreamEvent, get_token_sink
+from config2llmworkflow.utils.template import PromptTemplate
+from config2llmworkflow.utils.tokens import count_message_tokens
+from config2llmworkflow.utils.tracing import SPAN_KIND_CLIENT, current_span, span
 
 import logging
-import subprocess
-import sys
 
 logger = logging.getLogger(__name__)
 
 
+def completion_to_dict(response) -> Dict[str, Any]:
+    """把 OpenAI 风格的 chat completion 转换成可缓存的字典"""
+    message = response.choices[0].message
+    tool_calls = [
+        {
+            "id": tool_call.id,
+            "type": "function",
+            "name": tool_call.function.name,
+            "arguments": tool_call.function.arguments,
+        }
+        for tool_call in getattr(message, "tool_calls", None) or []
+    ]
+    usage = getattr(response, "usage", None)
+    return {
+        "content": message.content,
+        "tool_calls": tool_calls,
+        "usage": {
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        },
+    }
+
+
+async def stream_to_dict(stream, on_delta: Callable[[str], None]) -> Dict[str, Any]:
+    """消费 OpenAI 风格的流式 chat completion，边接收边回调，最后拼成与非流式相同的字典"""
+    content = []
+    tool_calls = {}
+    usage = None
+    async for chunk in stream:
+        if getattr(chunk, "usage", None):
+            usage = chunk.usage
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        if getattr(delta, "content", None):
+            content.append(delta.content)
+            on_delta(delta.content)
+        for tool_call in getattr(delta, "tool_calls", None) or []:
+            entry = tool_calls.setdefault(
+                tool_call.index,
+                {"id": None, "type": "function", "name": "", "arguments": ""},
+            )
+            if tool_call.id:
+                entry["id"] = tool_call.id
+            if tool_call.function is not None:
+                entry["name"] += tool_call.function.name or ""
+                entry["arguments"] += tool_call.function.arguments or ""
+
+    return {
+        "content": "".join(content) if content else None,
+        "tool_calls": [tool_calls[index] for index in sorted(tool_calls)],
+        "usage": {
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        },
+    }
+
+
 class AgentProvider(Enum):
     OPENAI = "openai"
     TOGETHER = "together"
@@ -25,18 +101,309 @@ class AgentProvider(Enum):
 class BaseAgentProxy(Node):
     type = NodeType.AGENT
 
-    answer: Dict[str, Any] = {}
-    full_role: str = ""
-    full_prompt: str = ""
-    messages: List[Dict[str, str]] = []
+    # 每次运行各自的回答和渲染后的提示词，节点对象本身可以被并发的运行共享
+    answer: Dict[str, Any] = run_state(lambda node: {})
+    full_role: str = run_state(lambda node: "")
+    full_prompt: str = run_state(lambda node: "")
+    messages: List[Dict[str, str]] = run_state(lambda node: [])
 
     def __init__(self, config: BaseAgentProxyConfig):
         super().__init__(config)
         self.config = config
+        # 模板只解析一次，非法模板在构建节点时就报错
+        self.role_template = PromptTemplate(self.config.role)
+        self.prompt_template = PromptTemplate(self.config.prompt)
         self._init_client()
 
-    @abstractmethod
+    @property
+    def templates(self) -> List[PromptTemplate]:
+        return [self.role_template, self.prompt_template]
+
     def _init_client(self):
+        # LLM 客户端由 utils.clients 的共享注册表提供，
+        # 只有需要持有有状态 SDK 对象的代理才需要覆盖
+        pass
+
+    def _tools_schema(self) -> List[Dict[str, Any]]:
+        from config2llmworkflow.agents.agent_tools import tool_name_to_schema_map
+
+        # 从 tool_name_to_schema_map 中获取工具的 schema
+        return [tool_name_to_schema_map[tool_name] for tool_name in self.config.tools]
+
+    def _use_cache(self) -> bool:
+        # 未显式配置时，只缓存确定性的调用
+        if self.config.cache is None:
+            return self.config.temperature == 0
+        return self.config.cache
+
+    def _request(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        """决定 LLM 响应的请求内容，不含端点地址和密钥"""
+        return {
+            "provider": self.config.provider,
+            "model": self.config.model,
+            "messages": messages,
+            "temperature": self.config.temperature,
+            "top_p": self.config.top_p,
+            "frequency_penalty": self.config.frequency_penalty,
+            "max_tokens": self.config.token_limit,
+            "tools": self._tools_schema(),
+        }
+
+    def _cache_key(self, messages: List[Dict[str, str]]) -> str:
+        return make_cache_key({**self._request(messages), "base_url": self.config.base_url})
+
+    @abstractmethod
+    async def _aquery(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        """
+        调用 LLM，返回 {"content": str, "tool_calls": list, "usage": dict}。
+        不修改 messages，由调用方决定如何记录回复。
+        """
+
+    async def _aquery_stream(
+        self, messages: List[Dict[str, str]], on_delta: Callable[[str], None]
+    ) -> Dict[str, Any]:
+        """流式调用 LLM，返回值与 _aquery 相同；不支持流式的代理一次性输出全部内容"""
+        response = await self._aquery(messages)
+        on_delta(response["content"] or "")
+        return response
+
+    async def _send(
+        self,
+        messages: List[Dict[str, str]],
+        on_delta: Optional[Callable[[str], None]],
+    ) -> Dict[str, Any]:
+        if on_delta is not None:
+            return await self._aquery_stream(messages, on_delta)
+        return await self._aquery(messages)
+
+    def _stream_callback(self) -> Optional[Callable[[Union[str, StreamEvent]], None]]:
+        sink = get_token_sink()
+        if sink is None or not self.config.stream:
+            return None
+        return lambda delta: sink(self.config.name, delta)
+
+    async def _acall(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        # 所有 LLM 调用都经过这里：先按历史策略裁剪消息，再查缓存，
+        # 未命中时占用共享执行器的并发名额
+        history = len(messages)
+        messages = fit_history(
+            messages, self.config.history, self.config.model, self.config.token_limit
+        )
+        prompt_tokens = count_message_tokens(messages, self.config.model)
+        with span(
+            f"llm {self.config.model}",
+            **{
+                "node.name": self.config.name,
+                "gen_ai.system": self.config.provider,
+                "gen_ai.request.model": self.config.model,
+                "llm.messages": len(messages),
+                "llm.history_messages": history,
+                "llm.prompt_tokens_estimate": prompt_tokens,
+            },
+        ):
+            start = time.perf_counter()
+            on_delta = self._stream_callback()
+            cache = get_response_cache()
+            cassette = get_cassette()
+            key = None
+            # 录制和回放时不使用响应缓存，保证每个请求都经过录制文件
+            if cache.enabled and self._use_cache() and not cassette.active:
+                key = self._cache_key(messages)
+                cached = None if cache_read_bypassed() else await cache.aget(key)
+                if cached is not None:
+                    logger.info("[%s] LLM response cache hit: %s", self.config.name, key)
+                    self._log_call(
+                        cached, cached=True, latency=time.perf_counter() - start
+                    )
+                    if on_delta is not None:
+                        on_delta(cached["content"] or "")
+                        on_delta(StreamEvent.DONE)
+                    return copy.deepcopy(cached)
+
+            attempts = 0
+            queue_wait = 0.0
+
+            async def query() -> Dict[str, Any]:
+                nonlocal attempts, queue_wait
+                attempts += 1
+                if attempts > 1 and on_delta is not None:
+                    # 上一次尝试可能已经输出了一部分，重试的输出会从头开始
+                    on_delta(StreamEvent.RETRY)
+                with span(
+                    "llm.request",
+                    SPAN_KIND_CLIENT,
+                    **{"llm.attempt": attempts, "server.address": self.config.base_url},
+                ):
+                    waiting = time.perf_counter()
+                    async with get_executor().slot(
+                        self.config.provider, self.config.base_url
+                    ):
+                        queue_wait += time.perf_counter() - waiting
+                        if cassette.active:
+                            request = self._request(messages)
+                            return await cassette.call(
+                                make_cache_key(request),
+                                self.config.name,
+                                request,
+                                lambda: self._send(messages, on_delta),
+                                on_delta,
+                            )
+                        return await self._send(messages, on_delta)
+
+            # 同一端点的所有代理共享限流、重试和熔断状态，退避等待时不占用并发名额
+            guard = get_resilience_registry().get(
+                self.config.provider,
+                self.config.base_url,
+                self.config.model,
+                self.config.resilience,
+            )
+            try:
+                response = await guard.call(
+                    query,
+                    estimate_tokens(messages, self.config.token_limit, self.config.model),
+                )
+            except Exception as e:
+                get_metrics().inc(
+                    "llm_errors_total",
+                    node=self.config.name,
+                    model=self.config.model,
+                    error=type(e).__name__,
+                )
+                raise
+            if on_delta is not None:
+                on_delta(StreamEvent.DONE)
+
+            if key is not None:
+                await cache.aset(key, response)
+            self._log_call(
+                response,
+                cached=False,
+                latency=time.perf_counter() - start,
+                queue_wait=queue_wait,
+                retries=attempts - 1,
+            )
+            return copy.deepcopy(response)
+
+    def _log_call(
+        self,
+        response: Dict[str, Any],
+        cached: bool,
+        latency: float,
+        queue_wait: float = 0.0,
+        retries: int = 0,
+    ) -> None:
+        call = {
+            "cached": cached,
+            "usage": response.get("usage", {}),
+            "latency_s": round(latency, 4),
+            "queue_wait_s": round(queue_wait, 4),
+            "retries": retries,
+        }
+        # node_log 随本次运行的 RunContext 创建，之后只追加，循环的每一轮和解析失败后的重试都会保留
+        self.node_log.setdefault("llm_calls", []).append(call)
+        get_metrics().record_llm_call(self.config.name, self.config.model, call)
+        current_span().set_attributes(
+            {
+                "llm.cached": cached,
+                "llm.retries": retries,
+                "llm.queue_wait_s": call["queue_wait_s"],
+                "gen_ai.usage.input_tokens": call["usage"].get("prompt_tokens"),
+                "gen_ai.usage.output_tokens": call["usage"].get("completion_tokens"),
+            }
+        )
+
+    async def _arun_interpreter(self, interpreter) -> None:
+        """在共享线程池中运行解释器，并记录耗时"""
+        start = time.perf_counter()
+        ok = False
+        try:
+            await get_executor().run_blocking(interpreter.run_python_code)
+            ok = interpreter.ok
+        finally:
+            latency = time.perf_counter() - start
+            self.node_log.setdefault("interpreter_calls", []).append(
+                {"latency_s": round(latency, 4), "ok": ok}
+            )
+            get_metrics().inc(
+                "interpreter_runs_total", node=self.config.name, ok=str(ok).lower()
+            )
+            get_metrics().observe("interpreter_seconds", latency, node=self.config.name)
+
+    async def _arun_tool(self, tool_call: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        在共享线程池中运行一次工具调用，返回对应的 tool 消息。
+
+        未知工具、参数错误、异常和超时都作为结果返回给模型，由模型决定如何继续。
+        超时只是不再等待，线程池中的函数无法中断，会继续运行到结束。
+        """
+        from config2llmworkflow.agents.agent_tools import tool_name_to_func_map
+
+        name = tool_call["name"]
+        arguments = tool_call["arguments"]
+        logger.info(
+            "[%s] 调用了工具 %s，参数是 %s", self.config.name, name, payload(arguments)
+        )
+        start = time.perf_counter()
+        ok = False
+        with span(f"tool {name}", **{"tool.name": name, "tool.arguments": arguments}):
+            try:
+                if name not in tool_name_to_func_map:
+                    raise KeyError(f"未知的工具 {name}")
+                kwargs = json.loads(arguments) if arguments else {}
+                result = await asyncio.wait_for(
+                    get_executor().run_blocking(tool_name_to_func_map[name], **kwargs),
+                    self.config.tool_timeout,
+                )
+                if hasattr(result, "to_dict"):
+                    result = result.to_dict()
+                content = (
+                    result
+                    if isinstance(result, str)
+                    else json.dumps(result, ensure_ascii=False, default=str)
+                )
+                ok = True
+            except asyncio.TimeoutError:
+                content = f"工具 {name} 运行超过 {self.config.tool_timeout} 秒，已放弃等待"
+                logger.warning("[%s] Tool %s timed out", self.config.name, name)
+            except Exception as e:
+                content = f"工具 {name} 调用失败：{type(e).__name__}: {e}"
+                logger.warning(
+                    "[%s] Tool %s failed: %s", self.config.name, name, e
+                )
+            current_span().set_attributes({"tool.ok": ok})
+
+        latency = time.perf_counter() - start
+        logger.info(
+            "[%s] 调用工具 %s 的结果是 %s", self.config.name, name, payload(content)
+        )
+        self.node_log.setdefault("tool_call", []).append(
+            {
+                "name": name,
+                "arguments": arguments,
+                "result": content,
+                "ok": ok,
+                "latency_s": round(latency, 4),
+            }
+        )
+        get_metrics().inc(
+            "tool_calls_total", node=self.config.name, tool=name, ok=str(ok).lower()
+        )
+        get_metrics().observe("tool_seconds", latency, node=self.config.name, tool=name)
+        return {"role": "tool", "tool_call_id": tool_call["id"], "content": content}
+
+    async def _arun_tools(self, tool_calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """并发运行一次回复中的所有工具调用，按调用的顺序返回 tool 消息"""
+        return list(await asyncio.gather(*map(self._arun_tool, tool_calls)))
+
+    def run(
+        self, input_vars: Dict[str, Any], watchdog_feedback: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return run_sync(self.arun(input_vars, watchdog_feedback=watchdog_feedback))
+
+    @abstractmethod
+    async def arun(
+        self, input_vars: Dict[str, Any], watchdog_feedback: Optional[str] = None
+    ) -> Dict[str, Any]:
         pass
 
     def to_dict(self):
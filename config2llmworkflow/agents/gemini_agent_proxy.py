@@ -1,64 +1,114 @@
 import re
 import json
 import time
-import google.generativeai as genai
 from typing import Dict, Any, Optional, List
 from config2llmworkflow.agents.base import BaseAgentProxy
+from config2llmworkflow.utils.clients import get_client_registry
 
 import logging
 
 logger = logging.getLogger(__name__)
 
 from config2llmworkflow.utils.python_interpreter import PythonInterpreter
+from config2llmworkflow.nodes.context import in_run_context
+from config2llmworkflow.utils.log import payload
 
 
 class GeminiAgentProxy(BaseAgentProxy):
 
-    def _init_client(self):
-
+    @property
+    def client(self):
         import google.generativeai as genai
 
-        genai.configure(api_key=self.config.api_key)
-
-        self.client = genai.GenerativeModel(
+        # GenerativeModel 只保存模型配置，每次使用当前事件循环中这个 api_key 的客户端，
+        # 不调用 genai.configure，不同 api_key 的智能体互不影响
+        model = genai.GenerativeModel(
             model_name=self.config.model,
             tools="code_execution" if not self.config.disable_python_run else None,
         )
+        model._async_client = get_client_registry().get(
+            "gemini", None, self.config.api_key
+        )
+        return model
 
-    def _query(self, messages: List[Dict[str, str]]) -> str:
+    async def _aquery(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
 
         new_query = messages[-1]["content"]
         chat_his = messages[:-1]
 
-        print(f"{new_query=}")
-        print(f"{chat_his=}")
+        logger.debug("new_query=%s", payload(new_query))
+        logger.debug("chat_his=%s", payload(chat_his))
+
+        chat = self.client.start_chat(history=chat_his)
+
+        response = await chat.send_message_async(new_query)
+
+        logger.debug("Response: %s", payload(response.text))
+
+        usage = getattr(response, "usage_metadata", None)
+        return {
+            "content": response.text,
+            "tool_calls": [],
+            "usage": {
+                "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+                "completion_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+            },
+        }
+
+    async def _aquery_stream(
+        self, messages: List[Dict[str, str]], on_delta
+    ) -> Dict[str, Any]:
+        new_query = messages[-1]["content"]
+        chat_his = messages[:-1]
 
         chat = self.client.start_chat(history=chat_his)
 
-        response = chat.send_message(new_query)
+        response = await chat.send_message_async(new_query, stream=True)
+        content = []
+        async for chunk in response:
+            content.append(chunk.text)
+            on_delta(chunk.text)
+
+        logger.debug("Response: %s", payload(lambda: "".join(content)))
 
-        logger.info(f"Response: {response.text}")
+        usage = getattr(response, "usage_metadata", None)
+        return {
+            "content": "".join(content),
+            "tool_calls": [],
+            "usage": {
+                "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+                "completion_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+            },
+        }
+
+    async def _achat(self, messages: List[Dict[str, str]]) -> str:
+        response = await self._acall(messages)
 
         messages.append(
             {
                 "role": "model",
-                "content": response.text,
+                "content": response["content"],
             }
         )
 
-        return response.text
+        return response["content"]
 
-    def run(
+    @in_run_context
+    async def arun(
         self, input_vars: Dict[str, Any], watchdog_feedback: Optional[str] = None
     ) -> Dict[str, Any]:
         # 格式化 role 和 prompt
-        logger.info(f"Setting input variables for {self.config.name}: {input_vars}")
-        self.full_role = self.config.role.format(**input_vars)
-        logger.info(f"Setting role for {self.config.name}: {self.full_role}")
-        self.full_prompt = self.config.prompt.format(**input_vars)
-        logger.info(f"Setting prompt for {self.config.name}: {self.full_prompt}")
-
-        self._init_client()
+        logger.debug(
+            "Setting input variables for %s: %s", self.config.name, payload(input_vars)
+        )
+        self.full_role = self.role_template.render(input_vars)
+        logger.debug(
+            "Setting role for %s: %s", self.config.name, payload(self.full_role)
+        )
+        self.full_prompt = self.prompt_template.render(input_vars)
+        logger.debug(
+            "Setting prompt for %s: %s", self.config.name, payload(self.full_prompt)
+        )
 
         messages = [
             {"role": "model", "content": self.full_role + "\n" + self.full_prompt},
@@ -77,7 +127,7 @@ class GeminiAgentProxy(BaseAgentProxy):
         # {self.config.output_vars}
         # """
 
-        tmp = self._query(messages)
+        tmp = await self._achat(messages)
         # log
         self.node_log["messages"] = messages
 
@@ -103,8 +153,10 @@ class GeminiAgentProxy(BaseAgentProxy):
 
         output_vars = tmp
 
-        logger.debug(f"GeminiAgentProxy {self.config.output_vars=}")
-        logger.debug(f"GeminiAgentProxy {output_vars=}")
+        logger.debug(
+            "GeminiAgentProxy self.config.output_vars=%s", payload(self.config.output_vars)
+        )
+        logger.debug("GeminiAgentProxy output_vars=%s", payload(output_vars))
 
         try:
             # 获取 ```json ```里的内容
@@ -118,7 +170,7 @@ class GeminiAgentProxy(BaseAgentProxy):
             else:
                 output_vars = json.loads(output_vars)
         except Exception as e:
-            logger.warning(f"Error parsing json: {e}")
+            logger.warning("Error parsing json: %s", e)
 
         if isinstance(output_vars, str) and len(self.config.output_vars) == 1:
             output_vars = {self.config.output_vars[0].name: output_vars}
@@ -135,14 +187,9 @@ class GeminiAgentProxy(BaseAgentProxy):
 
         self.answer = output_vars
 
-        logger.info(f"Running exec")
-        exec(f"{self.config.name}_messages = self.node_log['messages']")
         # 添加到 output_vars
-        exec(
-            f"output_vars['{self.config.name}_messages'] = {self.config.name}_messages"
-        )
+        output_vars[f"{self.config.name}_messages"] = self.node_log["messages"]
 
-        logger.debug(f"[{self.config.name}] type of output_vars: {type(output_vars)}")
-        logger.info(f"[{self.config.name}] output_vars: {output_vars}")
+        logger.info("[%s] output_vars: %s", self.config.name, payload(output_vars))
 
         return output_vars
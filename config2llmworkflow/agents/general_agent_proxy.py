@@ -1,5 +1,8 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from config2llmworkflow.agents.base import BaseAgentProxy
+from config2llmworkflow.utils.executor import get_executor
+from config2llmworkflow.nodes.context import in_run_context, run_state
+from config2llmworkflow.utils.log import payload
 
 import logging
 
@@ -7,11 +10,17 @@ logger = logging.getLogger(__name__)
 
 
 class GeneralAgentProxy(BaseAgentProxy):
+    # GeneralAgent 的 Agent 保存对话历史，每次运行各自创建一个，并发的运行互不影响
+    agent = run_state(lambda node: node._create_agent())
 
     def _init_client(self):
+        # 构建节点时检查依赖是否安装
+        from GeneralAgent import Agent  # noqa: F401
+
+    def _create_agent(self):
         from GeneralAgent import Agent
 
-        self.agent = Agent(
+        return Agent(
             model=self.config.model,
             token_limit=self.config.token_limit,
             api_key=self.config.api_key,
@@ -23,13 +32,24 @@ class GeneralAgentProxy(BaseAgentProxy):
             disable_python_run=self.config.disable_python_run,
         )
 
-    def run(self, input_vars: Dict[str, Any]) -> Dict[str, Any]:
+    async def _aquery(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        # GeneralAgent 自己维护对话历史，这里只交给它系统提示词和最后一条用户消息
+        agent = self._create_agent()
+        if messages and messages[0]["role"] == "system":
+            agent.role = messages[0]["content"]
+        content = await get_executor().run_blocking(agent.run, messages[-1]["content"])
+        return {"content": str(content), "tool_calls": [], "usage": {}}
+
+    @in_run_context
+    def run(
+        self, input_vars: Dict[str, Any], watchdog_feedback: Optional[str] = None
+    ) -> Dict[str, Any]:
         # 格式化 role 和 prompt
-        logger.info(f"Setting input variables: {input_vars}")
-        self.full_role = self.config.role.format(**input_vars)
-        logger.info(f"Setting role: {self.full_role}")
-        self.full_prompt = self.config.prompt.format(**input_vars)
-        logger.info(f"Setting prompt: {self.full_prompt}")
+        logger.debug("Setting input variables: %s", payload(input_vars))
+        self.full_role = self.role_template.render(input_vars)
+        logger.debug("Setting role: %s", payload(self.full_role))
+        self.full_prompt = self.prompt_template.render(input_vars)
+        logger.debug("Setting prompt: %s", payload(self.full_prompt))
 
         # 运行智能体
         self.agent.role = self.full_role
@@ -54,6 +74,16 @@ class GeneralAgentProxy(BaseAgentProxy):
             self.agent.clear()
 
         self.answer = output_vars
-        logger.info(f"Setting answer: {self.answer}")
+        logger.info("Setting answer: %s", payload(self.answer))
 
         return output_vars  # 修复：添加返回语句
+
+    @in_run_context
+    async def arun(
+        self, input_vars: Dict[str, Any], watchdog_feedback: Optional[str] = None
+    ) -> Dict[str, Any]:
+        # GeneralAgent 没有异步接口，占用并发名额后在共享线程池中运行
+        async with get_executor().slot(self.config.provider, self.config.base_url):
+            return await get_executor().run_blocking(
+                self.run, input_vars, watchdog_feedback
+            )
@@ -2,51 +2,88 @@ import re
 import json
 import time
 from typing import Dict, Any, Optional
-from config2llmworkflow.agents.base import BaseAgentProxy
-from litellm import completion
+from config2llmworkflow.agents.base import (
+    BaseAgentProxy,
+    completion_to_dict,
+    stream_to_dict,
+)
 
 import logging
 
 logger = logging.getLogger(__name__)
 
 from config2llmworkflow.utils.python_interpreter import PythonInterpreter
+from config2llmworkflow.utils.history import INTERPRETER_RESULT_PREFIX
+from config2llmworkflow.nodes.context import in_run_context
+from config2llmworkflow.utils.log import payload
 
 
 class LitellmAgentProxy(BaseAgentProxy):
 
-    def _query(self, messages):
-        response = completion(
+    async def _aquery(self, messages):
+        # litellm 导入需要数秒，只在实际调用时加载
+        from litellm import acompletion
+
+        response = await acompletion(
             model=self.config.model,
             messages=messages,
             frequency_penalty=self.config.frequency_penalty,
             max_tokens=self.config.token_limit,
             temperature=self.config.temperature,
             # response_format={"type": "json_object"},
-            top_p=0.7,
+            top_p=self.config.top_p,
             api_key=self.config.api_key,
             base_url=self.config.base_url,
         )
 
+        return completion_to_dict(response)
+
+    async def _aquery_stream(self, messages, on_delta):
+        from litellm import acompletion
+
+        stream = await acompletion(
+            model=self.config.model,
+            messages=messages,
+            frequency_penalty=self.config.frequency_penalty,
+            max_tokens=self.config.token_limit,
+            temperature=self.config.temperature,
+            top_p=self.config.top_p,
+            api_key=self.config.api_key,
+            base_url=self.config.base_url,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+
+        return await stream_to_dict(stream, on_delta)
+
+    async def _achat(self, messages):
+        response = await self._acall(messages)
+
         messages.append(
             {
                 "role": "assistant",
-                "content": response.choices[0].message.content,
+                "content": response["content"],
             }
         )
 
-        return response.choices[0].message.content
+        return response["content"]
 
-    def run(
+    @in_run_context
+    async def arun(
         self, input_vars: Dict[str, Any], watchdog_feedback: Optional[str] = None
     ) -> Dict[str, Any]:
         # 格式化 role 和 prompt
-        logger.info(f"Setting input variables for {self.config.name}: {input_vars}")
-        self.full_role = self.config.role.format(**input_vars)
-        logger.info(f"Setting role for {self.config.name}: {self.full_role}")
-        self.full_prompt = self.config.prompt.format(**input_vars)
-        logger.info(f"Setting prompt for {self.config.name}: {self.full_prompt}")
-
-        self._init_client()
+        logger.debug(
+            "Setting input variables for %s: %s", self.config.name, payload(input_vars)
+        )
+        self.full_role = self.role_template.render(input_vars)
+        logger.debug(
+            "Setting role for %s: %s", self.config.name, payload(self.full_role)
+        )
+        self.full_prompt = self.prompt_template.render(input_vars)
+        logger.debug(
+            "Setting prompt for %s: %s", self.config.name, payload(self.full_prompt)
+        )
 
         messages = [
             {"role": "system", "content": self.full_role},
@@ -72,15 +109,25 @@ python代码的最终终端输出结果将被用于后续的回答。
         # {self.config.output_vars}
         # """
 
-        tmp = self._query(messages)
+        tmp = await self._achat(messages)
         # log
         self.node_log["messages"] = messages
 
         if not self.config.disable_python_run:
             interpreter = PythonInterpreter(tmp)
+            rounds = 0
             while interpreter.include_python_code():
-                interpreter.run_python_code()
-                new_prompt = f"我调用Python的运行结果是：{interpreter.result}"
+                if rounds >= self.config.max_interpreter_rounds:
+                    # 模型一直在输出代码时，以最后一次回复作为结果
+                    logger.warning(
+                        "[%s] Stopped after %s Python interpreter rounds",
+                        self.config.name,
+                        rounds,
+                    )
+                    break
+                rounds += 1
+                await self._arun_interpreter(interpreter)
+                new_prompt = f"{INTERPRETER_RESULT_PREFIX}{interpreter.result}"
                 messages.extend(
                     [
                         {"role": "assistant", "content": new_prompt},
@@ -91,15 +138,17 @@ python代码的最终终端输出结果将被用于后续的回答。
                     ]
                 )
 
-                tmp = self._query(messages).strip()
+                tmp = (await self._achat(messages)).strip()
                 self.node_log["messages"] = messages
 
                 interpreter = PythonInterpreter(tmp)
 
         output_vars = tmp
 
-        logger.debug(f"LitellmAgentProxy {self.config.output_vars=}")
-        logger.debug(f"LitellmAgentProxy {output_vars=}")
+        logger.debug(
+            "LitellmAgentProxy self.config.output_vars=%s", payload(self.config.output_vars)
+        )
+        logger.debug("LitellmAgentProxy output_vars=%s", payload(output_vars))
 
         try:
             # 获取 ```json ```里的内容
@@ -113,7 +162,7 @@ python代码的最终终端输出结果将被用于后续的回答。
             else:
                 output_vars = json.loads(output_vars)
         except Exception as e:
-            logger.warning(f"Error parsing json: {e}")
+            logger.warning("Error parsing json: %s", e)
 
         if isinstance(output_vars, str) and len(self.config.output_vars) == 1:
             output_vars = {self.config.output_vars[0].name: output_vars}
@@ -130,7 +179,6 @@ python代码的最终终端输出结果将被用于后续的回答。
 
         self.answer = output_vars
 
-        logger.debug(f"type of output_vars: {type(output_vars)}")
-        logger.debug(f"output_vars: {output_vars}")
+        logger.debug("output_vars: %s", payload(output_vars))
 
         return output_vars
@@ -3,10 +3,10 @@ import json
 import time
 from functools import lru_cache
 from typing import Dict, Any, Optional
-from config2llmworkflow.agents.base import BaseAgentProxy
-from config2llmworkflow.agents.agent_tools import (
-    tool_name_to_func_map,
-    tool_name_to_schema_map,
+from config2llmworkflow.agents.base import (
+    BaseAgentProxy,
+    completion_to_dict,
+    stream_to_dict,
 )
 
 import logging
@@ -14,66 +14,121 @@ import logging
 logger = logging.getLogger(__name__)
 
 from config2llmworkflow.utils.python_interpreter import PythonInterpreter
+from config2llmworkflow.utils.history import INTERPRETER_RESULT_PREFIX
+from config2llmworkflow.nodes.context import in_run_context
+from config2llmworkflow.utils.log import payload
+from config2llmworkflow.utils.clients import get_client_registry
 
 
 class OpenaiAgentProxy(BaseAgentProxy):
 
-    def _init_client(self):
-        from openai import OpenAI
-
-        self.client = OpenAI(
-            api_key=self.config.api_key,
-            base_url=self.config.base_url,
+    @property
+    def client(self):
+        return get_client_registry().get(
+            "openai", self.config.base_url, self.config.api_key
         )
 
-    def _query(self, messages):
+    async def _aquery(self, messages):
         from openai import NotGiven
 
-        # 从 tool_name_to_schema_map 中获取工具的 schema
-        tools = [tool_name_to_schema_map[tool_name] for tool_name in self.config.tools]
+        tools = self._tools_schema()
 
-        response = self.client.chat.completions.create(
+        response = await self.client.chat.completions.create(
             model=self.config.model,
             messages=messages,
             frequency_penalty=self.config.frequency_penalty,
             max_tokens=self.config.token_limit,
             temperature=self.config.temperature,
             # response_format={"type": "json_object"},
-            top_p=0.7,
+            top_p=self.config.top_p,
             tools=tools if tools else NotGiven(),
         )
 
-        if tools:
-            try:
-                tool_call = response.choices[0].message.tool_calls[0]
-            except Exception as e:
-                logger.error(f"Error parsing tool call: {e}")
-                tool_call = None
-        else:
-            tool_call = None
+        return completion_to_dict(response)
+
+    async def _aquery_stream(self, messages, on_delta):
+        from openai import NotGiven
+
+        tools = self._tools_schema()
 
-        if response.choices[0].message.content:
+        stream = await self.client.chat.completions.create(
+            model=self.config.model,
+            messages=messages,
+            frequency_penalty=self.config.frequency_penalty,
+            max_tokens=self.config.token_limit,
+            temperature=self.config.temperature,
+            top_p=self.config.top_p,
+            tools=tools if tools else NotGiven(),
+            stream=True,
+            stream_options={"include_usage": True},
+        )
 
-            messages.append(
+        return await stream_to_dict(stream, on_delta)
+
+    async def _achat(self, messages):
+        response = await self._acall(messages)
+        tool_calls = response["tool_calls"] if self.config.tools else []
+
+        # 回复为空时也记录这一轮，否则历史的最后一条仍是用户消息，会被当作回答
+        message = {"role": "assistant", "content": response["content"] or ""}
+        if tool_calls:
+            # 流式响应中个别兼容服务不返回 id，tool 消息需要按 id 对应
+            for index, tool_call in enumerate(tool_calls):
+                tool_call["id"] = tool_call["id"] or f"call_{len(messages)}_{index}"
+            message["tool_calls"] = [
                 {
-                    "role": "assistant",
-                    "content": response.choices[0].message.content,
+                    "id": tool_call["id"],
+                    "type": "function",
+                    "function": {
+                        "name": tool_call["name"],
+                        "arguments": tool_call["arguments"],
+                    },
                 }
-            )
+                for tool_call in tool_calls
+            ]
+        messages.append(message)
+
+        return response["content"] or "", tool_calls
+
+    async def _achat_tools(self, messages):
+        """对话一轮，模型调用工具时执行工具并把结果发回，直到模型给出回答"""
+        content, tool_calls = await self._achat(messages)
+
+        # 一次回复中的多个工具调用并发执行，结果一起作为 tool 消息发回模型，只多一次往返
+        rounds = 0
+        while tool_calls:
+            if rounds >= self.config.max_tool_rounds:
+                # 未执行的调用从历史中去掉，保持消息序列合法，以当前的回复作为结果
+                logger.warning(
+                    "[%s] Stopped after %s rounds of tool calls",
+                    self.config.name,
+                    rounds,
+                )
+                messages[-1].pop("tool_calls")
+                messages[-1]["content"] = content or ""
+                break
+            rounds += 1
+            messages.extend(await self._arun_tools(tool_calls))
+            content, tool_calls = await self._achat(messages)
 
-        return response.choices[0].message.content, tool_call
+        return content or ""
 
-    def run(
+    @in_run_context
+    async def arun(
         self, input_vars: Dict[str, Any], watchdog_feedback: Optional[str] = None
     ) -> Dict[str, Any]:
         # 格式化 role 和 prompt
-        logger.info(f"Setting input variables for {self.config.name}: {input_vars}")
-        self.full_role = self.config.role.format(**input_vars)
-        logger.info(f"Setting role for {self.config.name}: {self.full_role}")
-        self.full_prompt = self.config.prompt.format(**input_vars)
-        logger.info(f"Setting prompt for {self.config.name}: {self.full_prompt}")
-
-        self._init_client()
+        logger.debug(
+            "Setting input variables for %s: %s", self.config.name, payload(input_vars)
+        )
+        self.full_role = self.role_template.render(input_vars)
+        logger.debug(
+            "Setting role for %s: %s", self.config.name, payload(self.full_role)
+        )
+        self.full_prompt = self.prompt_template.render(input_vars)
+        logger.debug(
+            "Setting prompt for %s: %s", self.config.name, payload(self.full_prompt)
+        )
 
         messages = [
             {"role": "system", "content": self.full_role},
@@ -99,60 +154,26 @@ python代码的最终终端输出结果将被用于后续的回答。
         # {self.config.output_vars}
         # """
 
-        tmp, tool_call = self._query(messages)
-
-        if tool_call:
-            name = tool_call.function.name
-            arguments = tool_call.function.arguments
-
-            # log 当前 agent 选择的函数和参数
-            if "tool_call" not in self.node_log:
-                self.node_log["tool_call"] = []
-            self.node_log["tool_call"].append(
-                {
-                    "name": name,
-                    "arguments": arguments,
-                }
-            )
-
-            logger.info(
-                f"[{self.config.name}] 调用了工具 {name}，参数是 {arguments}, 参数类型是 {type(arguments)}"
-            )
-
-            if name in tool_name_to_func_map:
-                func = tool_name_to_func_map[name]
-                # try json
-                try:
-                    arguments = json.loads(arguments)
-                except:
-                    logger.warning(
-                        f"[{self.config.name}] 参数 {arguments} 不是json格式，无法解析"
-                    )
-                    pass
-                tmp = func(**arguments)
-                logger.info(f"[{self.config.name}] 调用工具 {name} 的结果是 {tmp}")
-                messages.extend(
-                    [
-                        {
-                            "role": "assistant",
-                            "content": f"我调用了工具{name}, 参数是{arguments}, 结果是{tmp}",
-                        },
-                    ]
-                )
-
-                # logger.info(f"messages: {messages}")
-
-                # # send messages to chatgpt
-                # tmp, tool_call = self._query(messages)
+        tmp = await self._achat_tools(messages)
 
         # log
         self.node_log["messages"] = messages
 
         if not self.config.disable_python_run:
             interpreter = PythonInterpreter(tmp)
+            rounds = 0
             while interpreter.include_python_code():
-                interpreter.run_python_code()
-                new_prompt = f"我调用Python的运行结果是：{interpreter.result}"
+                if rounds >= self.config.max_interpreter_rounds:
+                    # 模型一直在输出代码时，以最后一次回复作为结果
+                    logger.warning(
+                        "[%s] Stopped after %s Python interpreter rounds",
+                        self.config.name,
+                        rounds,
+                    )
+                    break
+                rounds += 1
+                await self._arun_interpreter(interpreter)
+                new_prompt = f"{INTERPRETER_RESULT_PREFIX}{interpreter.result}"
                 messages.extend(
                     [
                         {"role": "assistant", "content": new_prompt},
@@ -163,17 +184,22 @@ python代码的最终终端输出结果将被用于后续的回答。
                     ]
                 )
 
-                tmp, tool_call = self._query(messages)
+                tmp = await self._achat_tools(messages)
                 self.node_log["messages"] = messages
 
                 interpreter = PythonInterpreter(tmp)
 
-        output_vars = messages[-1]["content"]
+        # 回答取自模型最后一次回复，而不是历史中的最后一条消息
+        output_vars = tmp
 
         logger.debug(
-            f"[{self.config.name}] OpenaiAgentProxy {self.config.output_vars=}"
+            "[%s] OpenaiAgentProxy self.config.output_vars=%s",
+            self.config.name,
+            payload(self.config.output_vars),
+        )
+        logger.debug(
+            "[%s] OpenaiAgentProxy output_vars=%s", self.config.name, payload(output_vars)
         )
-        logger.debug(f"[{self.config.name}] OpenaiAgentProxy {output_vars=}")
 
         # try:
         #     # 获取 ```json ```里的内容
@@ -204,14 +230,9 @@ python代码的最终终端输出结果将被用于后续的回答。
 
         self.answer = output_vars
 
-        logger.info(f"Running exec")
-        exec(f"{self.config.name}_messages = self.node_log['messages']")
         # 添加到 output_vars
-        exec(
-            f"output_vars['{self.config.name}_messages'] = {self.config.name}_messages"
-        )
+        output_vars[f"{self.config.name}_messages"] = self.node_log["messages"]
 
-        logger.debug(f"[{self.config.name}] type of output_vars: {type(output_vars)}")
-        logger.info(f"[{self.config.name}] output_vars: {output_vars}")
+        logger.info("[%s] output_vars: %s", self.config.name, payload(output_vars))
 
         return output_vars
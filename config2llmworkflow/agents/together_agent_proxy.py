@@ -1,5 +1,12 @@
-from typing import Dict, Any
-from config2llmworkflow.agents.base import BaseAgentProxy
+from typing import Dict, Any, Optional
+from config2llmworkflow.agents.base import (
+    BaseAgentProxy,
+    completion_to_dict,
+    stream_to_dict,
+)
+from config2llmworkflow.utils.clients import get_client_registry
+from config2llmworkflow.nodes.context import in_run_context
+from config2llmworkflow.utils.log import payload
 
 import logging
 
@@ -8,40 +15,58 @@ logger = logging.getLogger(__name__)
 
 class TogetherAgentProxy(BaseAgentProxy):
 
-    def _init_client(self):
-        from together import Together
+    @property
+    def client(self):
+        return get_client_registry().get("together", None, self.config.api_key)
 
-        self.client = Together(api_key=self.config.api_key)
-
-    def _query(self, messages):
-        response = self.client.chat.completions.create(
+    async def _aquery(self, messages):
+        response = await self.client.chat.completions.create(
             model=self.config.model,
             messages=messages,
             max_tokens=self.config.token_limit,
             temperature=self.config.temperature,
-            top_p=0.7,
+            top_p=self.config.top_p,
             top_k=50,
             repetition_penalty=self.config.frequency_penalty,
             stop=["<|eot_id|>"],
             stream=False,
         )
 
-        return response.choices[0].message.content
+        return completion_to_dict(response)
+
+    async def _aquery_stream(self, messages, on_delta):
+        stream = await self.client.chat.completions.create(
+            model=self.config.model,
+            messages=messages,
+            max_tokens=self.config.token_limit,
+            temperature=self.config.temperature,
+            top_p=self.config.top_p,
+            top_k=50,
+            repetition_penalty=self.config.frequency_penalty,
+            stop=["<|eot_id|>"],
+            stream=True,
+        )
+
+        return await stream_to_dict(stream, on_delta)
 
-    def run(self, input_vars: Dict[str, Any]) -> Dict[str, Any]:
+    @in_run_context
+    async def arun(
+        self, input_vars: Dict[str, Any], watchdog_feedback: Optional[str] = None
+    ) -> Dict[str, Any]:
         # 格式化 role 和 prompt
-        logger.info(f"Setting input variables: {input_vars}")
-        self.full_role = self.config.role.format(**input_vars)
-        logger.info(f"Setting role: {self.full_role}")
-        self.full_prompt = self.config.prompt.format(**input_vars)
-        logger.info(f"Setting prompt: {self.full_prompt}")
+        logger.debug("Setting input variables: %s", payload(input_vars))
+        self.full_role = self.role_template.render(input_vars)
+        logger.debug("Setting role: %s", payload(self.full_role))
+        self.full_prompt = self.prompt_template.render(input_vars)
+        logger.debug("Setting prompt: %s", payload(self.full_prompt))
 
-        output_vars = self._query(
+        response = await self._acall(
             messages=[
                 {"role": "system", "content": self.full_role},
                 {"role": "user", "content": self.full_prompt},
             ]
         )
+        output_vars = response["content"]
 
         if isinstance(output_vars, str) and len(self.config.output_vars) == 1:
             output_vars = {self.config.output_vars[0]["name"]: output_vars}
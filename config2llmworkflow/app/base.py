@@ -1,6 +1,41 @@
 from abc import ABC, abstractmethod
 from config2llmworkflow.configs.app.base import BaseAppConfig
 from config2llmworkflow.utils.factory import WorkflowFactory
+from config2llmworkflow.utils.executor import configure_executor
+from config2llmworkflow.utils.clients import configure_clients
+from config2llmworkflow.utils.cache import configure_cache
+from config2llmworkflow.utils.python_interpreter import configure_interpreter
+from config2llmworkflow.utils.metrics import configure_metrics
+from config2llmworkflow.utils.tracing import configure_tracing
+from config2llmworkflow.utils.cassette import configure_cassette
+from config2llmworkflow.utils.log import configure_logging
+from config2llmworkflow.utils.template import PromptTemplate
+from config2llmworkflow.workflows.scheduler import workflow_output_vars
+
+
+# 应用配置中进程级的部分，由 configure_runtime 应用
+RUNTIME_SECTIONS = (
+    "logging",
+    "executor",
+    "clients",
+    "cache",
+    "interpreter",
+    "metrics",
+    "tracing",
+    "cassette",
+)
+
+
+def configure_runtime(config: BaseAppConfig) -> None:
+    """按应用配置设置进程内共享的日志、执行器、客户端、缓存、解释器进程池、指标、追踪和录制回放"""
+    configure_logging(config.logging)
+    configure_executor(config.executor)
+    configure_clients(config.clients)
+    configure_cache(config.cache)
+    configure_interpreter(config.interpreter)
+    configure_metrics(config.metrics)
+    configure_tracing(config.tracing)
+    configure_cassette(config.cassette)
 
 
 class BaseApp(ABC):
@@ -13,7 +48,25 @@ class BaseApp(ABC):
         if self.config is None:
             raise ValueError("App configuration is required")
 
+        configure_runtime(self.config)
         self.workflow = WorkflowFactory.create(config=self.config.workflow.to_dict())
+        # 结果模板和节点的提示词一样在加载时解析
+        self.output_template = (
+            PromptTemplate(self.config.output) if self.config.output else None
+        )
+        self.validate()
+
+    def validate(self) -> None:
+        """检查工作流中的变量来源，以及结果模板引用的变量都是工作流的输出"""
+        self.workflow.validate()
+        if self.output_template is None:
+            return
+        missing = self.output_template.fields - workflow_output_vars(self.workflow)
+        if missing:
+            raise ValueError(
+                f"App output references variables not produced by workflow "
+                f"{self.workflow.config.name!r}: {sorted(missing)}"
+            )
 
     @abstractmethod
     def create_input_container(self):
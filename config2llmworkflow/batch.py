@@ -0,0 +1,227 @@
+"""
+无界面的批量运行入口：从 JSONL/CSV 逐行读取用例，并发运行工作流，结果逐条追加写入 JSONL。
+
+    config2llmworkflow-batch --config ./configs/config.yaml --input cases.jsonl --output results.jsonl
+    config2llmworkflow-batch ... --concurrency 8 --resume
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import yaml
+from loguru import logger
+
+from config2llmworkflow.app.base import configure_runtime
+from config2llmworkflow.configs.app.base import BaseAppConfig
+from config2llmworkflow.configs.cassette.base import CassetteConfig
+from config2llmworkflow.configs.logging.base import LoggingConfig
+from config2llmworkflow.nodes.context import RunContext
+from config2llmworkflow.utils.cassette import configure_cassette
+from config2llmworkflow.utils.log import configure_logging
+from config2llmworkflow.utils.factory import WorkflowFactory
+from config2llmworkflow.utils.metrics import run_metrics
+from config2llmworkflow.workflows.base import BaseWorkflow
+
+
+def load_app_config(path: str) -> BaseAppConfig:
+    with open(path, "r") as file:
+        return BaseAppConfig(**yaml.safe_load(file)["app"])
+
+
+def iter_cases(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """按行流式读取用例，返回 (行号, 输入变量)，行号从 0 开始"""
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        if path.endswith(".csv"):
+            for index, row in enumerate(csv.DictReader(file)):
+                yield index, row
+            return
+        index = 0
+        for line in file:
+            if line.strip():
+                yield index, json.loads(line)
+                index += 1
+
+
+def completed_indices(path: str) -> Set[int]:
+    """已经写入结果文件的用例行号，用于断点续跑"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                done.add(json.loads(line)["index"])
+            except (ValueError, KeyError):
+                # 中断时可能留下不完整的最后一行
+                continue
+    return done
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class BatchRunner:
+    """
+    以有限的并发运行多个用例。
+
+    所有用例共享同一个工作流实例，每个用例的运行状态保存在各自的 RunContext 中。
+    """
+
+    def __init__(self, config: BaseAppConfig, concurrency: int = 4):
+        self.config = config
+        self.concurrency = concurrency
+        self.workflow: Optional[BaseWorkflow] = None
+
+    def _build_workflow(self) -> None:
+        if self.workflow is None:
+            self.workflow = WorkflowFactory.create(config=self.config.workflow.to_dict())
+            self.workflow.validate()
+
+    async def _run_case(self, index: int, case: Dict[str, Any]) -> Dict[str, Any]:
+        record = {"index": index, "id": case.get("id", index)}
+        context = RunContext()
+        start = time.perf_counter()
+        try:
+            outputs = await context.arun(self.workflow, case)
+            record.update(status="ok", outputs=outputs)
+        except Exception as e:
+            logger.error("❌[Batch]Case {} failed: {}", index, e)
+            record.update(status="error", error=f"{type(e).__name__}: {e}")
+        record["latency_s"] = round(time.perf_counter() - start, 3)
+        metrics = run_metrics(context.logs(self.workflow))
+        record.update(metrics["total"])
+        record["nodes"] = metrics["nodes"]
+        return record
+
+    async def arun(
+        self,
+        cases: Iterator[Tuple[int, Dict[str, Any]]],
+        output_path: str,
+        skip: Optional[Set[int]] = None,
+    ) -> List[Dict[str, Any]]:
+        self._build_workflow()
+        skip = skip or set()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        summaries = []
+
+        with open(output_path, "a", encoding="utf-8") as output:
+
+            async def worker() -> None:
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        return
+                    record = await self._run_case(*item)
+                    # 每个用例完成后立即写入，中断后可以用 --resume 继续
+                    output.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                    output.flush()
+                    summaries.append(record)
+                    logger.info(
+                        "✅[Batch]Case {} {} in {}s ({} done)",
+                        record["index"],
+                        record["status"],
+                        record["latency_s"],
+                        len(summaries),
+                    )
+
+            workers = [asyncio.ensure_future(worker()) for _ in range(self.concurrency)]
+            try:
+                for index, case in cases:
+                    if index not in skip:
+                        await queue.put((index, case))
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+            finally:
+                for task in workers:
+                    task.cancel()
+        return summaries
+
+
+def summarize(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    latencies = [record["latency_s"] for record in records]
+    return {
+        "cases": len(records),
+        "errors": sum(record["status"] != "ok" for record in records),
+        "latency_p50_s": percentile(latencies, 0.5),
+        "latency_p95_s": percentile(latencies, 0.95),
+        "latency_max_s": max(latencies, default=0.0),
+        "llm_calls": sum(record["llm_calls"] for record in records),
+        "cached_calls": sum(record["cached_calls"] for record in records),
+        "prompt_tokens": sum(record["prompt_tokens"] for record in records),
+        "completion_tokens": sum(record["completion_tokens"] for record in records),
+        "retries": sum(record["retries"] for record in records),
+        "llm_latency_s": round(sum(record["llm_latency_s"] for record in records), 3),
+        "interpreter_s": round(sum(record["interpreter_s"] for record in records), 3),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run a workflow over a JSONL/CSV file.")
+    parser.add_argument("--config", required=True, help="Path to the YAML config.")
+    parser.add_argument("--input", required=True, help="Cases as .jsonl or .csv.")
+    parser.add_argument("--output", required=True, help="Results are appended as JSONL.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Cases run at once.")
+    parser.add_argument("--offset", type=int, default=0, help="Skip the first N cases.")
+    parser.add_argument("--limit", type=int, default=None, help="Run at most N cases.")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip cases whose index is already in the output file.",
+    )
+    parser.add_argument(
+        "--cassette", default=None, help="Record or replay LLM calls with this file."
+    )
+    parser.add_argument(
+        "--cassette-mode",
+        choices=["record", "replay", "replay_or_record"],
+        default="replay_or_record",
+    )
+    parser.add_argument(
+        "--log-level", default=None, help="Overrides the level in the config."
+    )
+    args = parser.parse_args(argv)
+
+    configure_logging(LoggingConfig(level=args.log_level or "INFO", path=None))
+
+    config = load_app_config(args.config)
+    configure_runtime(config)
+    if args.log_level:
+        # 命令行的级别覆盖配置文件，配置中的其他日志设置（文件、脱敏等）不变
+        logging_config = config.logging or LoggingConfig(path=None)
+        configure_logging(logging_config.model_copy(update={"level": args.log_level}))
+    if args.cassette:
+        configure_cassette(CassetteConfig(mode=args.cassette_mode, path=args.cassette))
+
+    skip = completed_indices(args.output) if args.resume else set()
+    if skip:
+        logger.info("⏩[Batch]Resuming, {} cases already done", len(skip))
+
+    def cases():
+        for index, case in iter_cases(args.input):
+            if index < args.offset:
+                continue
+            if args.limit is not None and index >= args.offset + args.limit:
+                return
+            yield index, case
+
+    runner = BatchRunner(config, concurrency=args.concurrency)
+    records = asyncio.run(runner.arun(cases(), args.output, skip=skip))
+
+    summary = summarize(records)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,54 @@
 # config2llmworkflow/configs/agents/base.py
 
 from pydantic import Field, BaseModel
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 
-from config2llmworkflow.configs.nodes.base import BaseNodeConfig
+from config2llmworkflow.configs.nodes.base import BaseNodeConfig, NodeType
+
+
+class ResilienceConfig(BaseModel):
+    """
+    LLM 调用的限流、重试和熔断设置，按 (provider, base_url, model) 共享；
+    同一端点以第一个创建的智能体的设置为准。
+    """
+
+    rpm_limit: Optional[int] = Field(None, title="Requests per minute, None for no limit")
+    tpm_limit: Optional[int] = Field(None, title="Tokens per minute, None for no limit")
+    max_retries: int = Field(3, title="Retries on 429, 5xx, timeouts and connection errors")
+    retry_base_delay: float = Field(1.0, title="Initial backoff in seconds")
+    retry_max_delay: float = Field(60.0, title="Max backoff in seconds")
+    adaptive_concurrency: Optional[int] = Field(
+        None, title="Max concurrency adapted with AIMD, None to disable"
+    )
+    circuit_failure_threshold: int = Field(
+        5, title="Consecutive failures before the circuit opens, 0 to disable"
+    )
+    circuit_reset_timeout: float = Field(
+        30.0, title="Seconds before an open circuit lets a trial call through"
+    )
+
+
+class HistoryConfig(BaseModel):
+    """
+    多轮对话（Python 解释器、工具调用）中每次请求实际发送的消息。
+
+    系统提示词和第一条用户消息（任务本身）总是保留，节点日志中仍记录完整的历史。
+    """
+
+    keep_last: Optional[int] = Field(
+        6,
+        ge=1,
+        title="Recent messages kept after the system prompt and task, None for all",
+    )
+    max_output_chars: int = Field(
+        1000,
+        title="Earlier interpreter outputs are cut to this many characters, 0 to keep",
+    )
+    max_prompt_tokens: Optional[int] = Field(
+        None,
+        title="Drop the oldest kept messages until the prompt fits; None uses the "
+        "model's context window minus token_limit (no budget for unknown models)",
+    )
 
 
 class BaseAgentConfig(BaseNodeConfig):
@@ -16,14 +61,48 @@ class BaseAgentConfig(BaseNodeConfig):
     api_key: str = Field("", title="API key")
     base_url: str = Field("https://api.deepseek.com/v1", title="Base URL")
     temperature: float = Field(0.0, title="Temperature")
+    top_p: float = Field(0.7, title="Top p")
     frequency_penalty: float = Field(2, title="Frequency penalty")
     reflect_times: int = Field(0, title="Reflect times")
     continue_run: bool = Field(True, title="Continue run")
     disable_python_run: bool = Field(False, title="Disable python run")
     tools: List[str] = Field([], title="Tools")
+    cache: Optional[bool] = Field(
+        None, title="Cache LLM responses, defaults to caching when temperature is 0"
+    )
+    stream: bool = Field(True, title="Stream tokens when a listener is attached")
+    resilience: ResilienceConfig = Field(
+        default_factory=ResilienceConfig, title="Rate limits, retries and circuit breaker"
+    )
+    history: HistoryConfig = Field(
+        default_factory=HistoryConfig, title="Message history sent on each round"
+    )
+    max_interpreter_rounds: int = Field(
+        5, title="Max Python interpreter runs per node before answering as is"
+    )
+    max_tool_rounds: int = Field(
+        5, title="Max rounds of tool calls in one reply before answering as is"
+    )
+    tool_timeout: Optional[float] = Field(
+        30.0, title="Seconds each tool call may run, None for no limit"
+    )
+
+
+def _merge_defaults(defaults: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    merged = dict(defaults)
+    for key, value in config.items():
+        # resilience、history 等嵌套设置按字段合并
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            value = {**merged[key], **value}
+        merged[key] = value
+    return merged
 
 
 class GlobalAgentConfig(BaseModel):
+    """
+    工作流中所有智能体的默认设置，只有显式写出的字段生效，节点自己的设置优先。
+    """
+
     provider: str = Field("openai", title="Agent framework")
     clean_memory: bool = Field(True, title="Clean memory")
 
@@ -33,14 +112,50 @@ class GlobalAgentConfig(BaseModel):
     api_key: str = Field("", title="API key")
     base_url: str = Field("https://api.deepseek.com/v1", title="Base URL")
     temperature: float = Field(0.0, title="Temperature")
+    top_p: float = Field(0.7, title="Top p")
     frequency_penalty: float = Field(2, title="Frequency penalty")
     reflect_times: int = Field(0, title="Reflect times")
     continue_run: bool = Field(True, title="Continue run")
     disable_python_run: bool = Field(False, title="Disable python run")
+    cache: Optional[bool] = Field(
+        None, title="Cache LLM responses, defaults to caching when temperature is 0"
+    )
+    stream: bool = Field(True, title="Stream tokens when a listener is attached")
+    resilience: ResilienceConfig = Field(
+        default_factory=ResilienceConfig, title="Rate limits, retries and circuit breaker"
+    )
+    history: HistoryConfig = Field(
+        default_factory=HistoryConfig, title="Message history sent on each round"
+    )
+    max_interpreter_rounds: int = Field(
+        5, title="Max Python interpreter runs per node before answering as is"
+    )
+    max_tool_rounds: int = Field(
+        5, title="Max rounds of tool calls in one reply before answering as is"
+    )
+    tool_timeout: Optional[float] = Field(
+        30.0, title="Seconds each tool call may run, None for no limit"
+    )
 
     def to_dict(self):
         return self.model_dump()
 
+    def apply(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        把显式设置的字段作为节点配置中未设置字段的默认值。
+
+        子工作流把这些默认值并入自己的 global_agent，再应用到其中的节点。
+        """
+        defaults = self.model_dump(exclude_unset=True)
+        if config.get("node_type") == NodeType.AGENT.value:
+            return _merge_defaults(defaults, config)
+        if "nodes" in config:
+            own = config.get("global_agent") or {}
+            if isinstance(own, BaseModel):
+                own = own.model_dump(exclude_unset=True)
+            return {**config, "global_agent": _merge_defaults(defaults, own)}
+        return config
+
 
 class BaseAgentProxyConfig(BaseAgentConfig):
     role: str = Field(..., title="Agent role")
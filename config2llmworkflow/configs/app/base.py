@@ -4,6 +4,14 @@ from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
 
 from config2llmworkflow.configs.workflows.base import BaseWorkflowConfig
+from config2llmworkflow.configs.executor.base import ExecutorConfig
+from config2llmworkflow.configs.clients.base import ClientPoolConfig
+from config2llmworkflow.configs.cache.base import CacheConfig
+from config2llmworkflow.configs.interpreter.base import InterpreterConfig
+from config2llmworkflow.configs.metrics.base import MetricsConfig
+from config2llmworkflow.configs.tracing.base import TracingConfig
+from config2llmworkflow.configs.cassette.base import CassetteConfig
+from config2llmworkflow.configs.logging.base import LoggingConfig
 
 
 class BaseAppConfig(BaseModel):
@@ -17,6 +25,16 @@ class BaseAppConfig(BaseModel):
     show_sidebar: Optional[bool] = Field(False, title="Show sidebar")
     output: Optional[str] = Field(None, title="App output")
     workflow: BaseWorkflowConfig = Field(..., title="Workflow")
+    executor: Optional[ExecutorConfig] = Field(None, title="Shared executor")
+    clients: Optional[ClientPoolConfig] = Field(None, title="Shared LLM clients")
+    cache: Optional[CacheConfig] = Field(None, title="LLM response cache")
+    interpreter: Optional[InterpreterConfig] = Field(
+        None, title="Python interpreter worker pool"
+    )
+    metrics: Optional[MetricsConfig] = Field(None, title="Metrics export")
+    tracing: Optional[TracingConfig] = Field(None, title="Span tracing")
+    cassette: Optional[CassetteConfig] = Field(None, title="Record/replay LLM calls")
+    logging: Optional[LoggingConfig] = Field(None, title="Log sinks and levels")
 
     def to_dict(self):
         return {
@@ -26,4 +44,12 @@ class BaseAppConfig(BaseModel):
             "show_sidebar": self.show_sidebar,
             "output": self.output,
             "workflow": self.workflow.to_dict(),
+            "executor": self.executor.to_dict() if self.executor else None,
+            "clients": self.clients.to_dict() if self.clients else None,
+            "cache": self.cache.to_dict() if self.cache else None,
+            "interpreter": self.interpreter.to_dict() if self.interpreter else None,
+            "metrics": self.metrics.to_dict() if self.metrics else None,
+            "tracing": self.tracing.to_dict() if self.tracing else None,
+            "cassette": self.cassette.to_dict() if self.cassette else None,
+            "logging": self.logging.to_dict() if self.logging else None,
         }
@@ -0,0 +1,23 @@
+# config2llmworkflow/configs/cache/base.py
+
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class CacheConfig(BaseModel):
+    """
+    LLM 响应缓存配置，内存 LRU 与 SQLite 两层。
+
+    磁盘层会把提示词和响应以明文写入 SQLite 文件，需要显式设置 disk_path 开启。
+    """
+
+    enabled: bool = Field(True, title="Enable response cache")
+    memory_max_entries: int = Field(1024, title="Max entries in memory")
+    disk_path: Optional[str] = Field(
+        None, title="SQLite file, e.g. .cache/llm_responses.sqlite; None for memory only"
+    )
+    disk_max_entries: int = Field(100000, title="Max entries on disk")
+    ttl: Optional[float] = Field(7 * 24 * 3600, title="Entry time-to-live in seconds")
+
+    def to_dict(self):
+        return self.model_dump()
@@ -0,0 +1,18 @@
+# config2llmworkflow/configs/cassette/base.py
+
+from pydantic import BaseModel, Field
+from typing import Literal
+
+
+class CassetteConfig(BaseModel):
+    """把 LLM 请求和响应录制到文件中，之后不联网回放"""
+
+    mode: Literal["off", "record", "replay", "replay_or_record"] = Field(
+        "off", title="off, record, replay, or replay_or_record (record on miss)"
+    )
+    path: str = Field(".cassettes/llm.jsonl", title="Cassette JSONL file")
+    simulate_latency: bool = Field(False, title="Sleep for the recorded latency on replay")
+    latency_scale: float = Field(1.0, title="Multiplier for the simulated latency")
+
+    def to_dict(self):
+        return self.model_dump()
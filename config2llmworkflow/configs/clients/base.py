@@ -0,0 +1,17 @@
+# config2llmworkflow/configs/clients/base.py
+
+from pydantic import BaseModel, Field
+
+
+class ClientPoolConfig(BaseModel):
+    """共享 LLM 客户端的连接池配置"""
+
+    max_connections: int = Field(100, title="Max connections per client")
+    max_keepalive_connections: int = Field(
+        20, title="Max idle keep-alive connections per client"
+    )
+    keepalive_expiry: float = Field(30.0, title="Keep-alive expiry in seconds")
+    timeout: float = Field(600.0, title="Request timeout in seconds")
+
+    def to_dict(self):
+        return self.model_dump()
@@ -0,0 +1,22 @@
+# config2llmworkflow/configs/executor/base.py
+
+from pydantic import BaseModel, Field
+from typing import Dict, Optional
+
+
+class ExecutorConfig(BaseModel):
+    """进程内共享执行器的配置，所有工作流共用同一组并发上限"""
+
+    max_workers: int = Field(32, title="Max threads for blocking calls")
+    max_concurrency: Optional[int] = Field(
+        None, title="Max concurrent LLM calls in the process"
+    )
+    provider_limits: Dict[str, int] = Field(
+        {}, title="Max concurrent LLM calls per provider"
+    )
+    base_url_limits: Dict[str, int] = Field(
+        {}, title="Max concurrent LLM calls per base_url"
+    )
+
+    def to_dict(self):
+        return self.model_dump()
@@ -0,0 +1,23 @@
+# config2llmworkflow/configs/interpreter/base.py
+
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class InterpreterConfig(BaseModel):
+    """运行智能体生成的 Python 代码的常驻进程池配置"""
+
+    pool_size: int = Field(2, title="Number of warm worker processes")
+    timeout: float = Field(30, title="Wall-clock timeout per execution in seconds")
+    memory_limit_mb: Optional[int] = Field(
+        1024, title="Address space limit per worker in MB, None for no limit"
+    )
+    max_output_chars: int = Field(20000, title="Max captured stdout/stderr characters")
+    max_jobs_per_worker: int = Field(50, title="Recycle a worker after this many jobs")
+    preload_modules: List[str] = Field(
+        ["math", "json", "re", "numpy"], title="Modules imported when a worker starts"
+    )
+    cache_max_entries: int = Field(256, title="Results cached by code hash, 0 to disable")
+
+    def to_dict(self):
+        return self.model_dump()
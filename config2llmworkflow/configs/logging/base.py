@@ -0,0 +1,39 @@
+# config2llmworkflow/configs/logging/base.py
+
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class LoggingConfig(BaseModel):
+    """日志配置，文件日志按 JSON 行写入并按大小轮转，写盘在后台线程中进行"""
+
+    level: str = Field("INFO", title="Default level")
+    levels: Dict[str, str] = Field(
+        default_factory=lambda: {
+            "httpx": "WARNING",
+            "httpcore": "WARNING",
+            "openai": "WARNING",
+        },
+        title="Levels by logger name prefix, e.g. config2llmworkflow.agents or httpx",
+    )
+    console: bool = Field(True, title="Log to stderr")
+    path: Optional[str] = Field("logs/app.jsonl", title="JSON lines log file, None to disable")
+    rotation: str = Field("50 MB", title="Rotate the log file at this size")
+    retention: int = Field(10, title="Number of rotated files kept")
+    enqueue: bool = Field(True, title="Write through a background queue")
+    max_payload_chars: int = Field(2000, title="Longer payloads are truncated")
+    max_payload_items: int = Field(20, title="Longer lists keep only their first and last items")
+    redact_keys: List[str] = Field(
+        default_factory=lambda: [
+            "api_key",
+            "authorization",
+            "password",
+            "secret",
+            "access_token",
+        ],
+        title="Payload fields whose values are masked, matched case-insensitively",
+    )
+
+    def to_dict(self):
+        return self.model_dump()
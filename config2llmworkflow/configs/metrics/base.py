@@ -0,0 +1,22 @@
+# config2llmworkflow/configs/metrics/base.py
+
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class MetricsConfig(BaseModel):
+    """进程内指标的导出配置"""
+
+    enabled: bool = Field(True, title="Record metrics")
+    prometheus_path: Optional[str] = Field(
+        None, title="Write Prometheus text format to this file"
+    )
+    json_path: Optional[str] = Field(None, title="Write a JSON snapshot to this file")
+    flush_interval: float = Field(15, title="Seconds between file exports")
+    latency_buckets: List[float] = Field(
+        [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120],
+        title="Histogram buckets in seconds",
+    )
+
+    def to_dict(self):
+        return self.model_dump()
@@ -3,7 +3,7 @@
 
 from pydantic import BaseModel, Field, field_validator
 
-from typing import List, Optional
+from typing import List, Optional, Literal
 from enum import Enum
 
 
@@ -25,14 +25,39 @@ class InputVariableConfig(BaseVariableConfig):
     )
 
 
+class ExtractionFieldConfig(BaseModel):
+    name: str = Field(..., title="Variable name the field is stored as")
+    key: Optional[str] = Field(None, title="Key in the output, defaults to name")
+    type: Literal["str", "int", "float", "bool"] = Field("str", title="Field type")
+    default: Optional[str | int | float | bool] = Field(
+        None, title="Default value, the field is required when not set"
+    )
+
+
+class ExtractionConfig(BaseModel):
+    """从节点输出的文本中解析结构化字段"""
+
+    pattern: Optional[str] = Field(
+        None,
+        title="Regex, named groups give fields, two unnamed groups give key/value pairs",
+    )
+    json_path: Optional[str] = Field(
+        None, title="Dotted path into the first JSON object in the output, '' for root"
+    )
+    fields: List[ExtractionFieldConfig] = Field([], title="Typed fields")
+    keep_extra: bool = Field(True, title="Keep matched keys not listed in fields")
+    retries: int = Field(1, title="Re-query the node this many times on failure")
+
+
 class OutputVariableConfig(BaseVariableConfig):
-    pass
+    extract: Optional[ExtractionConfig] = Field(None, title="Parse fields from output")
 
 
 class NodeType(Enum):
     AGENT = "agent"
     WORKFLOW = "workflow"
     LOOP = "loop"
+    COMPUTED = "computed"
 
 
 class BaseNodeConfig(BaseModel):
@@ -0,0 +1,18 @@
+# config2llmworkflow/configs/tracing/base.py
+
+from pydantic import BaseModel, Field
+
+
+class TracingConfig(BaseModel):
+    """工作流运行链路的追踪配置，span 以 OpenTelemetry 的 JSON 结构逐行写入文件"""
+
+    enabled: bool = Field(False, title="Record spans")
+    path: str = Field(".traces/spans.jsonl", title="JSONL file spans are appended to")
+    sample_rate: float = Field(
+        1.0, ge=0, le=1, title="Fraction of root spans (and their trees) recorded"
+    )
+    service_name: str = Field("config2llmworkflow", title="service.name resource attribute")
+    max_attribute_chars: int = Field(2000, title="Longer string attributes are truncated")
+
+    def to_dict(self):
+        return self.model_dump()
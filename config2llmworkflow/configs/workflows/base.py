@@ -1,7 +1,7 @@
 # config2llmworkflow/configs/workflows/base.py
 
 
-from pydantic import Field
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
 from config2llmworkflow.configs.nodes.base import BaseNodeConfig
@@ -11,9 +11,26 @@ from config2llmworkflow.configs.agents.base import (
 )
 
 
+class ComputedVariableConfig(BaseModel):
+    """由其他变量计算出的数值变量，在工作流中作为一个不调用 LLM 的步骤运行"""
+
+    name: str = Field(..., title="Variable name")
+    expression: str = Field(..., title="Numeric expression, e.g. 2*dL1 + hL1")
+    description: Optional[str] = Field(None, title="Variable description")
+    priority: Optional[float] = Field(
+        None, title="Priority, defaults to the highest priority of its producers"
+    )
+    append_to: Optional[str] = Field(
+        None,
+        title="Compatibility: also append {'name': value} to this text variable, "
+        "for prompts that still read derived values from summary_N text",
+    )
+
+
 class BaseWorkflowConfig(BaseNodeConfig):
     provider: str = Field(..., title="Provider, including default, loop")
     nodes: List[BaseNodeConfig] = Field(..., title="Nodes")
+    computed_vars: List[ComputedVariableConfig] = Field([], title="Computed variables")
     global_agent: Optional[GlobalAgentConfig] = Field(None, title="Global agent")
 
 
@@ -24,4 +41,9 @@ class BaseLoopWorkflowConfig(BaseWorkflowConfig):
 
     end_condition: str = Field(..., title="End condition expression in python")
     max_loops: int = Field(3, title="Max loops")
+    incremental: bool = Field(
+        True,
+        title="Reuse outputs of deterministic nodes (temperature 0, no tools or "
+        "interpreter) whose inputs are unchanged between loops",
+    )
     watchdog_agent: BaseAgentProxyConfig = Field(..., title="Agent")
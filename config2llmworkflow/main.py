@@ -1,6 +1,13 @@
-from typing import List
+import queue
+from typing import Any, Dict, List
 from config2llmworkflow.configs.nodes.base import InputVariableConfig
 from config2llmworkflow.app.base import BaseApp
+from config2llmworkflow.nodes.context import RunContext
+from config2llmworkflow.utils.executor import get_executor
+from config2llmworkflow.utils.extraction import ExtractionError
+from config2llmworkflow.utils.log import payload
+from config2llmworkflow.utils.metrics import run_metrics
+from config2llmworkflow.utils.streaming import NodeStreams, arun_streaming
 import streamlit as st
 import json
 from loguru import logger
@@ -85,20 +92,65 @@ class App(BaseApp):
         return True  # 证明所有的输入变量都已经填写
 
     def show_sidebar(self):
-        # 在侧边栏显示每一个 AgentProxy 的输出
+        # 在侧边栏显示当前会话最近一次运行中每一个 AgentProxy 的输出
+        logs = st.session_state.get("workflow_logs")
+        if logs is None:
+            return
         st.sidebar.title("Agent 输出")
+        # 每个节点的耗时和 token 用量
+        metrics = run_metrics(logs)
+        st.sidebar.dataframe(
+            [{"node": name, **values} for name, values in metrics["nodes"].items()]
+        )
         # 显示一个下载json文件的按钮
         st.sidebar.download_button(
             label="下载日志",
-            data=json.dumps(self.workflow.logs, ensure_ascii=False, indent=4),
+            data=json.dumps(logs, ensure_ascii=False, indent=4),
         )
-        st.sidebar.json(self.workflow.logs)
+        st.sidebar.json(logs)
 
     def show_footer(self):
         # 显示页脚
         st.markdown("---")
         st.markdown(self.config.footer)
 
+    def run_workflow_streaming(
+        self, input_vars: Dict[str, Any], context: RunContext
+    ) -> Dict[str, Any]:
+        """
+        在 context 中运行工作流，并把每个节点的流式输出实时显示在各自的展开框中。
+
+        多个节点可能并发输出，因此每个节点使用独立的 st.empty 占位符，
+        而不是 st.write_stream；回调只把文本放入队列，由脚本线程负责渲染。
+        """
+        events: "queue.Queue[tuple]" = queue.Queue()
+        future = get_executor().submit(
+            arun_streaming(
+                self.workflow,
+                input_vars,
+                lambda name, delta: events.put((name, delta)),
+                context,
+            )
+        )
+
+        placeholders = {}
+        # 请求重试时丢弃这次请求已经显示的部分，避免同一段文本出现两次
+        streams = NodeStreams()
+
+        def render(name: str, delta) -> None:
+            if name not in placeholders:
+                placeholders[name] = st.expander(name, expanded=True).empty()
+            placeholders[name].markdown(streams.feed(name, delta))
+
+        while not future.done() or not events.empty():
+            try:
+                name, delta = events.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            render(name, delta)
+
+        return future.result()
+
     def run(self) -> None:
         st.title(self.config.name)
 
@@ -107,19 +159,36 @@ class App(BaseApp):
         if st.button("运行工作流"):
             if self.valid_input_vars(input_vars):
                 with st.spinner("运行中..."):
-                    # 运行工作流
-                    all_out_vars = self.workflow.run(input_vars=input_vars)
+                    # 工作流实例在会话之间共享，每次运行的状态保存在各自的 RunContext 中
+                    context = RunContext()
+                    try:
+                        all_out_vars = self.run_workflow_streaming(input_vars, context)
+                    except ExtractionError as e:
+                        # 已经按配置重新请求过出错的节点，仍然无法解析
+                        logger.error("❌[Output]{}", e)
+                        st.error(f"{e.node} 的输出解析失败: {e.reason}")
+                        all_out_vars = None
+                    logs = context.logs(self.workflow)
                     # 格式化
-                    output = self.config.output.format(**all_out_vars)
-                    if self.config.show_sidebar:
-                        self.show_sidebar()
-                # 显示结果
-                if output:
-                    st.markdown("---")
-                    st.title("结果")
-                    logger.info("✨[Output]最终结果: \n{}", output)
-                    st.write(output)
-                else:
+                    output = (
+                        self.output_template.render(all_out_vars)
+                        if all_out_vars is not None and self.output_template
+                        else None
+                    )
+                    logger.info("✨[Output]最终结果: \n{}", payload(output))
+                # 结果保存在会话状态中，后续的重跑仍然可以显示
+                st.session_state["workflow_output"] = output
+                st.session_state["workflow_logs"] = logs
+                if not output:
                     st.error("运行工作流失败")
+
+        output = st.session_state.get("workflow_output")
+        if self.config.show_sidebar:
+            self.show_sidebar()
+        # 显示结果
+        if output:
+            st.markdown("---")
+            st.title("结果")
+            st.write(output)
         # 添加页脚
         self.show_footer()
@@ -2,24 +2,35 @@ from abc import ABC, abstractmethod
 from typing import Any, Dict
 
 from config2llmworkflow.configs.nodes.base import BaseNodeConfig
+from config2llmworkflow.nodes.context import run_state
+from config2llmworkflow.utils.executor import get_executor
+from config2llmworkflow.utils.extraction import compile_extractors
 
 
 class Node(ABC):
     type = "node"
-    # 记录流程
+    # 记录流程，每次运行各自一份，保存在当前的 RunContext 中
+    node_log = run_state(
+        lambda node: {
+            "name": node.config.name,
+            "priority": node.config.priority,
+            "description": node.config.description,
+        }
+    )
 
     def __init__(self, config: BaseNodeConfig = None):
         self.config = config
-        self.node_log = {
-            "name": self.config.name,
-            "priority": self.config.priority,
-            "description": self.config.description,
-        }
+        # 输出变量的解析规则在构建节点时编译
+        self.extractors = compile_extractors(self.config.output_vars)
 
     @abstractmethod
     def run(self, input_vars: Dict[str, Any]) -> Any:
         pass
 
+    async def arun(self, input_vars: Dict[str, Any]) -> Any:
+        # 默认在共享线程池中运行同步的 run，原生异步的节点应覆盖此方法
+        return await get_executor().run_blocking(self.run, input_vars)
+
     def __call__(self, input_vars: Dict[str, Any]) -> Dict[str, Any]:
         return self.run(input_vars)
 
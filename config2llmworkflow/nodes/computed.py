@@ -0,0 +1,74 @@
+from typing import Any, Dict
+
+from config2llmworkflow.configs.nodes.base import (
+    BaseNodeConfig,
+    InputVariableConfig,
+    NodeType,
+    OutputVariableConfig,
+)
+from config2llmworkflow.configs.workflows.base import ComputedVariableConfig
+from config2llmworkflow.nodes.base import Node
+from config2llmworkflow.nodes.context import in_run_context
+from config2llmworkflow.utils.expressions import CompiledExpression
+
+
+class ComputedNode(Node):
+    """
+    计算 computed_vars 中一个变量的节点。
+
+    表达式引用的变量作为 input_vars，结果作为 output_vars，
+    因此和其他节点一样参与依赖推断、加载时校验和增量复用；在事件循环中直接求值。
+    配置了 append_to 时，该变量同时是输入和输出，结果以 {'name': value} 的形式追加到其文本末尾。
+    """
+
+    type = NodeType.COMPUTED
+
+    def __init__(self, variable: ComputedVariableConfig):
+        self.variable = variable
+        self.expression = CompiledExpression(variable.expression)
+        input_vars = [
+            InputVariableConfig(name=name, type="float")
+            for name in sorted(self.expression.fields)
+        ]
+        output_vars = [OutputVariableConfig(name=variable.name, type="float")]
+        if variable.append_to:
+            input_vars.append(InputVariableConfig(name=variable.append_to, type="str"))
+            output_vars.append(
+                OutputVariableConfig(name=variable.append_to, type="str")
+            )
+        super().__init__(
+            BaseNodeConfig(
+                name=f"computed:{variable.name}",
+                node_type=NodeType.COMPUTED.value,
+                description=variable.description or variable.expression,
+                input_vars=input_vars,
+                output_vars=output_vars,
+                # 未配置优先级时由工作流按上游节点补全
+                priority=1.0 if variable.priority is None else variable.priority,
+            )
+        )
+
+    @in_run_context
+    def run(self, input_vars: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            value = self.expression.evaluate(input_vars)
+        except Exception as e:
+            raise ValueError(
+                f"Failed to compute {self.variable.name} = {self.variable.expression}: {e}"
+            ) from e
+        self.node_log["value"] = value
+        result = {self.variable.name: value}
+        if self.variable.append_to:
+            # 兼容旧配置：原先在 _collect_outputs 中把派生量拼接到 summary_N 的文本后面
+            text = input_vars.get(self.variable.append_to) or ""
+            result[self.variable.append_to] = (
+                f"{text}{{'{self.variable.name}': {value}}}"
+            )
+        return result
+
+    async def arun(self, input_vars: Dict[str, Any]) -> Dict[str, Any]:
+        # 纯数值计算很快，不需要放到线程池
+        return self.run(input_vars)
+
+    def to_dict(self):
+        return {"config": self.variable.model_dump()}
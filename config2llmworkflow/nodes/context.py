@@ -0,0 +1,144 @@
+import contextlib
+import contextvars
+import copy
+import functools
+import inspect
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class RunContext:
+    """
+    一次工作流运行的可变状态：每个节点的日志、回答、渲染后的提示词，以及工作流的变量。
+
+    节点对象在构建之后不再保存运行状态，同一个工作流可以同时服务多个会话、
+    批量用例和 HTTP 任务，每次运行使用各自的 RunContext。
+    """
+
+    def __init__(self):
+        # 以节点对象的 id 为键，节点的生命周期与工作流相同
+        self._state: Dict[int, Dict[str, Any]] = {}
+
+    def state(self, node: Any) -> Dict[str, Any]:
+        """节点在本次运行中的状态"""
+        state = self._state.get(id(node))
+        if state is None:
+            state = self._state[id(node)] = {}
+        return state
+
+    async def arun(self, node: Any, input_vars: Dict[str, Any], **kwargs) -> Any:
+        """在这个上下文中运行节点，节点是工作流时也使用这个上下文"""
+        token = _current_run.set(self)
+        passed = _passed_run.set(self)
+        try:
+            return await node.arun(input_vars, **kwargs)
+        finally:
+            _passed_run.reset(passed)
+            _current_run.reset(token)
+
+    def logs(self, node: Any) -> Dict[str, Any]:
+        """节点（工作流则包括所有子节点）在这个上下文中的日志，返回副本"""
+        token = _current_run.set(self)
+        try:
+            return copy.deepcopy(node.logs)
+        finally:
+            _current_run.reset(token)
+
+
+# 正在运行的上下文，run_state 读写其中的状态
+_current_run: contextvars.ContextVar[Optional[RunContext]] = contextvars.ContextVar(
+    "current_run", default=None
+)
+# RunContext.arun 显式传给下一个工作流入口的上下文
+_passed_run: contextvars.ContextVar[Optional[RunContext]] = contextvars.ContextVar(
+    "passed_run", default=None
+)
+
+
+def current_run() -> RunContext:
+    """
+    当前的运行上下文。
+
+    不在任何运行中时返回一个临时的上下文，不会保存下来，
+    因此运行之外读取的都是初始值，写入的值随即丢弃，不会带到之后的运行中。
+    """
+    context = _current_run.get()
+    if context is None:
+        return RunContext()
+    return context
+
+
+@contextlib.contextmanager
+def run_context(context: Optional[RunContext] = None) -> Iterator[RunContext]:
+    """
+    工作流入口使用的运行上下文。
+
+    未指定 context 时使用 RunContext.arun 显式传入的上下文，没有则总是创建新的，
+    即使在另一次运行中调用也不会共享状态。嵌套的工作流由外层通过 RunContext.arun 传入上下文。
+    """
+    if context is None:
+        context = _passed_run.get() or RunContext()
+    token = _current_run.set(context)
+    # 只对这一个入口生效，工作流内部直接调用的其他工作流仍然使用新的上下文
+    passed = _passed_run.set(None)
+    try:
+        yield context
+    finally:
+        _passed_run.reset(passed)
+        _current_run.reset(token)
+
+
+def in_run_context(func: F) -> F:
+    """
+    节点入口的装饰器：不在任何运行中（直接调用单个节点）时，
+    为这一次调用创建运行上下文，调用结束后丢弃。
+    """
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            if _current_run.get() is not None:
+                return await func(*args, **kwargs)
+            with run_context(RunContext()):
+                return await func(*args, **kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _current_run.get() is not None:
+            return func(*args, **kwargs)
+        with run_context(RunContext()):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+class run_state:
+    """
+    节点上按运行隔离的属性，读写的是当前 RunContext 中的值。
+
+        class Agent(Node):
+            answer = run_state(lambda node: {})
+
+    default 以节点为参数，在本次运行中第一次读取时生成初始值。
+    """
+
+    def __init__(self, default: Callable[[Any], Any]):
+        self.default = default
+        self.name = ""
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, node: Any, owner: Optional[type] = None) -> Any:
+        if node is None:
+            return self
+        state = current_run().state(node)
+        if self.name not in state:
+            state[self.name] = self.default(node)
+        return state[self.name]
+
+    def __set__(self, node: Any, value: Any) -> None:
+        current_run().state(node)[self.name] = value
@@ -0,0 +1,491 @@
+"""
+以 HTTP JSON API 的形式提供工作流服务。
+
+    POST /run              同步运行，返回输出
+    POST /jobs             异步运行，返回 job_id
+    GET  /jobs/<job_id>    查询异步任务
+    GET  /healthz          运行状态
+    GET  /metrics          Prometheus 文本格式的进程指标
+    GET  /metrics.json     JSON 格式的进程指标
+
+请求体：{"workflow": "<名称，只有一个工作流时可省略>", "inputs": {...}}
+
+同时运行的任务数不超过 max_in_flight，排队的任务数不超过 max_queue，
+超过时返回 429 和 Retry-After；/run 等待超过 request_timeout 时返回 504，
+任务继续运行，可以通过 Location 中的地址查询。任务因输入失败（InvalidInputError，
+如缺少输入变量、提示词超长、输出无法解析）时返回 422，其他异常返回 500。
+
+日志、执行器、客户端、缓存等设置是进程级的，同时加载多个配置时只使用第一个配置中的设置，
+其他配置中不同的设置会被忽略并给出警告。
+收到 SIGTERM/SIGINT 后不再接收新任务，等待已接收的任务完成、响应发送完毕后退出。
+"""
+
+import argparse
+import collections
+import json
+import math
+import os
+import signal
+import threading
+import time
+import uuid
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional
+
+import yaml
+from loguru import logger
+
+from config2llmworkflow.app.base import RUNTIME_SECTIONS, configure_runtime
+from config2llmworkflow.configs.app.base import BaseAppConfig
+from config2llmworkflow.nodes.context import RunContext
+from config2llmworkflow.utils.errors import InvalidInputError
+from config2llmworkflow.utils.executor import get_executor
+from config2llmworkflow.utils.factory import WorkflowFactory
+from config2llmworkflow.utils.metrics import get_metrics, run_metrics
+from config2llmworkflow.workflows.base import BaseWorkflow
+
+
+class Saturated(Exception):
+    """队列已满，需要客户端稍后重试"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Server is saturated")
+        self.retry_after = retry_after
+
+
+class Draining(Exception):
+    """服务正在停止，不再接收新任务"""
+
+
+class Job:
+    def __init__(self, workflow: str, inputs: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.workflow = workflow
+        self.inputs = inputs
+        self.status = "queued"
+        self.outputs: Optional[Dict[str, Any]] = None
+        self.metrics: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.error_type: Optional[str] = None
+        # 失败是否由输入引起，决定 /run 返回 422 还是 500
+        self.invalid_input = False
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.done = threading.Event()
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "job_id": self.id,
+            "workflow": self.workflow,
+            "status": self.status,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+        if self.outputs is not None:
+            data["outputs"] = self.outputs
+        if self.metrics is not None:
+            data["metrics"] = self.metrics
+        if self.error is not None:
+            data["error"] = self.error
+            data["error_type"] = self.error_type
+        return data
+
+
+class WorkflowService:
+    """
+    管理工作流实例和任务调度。
+
+    每个工作流只构建一个实例，并发的任务各自使用一个 RunContext 保存运行状态；
+    任务在共享执行器的后台事件循环中运行。
+    """
+
+    def __init__(
+        self,
+        configs: Dict[str, BaseAppConfig],
+        max_in_flight: int = 8,
+        max_queue: int = 64,
+        max_finished_jobs: int = 1000,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_finished_jobs = max_finished_jobs
+        self._workflows: Dict[str, BaseWorkflow] = {}
+        for name, config in configs.items():
+            workflow = WorkflowFactory.create(config=config.workflow.to_dict())
+            workflow.validate()
+            self._workflows[name] = workflow
+            logger.info("🚀[Server]Loaded workflow {}", name)
+
+        self._lock = threading.Lock()
+        self._pending: Deque[Job] = collections.deque()
+        self._in_flight = 0
+        self._jobs: "collections.OrderedDict[str, Job]" = collections.OrderedDict()
+        self._latencies: Deque[float] = collections.deque(maxlen=100)
+        self._draining = False
+        self._idle = threading.Condition(self._lock)
+
+    @property
+    def workflows(self) -> List[str]:
+        return list(self._workflows)
+
+    def resolve(self, name: Optional[str]) -> str:
+        if name is None and len(self._workflows) == 1:
+            return next(iter(self._workflows))
+        if name not in self._workflows:
+            raise KeyError(name)
+        return name
+
+    def _retry_after(self) -> int:
+        # 按最近任务的平均耗时估算排在队尾的任务需要等待的时间
+        average = sum(self._latencies) / len(self._latencies) if self._latencies else 1.0
+        waves = (len(self._pending) + self._in_flight) / self.max_in_flight
+        return max(1, math.ceil(average * waves))
+
+    def submit(self, workflow: str, inputs: Dict[str, Any]) -> Job:
+        job = Job(workflow, inputs)
+        with self._lock:
+            if self._draining:
+                raise Draining()
+            if self._in_flight >= self.max_in_flight and len(self._pending) >= self.max_queue:
+                raise Saturated(self._retry_after())
+            self._remember(job)
+            self._pending.append(job)
+            started = self._dispatch()
+        self._watch(started)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _remember(self, job: Job) -> None:
+        self._jobs[job.id] = job
+        # 只保留最近的任务结果，丢弃最早的已完成任务
+        while len(self._jobs) > self.max_finished_jobs + self.max_queue + self.max_in_flight:
+            oldest = next(iter(self._jobs.values()))
+            if not oldest.done.is_set():
+                break
+            self._jobs.popitem(last=False)
+
+    def _dispatch(self) -> List[tuple]:
+        """启动排队的任务，返回 (任务, future)；调用方持有 self._lock，释放锁后交给 _watch"""
+        started = []
+        while self._pending and self._in_flight < self.max_in_flight:
+            job = self._pending.popleft()
+            self._in_flight += 1
+            job.status = "running"
+            job.started = time.time()
+            started.append((job, get_executor().submit(self._arun(job))))
+        return started
+
+    def _watch(self, started: List[tuple]) -> None:
+        # 已经结束的 future 会在 add_done_callback 中同步调用 _finish，因此不能持有锁
+        for job, future in started:
+            future.add_done_callback(lambda _, job=job: self._finish(job))
+
+    async def _arun(self, job: Job) -> None:
+        workflow = self._workflows[job.workflow]
+        context = RunContext()
+        try:
+            job.outputs = await context.arun(workflow, job.inputs)
+            job.status = "succeeded"
+        except Exception as e:
+            logger.error("❌[Server]Job {} failed: {}", job.id, e)
+            job.status = "failed"
+            job.error = str(e)
+            job.error_type = type(e).__name__
+            job.invalid_input = isinstance(e, InvalidInputError)
+        finally:
+            job.metrics = run_metrics(context.logs(workflow))
+
+    def _finish(self, job: Job) -> None:
+        job.finished = time.time()
+        if job.status == "running":
+            # 任务在事件循环中被取消
+            job.status = "failed"
+            job.error = job.error or "Job was cancelled"
+        get_metrics().inc("server_jobs_total", workflow=job.workflow, status=job.status)
+        # 先标记完成再唤醒 drain，drain 返回时所有任务的结果都已可读
+        job.done.set()
+        with self._lock:
+            self._in_flight -= 1
+            self._latencies.append(job.finished - job.started)
+            started = self._dispatch()
+            if not self._pending and not self._in_flight:
+                self._idle.notify_all()
+        self._watch(started)
+
+    @property
+    def draining(self) -> bool:
+        return self._draining
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "status": "draining" if self._draining else "ok",
+                "workflows": self.workflows,
+                "in_flight": self._in_flight,
+                "queued": len(self._pending),
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+            }
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """停止接收新任务，等待已接收的任务完成"""
+        with self._lock:
+            self._draining = True
+            return self._idle.wait_for(
+                lambda: not self._pending and not self._in_flight, timeout
+            )
+
+
+class WorkflowRequestHandler(BaseHTTPRequestHandler):
+    server_version = "config2llmworkflow"
+    protocol_version = "HTTP/1.1"
+    # 空闲的 keep-alive 连接最多保持这么久，停止时不会一直等待它们
+    timeout = 30
+
+    @property
+    def service(self) -> WorkflowService:
+        return self.server.service
+
+    def log_message(self, format, *args):
+        logger.debug("🌐[Server]{} {}", self.address_string(), format % args)
+
+    def _send(
+        self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        payload = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+        headers = dict(headers or {})
+        if self.service.draining:
+            # 停止时关闭 keep-alive 连接，处理线程在响应发送后退出
+            headers["Connection"] = "close"
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_text(self, status: int, text: str, content_type: str) -> None:
+        payload = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_request(self) -> Optional[tuple]:
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(body, dict) or not isinstance(body.get("inputs", {}), dict):
+                raise ValueError("body must be an object with an 'inputs' object")
+        except ValueError as e:
+            self._send(HTTPStatus.BAD_REQUEST, {"error": f"Invalid request: {e}"})
+            return None
+        try:
+            workflow = self.service.resolve(body.get("workflow"))
+        except KeyError:
+            self._send(
+                HTTPStatus.NOT_FOUND,
+                {
+                    "error": f"Unknown workflow: {body.get('workflow')}",
+                    "workflows": self.service.workflows,
+                },
+            )
+            return None
+        return workflow, body.get("inputs", {})
+
+    def _submit(self, workflow: str, inputs: Dict[str, Any]) -> Optional[Job]:
+        try:
+            return self.service.submit(workflow, inputs)
+        except Saturated as e:
+            self._send(
+                HTTPStatus.TOO_MANY_REQUESTS,
+                {"error": "Server is saturated, retry later"},
+                {"Retry-After": str(e.retry_after)},
+            )
+        except Draining:
+            self._send(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                {"error": "Server is shutting down"},
+                {"Connection": "close"},
+            )
+        return None
+
+    def do_GET(self) -> None:
+        if self.path == "/healthz":
+            self._send(HTTPStatus.OK, self.service.stats())
+        elif self.path == "/metrics":
+            self._send_text(
+                HTTPStatus.OK,
+                get_metrics().render_prometheus(),
+                "text/plain; version=0.0.4; charset=utf-8",
+            )
+        elif self.path == "/metrics.json":
+            self._send(HTTPStatus.OK, get_metrics().snapshot())
+        elif self.path.startswith("/jobs/"):
+            job = self.service.get(self.path[len("/jobs/"):])
+            if job is None:
+                self._send(HTTPStatus.NOT_FOUND, {"error": "Unknown job"})
+            else:
+                self._send(HTTPStatus.OK, job.to_dict())
+        else:
+            self._send(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+
+    def do_POST(self) -> None:
+        if self.path not in ("/run", "/jobs"):
+            self._send(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+            return
+        request = self._read_request()
+        if request is None:
+            return
+        job = self._submit(*request)
+        if job is None:
+            return
+
+        if self.path == "/jobs":
+            self._send(
+                HTTPStatus.ACCEPTED, job.to_dict(), {"Location": f"/jobs/{job.id}"}
+            )
+            return
+
+        if not job.done.wait(self.server.request_timeout):
+            # 任务继续运行，客户端可以轮询 /jobs/<job_id>
+            self._send(
+                HTTPStatus.GATEWAY_TIMEOUT,
+                {**job.to_dict(), "error": "Job did not finish in time"},
+                {"Location": f"/jobs/{job.id}"},
+            )
+        elif job.status == "succeeded":
+            self._send(HTTPStatus.OK, job.to_dict())
+        elif job.invalid_input:
+            # 输入缺失、提示词超长或输出无法解析
+            self._send(HTTPStatus.UNPROCESSABLE_ENTITY, job.to_dict())
+        else:
+            self._send(HTTPStatus.INTERNAL_SERVER_ERROR, job.to_dict())
+
+
+class WorkflowServer(ThreadingHTTPServer):
+    # 处理线程不是守护线程，server_close() 会等待它们把响应发送完
+    daemon_threads = False
+    block_on_close = True
+
+    def __init__(
+        self, address, service: WorkflowService, request_timeout: Optional[float] = 600
+    ):
+        super().__init__(address, WorkflowRequestHandler)
+        self.service = service
+        self.request_timeout = request_timeout
+
+
+def load_configs(paths: List[str]) -> Dict[str, BaseAppConfig]:
+    configs = {}
+    for path in paths:
+        with open(path, "r") as file:
+            config = BaseAppConfig(**yaml.safe_load(file)["app"])
+        name = config.workflow.name or os.path.splitext(os.path.basename(path))[0]
+        if name in configs:
+            raise ValueError(f"Duplicate workflow name {name!r} in {path}")
+        configs[name] = config
+    return configs
+
+
+def _configure_runtime(configs: Dict[str, BaseAppConfig]) -> None:
+    # 执行器、客户端、缓存等是进程级的，使用第一个配置中的设置
+    (first_name, first), *others = configs.items()
+    configure_runtime(first)
+    for name, config in others:
+        ignored = [
+            section
+            for section in RUNTIME_SECTIONS
+            if getattr(config, section) is not None
+            and getattr(config, section) != getattr(first, section)
+        ]
+        if ignored:
+            logger.warning(
+                "⚠️[Server]Runtime settings {} of {} are ignored, using those of {}",
+                ignored,
+                name,
+                first_name,
+            )
+
+
+def serve(
+    configs: Dict[str, BaseAppConfig],
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    max_in_flight: int = 8,
+    max_queue: int = 64,
+    drain_timeout: float = 300,
+    request_timeout: float = 600,
+) -> None:
+    _configure_runtime(configs)
+    service = WorkflowService(configs, max_in_flight=max_in_flight, max_queue=max_queue)
+    server = WorkflowServer((host, port), service, request_timeout=request_timeout)
+
+    stopping = threading.Event()
+
+    def stop(signum, frame):
+        if stopping.is_set():
+            return
+        stopping.set()
+        logger.info("🛑[Server]Received signal {}, draining", signum)
+
+        def drain():
+            if not service.drain(drain_timeout):
+                logger.warning("🛑[Server]Drain timed out, stopping anyway")
+            server.shutdown()
+
+        threading.Thread(target=drain, name="config2llmworkflow-drain").start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    logger.info(
+        "🌐[Server]Serving {} on http://{}:{}", service.workflows, host, server.server_port
+    )
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        logger.info("🛑[Server]Stopped")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve workflows as a JSON API.")
+    parser.add_argument(
+        "--config",
+        action="append",
+        required=True,
+        help="YAML config, repeatable. Process-wide settings (logging, executor, "
+        "clients, cache, interpreter, metrics, tracing, cassette) come from the "
+        "first config only.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument("--drain-timeout", type=float, default=300)
+    parser.add_argument(
+        "--request-timeout",
+        type=float,
+        default=600,
+        help="Seconds POST /run waits before answering 504.",
+    )
+    args = parser.parse_args(argv)
+
+    serve(
+        load_configs(args.config),
+        host=args.host,
+        port=args.port,
+        max_in_flight=args.max_in_flight,
+        max_queue=args.max_queue,
+        drain_timeout=args.drain_timeout,
+        request_timeout=args.request_timeout,
+    )
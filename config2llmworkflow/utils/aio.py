@@ -0,0 +1,27 @@
+import asyncio
+from typing import Any, Coroutine, TypeVar
+
+from config2llmworkflow.utils.executor import get_executor
+
+T = TypeVar("T")
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    在同步代码中运行协程。
+
+    协程总是提交到共享执行器的后台事件循环中运行，所有同步调用共用一个事件循环，
+    绑定在事件循环上的异步客户端也只会创建在这个循环中。
+    在后台事件循环内部调用会阻塞它自己，此时直接报错，应改为 await 协程。
+    """
+    executor = get_executor()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is not None and running is executor.loop:
+        coro.close()
+        raise RuntimeError(
+            "run_sync() cannot be called from the shared event loop, await the coroutine instead"
+        )
+    return executor.submit(coro).result()
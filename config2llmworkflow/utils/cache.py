@@ -0,0 +1,220 @@
+import collections
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from config2llmworkflow.configs.cache.base import CacheConfig
+from config2llmworkflow.utils.executor import get_executor
+
+
+def make_cache_key(request: Dict[str, Any]) -> str:
+    """请求内容的 sha256，作为内容寻址的缓存键"""
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+_bypass_read: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "cache_bypass_read", default=False
+)
+
+
+@contextlib.contextmanager
+def bypass_cache_read():
+    """其中的 LLM 调用不读取缓存，但仍会用新的响应覆盖缓存，用于重新请求"""
+    token = _bypass_read.set(True)
+    try:
+        yield
+    finally:
+        _bypass_read.reset(token)
+
+
+def cache_read_bypassed() -> bool:
+    return _bypass_read.get()
+
+
+class MemoryCache:
+    """线程安全的 LRU 内存缓存"""
+
+    def __init__(self, max_entries: int, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "collections.OrderedDict[str, tuple]" = collections.OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created, value = entry
+            if self.ttl is not None and time.time() - created > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, created: Optional[float] = None) -> None:
+        with self._lock:
+            self._entries[key] = (created or time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCache:
+    """磁盘缓存，超过 TTL 的条目在读取时删除，超过容量时淘汰最久未访问的条目"""
+
+    def __init__(self, path: str, max_entries: int, ttl: Optional[float] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)"
+            )
+
+    def get(self, key: str) -> Optional[tuple]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if self.ttl is not None and now - created > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+            )
+        return created, json.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, accessed) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now),
+            )
+            self._writes += 1
+            # 每 100 次写入检查一次容量和过期
+            if self._writes % 100 == 0:
+                self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        if self.ttl is not None:
+            self._conn.execute(
+                "DELETE FROM responses WHERE created < ?", (now - self.ttl,)
+            )
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache:
+    """
+    LLM 响应缓存：内存 LRU 为第一层，SQLite 为第二层。
+
+    磁盘读写在共享线程池中进行，避免阻塞事件循环。
+    """
+
+    def __init__(self, config: Optional[CacheConfig] = None):
+        self.config = config or CacheConfig()
+        self.memory = MemoryCache(self.config.memory_max_entries, self.config.ttl)
+        self.disk = (
+            SQLiteCache(self.config.disk_path, self.config.disk_max_entries, self.config.ttl)
+            if self.config.disk_path
+            else None
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.enabled
+
+    async def aget(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None or self.disk is None:
+            return value
+
+        entry = await get_executor().run_blocking(self.disk.get, key)
+        if entry is None:
+            return None
+        created, value = entry
+        self.memory.set(key, value, created=created)
+        return value
+
+    async def aset(self, key: str, value: Any) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            await get_executor().run_blocking(self.disk.set, key, value)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
+
+
+def configure_cache(config: Optional[CacheConfig | Dict[str, Any]]) -> None:
+    global _cache
+    if config is None:
+        return
+    if isinstance(config, dict):
+        config = CacheConfig(**config)
+    with _cache_lock:
+        if _cache is not None:
+            _cache.close()
+        _cache = ResponseCache(config)
+    logger.debug("🗄️[Cache]Configured response cache: {}", config)
@@ -0,0 +1,173 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from config2llmworkflow.configs.cassette.base import CassetteConfig
+
+
+class CassetteMiss(KeyError):
+    """回放模式下，录制文件中没有这个请求"""
+
+    def __init__(self, key: str, node: str):
+        super().__init__(f"No recorded response for node {node!r} (request {key[:12]})")
+        self.key = key
+        self.node = node
+
+    def __str__(self) -> str:
+        return self.args[0]
+
+
+class RecordedError(RuntimeError):
+    """回放录制时失败的请求，保留状态码以便重试逻辑按原样处理"""
+
+    def __init__(self, error_type: str, message: str, status_code: Optional[int]):
+        super().__init__(f"{error_type}: {message}")
+        self.error_type = error_type
+        self.status_code = status_code
+
+
+class Cassette:
+    """
+    按请求内容录制和回放 LLM 调用。
+
+    每次请求（包括失败和重试）追加一行 JSON；同一个请求出现多次时按录制顺序依次回放，
+    用完之后重复最后一条，这样循环工作流在回放时的行为与录制时一致。
+    """
+
+    def __init__(self, config: Optional[CassetteConfig] = None):
+        self.config = config or CassetteConfig()
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursors: Dict[str, int] = {}
+        if self.replaying:
+            self._load()
+
+    @property
+    def active(self) -> bool:
+        return self.config.mode != "off"
+
+    @property
+    def replaying(self) -> bool:
+        return self.config.mode in ("replay", "replay_or_record")
+
+    def _load(self) -> None:
+        if not os.path.exists(self.config.path):
+            if self.config.mode == "replay":
+                raise FileNotFoundError(f"Cassette not found: {self.config.path}")
+            return
+        with open(self.config.path, "r", encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry["key"], []).append(entry)
+        logger.info(
+            "📼[Cassette]Loaded {} recorded requests from {}",
+            sum(len(entries) for entries in self._entries.values()),
+            self.config.path,
+        )
+
+    def rewind(self) -> None:
+        with self._lock:
+            self._cursors.clear()
+
+    def _next(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                return None
+            index = self._cursors.get(key, 0)
+            self._cursors[key] = index + 1
+            return entries[min(index, len(entries) - 1)]
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            directory = os.path.dirname(self.config.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.config.path, "a", encoding="utf-8") as file:
+                file.write(line)
+            if self.replaying:
+                # replay_or_record 模式下，新录制的请求在本进程中也可以回放
+                self._entries.setdefault(entry["key"], []).append(entry)
+                self._cursors[entry["key"]] = len(self._entries[entry["key"]])
+
+    async def _replay(
+        self,
+        entry: Dict[str, Any],
+        on_delta: Optional[Callable[[str], None]],
+    ) -> Dict[str, Any]:
+        if self.config.simulate_latency:
+            await asyncio.sleep(entry.get("latency_s", 0.0) * self.config.latency_scale)
+        if "error" in entry:
+            error = entry["error"]
+            raise RecordedError(error["type"], error["message"], error.get("status_code"))
+        response = entry["response"]
+        if on_delta is not None:
+            content = response.get("content") or ""
+            for start in range(0, len(content), 16):
+                on_delta(content[start : start + 16])
+        return response
+
+    async def call(
+        self,
+        key: str,
+        node: str,
+        request: Dict[str, Any],
+        send: Callable[[], Awaitable[Dict[str, Any]]],
+        on_delta: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, Any]:
+        """回放录制的响应，或者调用 send 并录制结果"""
+        if self.replaying:
+            entry = self._next(key)
+            if entry is not None:
+                return await self._replay(entry, on_delta)
+            if self.config.mode == "replay":
+                raise CassetteMiss(key, node)
+
+        entry = {"key": key, "node": node, "request": request, "recorded_at": time.time()}
+        start = time.perf_counter()
+        try:
+            response = await send()
+        except Exception as e:
+            entry["latency_s"] = round(time.perf_counter() - start, 4)
+            status = getattr(e, "status_code", None) or getattr(e, "http_status", None)
+            entry["error"] = {
+                "type": type(e).__name__,
+                "message": str(e),
+                "status_code": status if isinstance(status, int) else None,
+            }
+            self._append(entry)
+            raise
+        entry["latency_s"] = round(time.perf_counter() - start, 4)
+        entry["response"] = response
+        self._append(entry)
+        return response
+
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Cassette:
+    global _cassette
+    with _cassette_lock:
+        if _cassette is None:
+            _cassette = Cassette()
+        return _cassette
+
+
+def configure_cassette(config: Optional[CassetteConfig | Dict[str, Any]]) -> None:
+    global _cassette
+    if config is None:
+        return
+    if isinstance(config, dict):
+        config = CassetteConfig(**config)
+    with _cassette_lock:
+        _cassette = Cassette(config)
+    logger.debug("📼[Cassette]Configured cassette: {}", config)
@@ -0,0 +1,130 @@
+import asyncio
+import atexit
+import inspect
+import os
+import threading
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+from config2llmworkflow.configs.clients.base import ClientPoolConfig
+
+
+class ClientRegistry:
+    """
+    进程内共享的 LLM 客户端注册表，按 (provider, base_url, api_key) 复用客户端。
+
+    异步客户端的连接池绑定在创建它的事件循环上，因此异步客户端按事件循环分别缓存；
+    同步 run 都运行在共享执行器的后台事件循环中，所以实际上每组配置只会创建一个客户端。
+    """
+
+    # 异步客户端需要按事件循环区分
+    loop_bound_providers = {"openai", "together", "gemini"}
+
+    def __init__(self, config: Optional[ClientPoolConfig] = None):
+        self.config = config or ClientPoolConfig()
+        self._lock = threading.Lock()
+        # 事件循环 -> {(provider, base_url, api_key): client}
+        self._loop_clients = weakref.WeakKeyDictionary()
+        self._clients: Dict[Tuple, Any] = {}
+
+    def configure(self, config: ClientPoolConfig) -> None:
+        """更新连接池配置，只对之后新建的客户端生效"""
+        self.config = config
+
+    def get(
+        self, provider: str, base_url: Optional[str] = None, api_key: Optional[str] = None
+    ) -> Any:
+        key = (provider, base_url, api_key)
+        if provider in self.loop_bound_providers:
+            loop = asyncio.get_running_loop()
+            with self._lock:
+                clients = self._loop_clients.setdefault(loop, {})
+                if key not in clients:
+                    clients[key] = self._build(provider, base_url, api_key)
+                return clients[key]
+
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = self._build(provider, base_url, api_key)
+            return self._clients[key]
+
+    def _build(self, provider: str, base_url: Optional[str], api_key: Optional[str]):
+        builder = getattr(self, f"_build_{provider}", None)
+        if builder is None:
+            raise ValueError(f"Unsupported client provider: {provider}")
+        logger.debug("🔌[Client]Creating {} client for {}", provider, base_url)
+        return builder(base_url, api_key)
+
+    def _build_openai(self, base_url: Optional[str], api_key: Optional[str]):
+        import httpx
+        from openai import AsyncOpenAI
+
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.config.max_connections,
+                max_keepalive_connections=self.config.max_keepalive_connections,
+                keepalive_expiry=self.config.keepalive_expiry,
+            ),
+            timeout=self.config.timeout,
+            follow_redirects=True,
+        )
+        # 重试由 utils.resilience 统一处理
+        return AsyncOpenAI(
+            api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0
+        )
+
+    def _build_together(self, base_url: Optional[str], api_key: Optional[str]):
+        from together import AsyncTogether
+
+        return AsyncTogether(api_key=api_key, timeout=self.config.timeout, max_retries=0)
+
+    def _build_gemini(self, base_url: Optional[str], api_key: Optional[str]):
+        import google.ai.generativelanguage as glm
+
+        # genai.configure 修改的是模块级的客户端，不同 api_key 会互相覆盖，
+        # 这里用公开的底层客户端为每个 api_key 单独创建，由 GenerativeModel 直接使用；
+        # 未指定 api_key 时与 genai.configure 一样读取环境变量
+        api_key = api_key or os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+        return glm.GenerativeServiceAsyncClient(client_options={"api_key": api_key})
+
+    def close(self, timeout: float = 5.0) -> None:
+        """关闭所有客户端的连接池"""
+        with self._lock:
+            loop_clients = list(self._loop_clients.items())
+            self._loop_clients = weakref.WeakKeyDictionary()
+            self._clients = {}
+
+        for loop, clients in loop_clients:
+            if loop.is_closed() or not loop.is_running():
+                continue
+            for client in clients.values():
+                close = getattr(client, "close", None)
+                if close is None or not inspect.iscoroutinefunction(close):
+                    continue
+                try:
+                    asyncio.run_coroutine_threadsafe(close(), loop).result(timeout)
+                except Exception as e:
+                    logger.warning("🔌[Client]Error closing client: {}", e)
+
+
+_registry: Optional[ClientRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_client_registry() -> ClientRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ClientRegistry()
+            atexit.register(_registry.close)
+        return _registry
+
+
+def configure_clients(config: Optional[ClientPoolConfig | Dict[str, Any]]) -> None:
+    if config is None:
+        return
+    if isinstance(config, dict):
+        config = ClientPoolConfig(**config)
+    get_client_registry().configure(config)
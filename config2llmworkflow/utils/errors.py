@@ -0,0 +1,6 @@
+class InvalidInputError(ValueError):
+    """
+    由本次运行的输入引起的错误，换一个输入可以成功，例如缺少输入变量、
+    提示词超过 token 预算、模型的输出无法解析。HTTP 服务对这类错误返回 422，
+    其他异常视为内部错误。
+    """
@@ -0,0 +1,220 @@
+import asyncio
+import collections
+import concurrent.futures
+import contextlib
+import contextvars
+import functools
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from loguru import logger
+
+from config2llmworkflow.configs.executor.base import ExecutorConfig
+
+
+class ConcurrencyLimiter:
+    """
+    线程安全的异步信号量，可以在多个事件循环之间共享。
+
+    asyncio.Semaphore 绑定在单个事件循环上，而 Streamlit 的多个会话、
+    批处理和服务模式可能各自运行事件循环，因此这里用线程锁记录占用数，
+    并通过 call_soon_threadsafe 唤醒其他事件循环中的等待者。
+    """
+
+    def __init__(self, limit: Optional[int] = None):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiters = collections.deque()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        with self._lock:
+            if self.limit is None or (
+                self._active < self.limit and not self._waiters
+            ):
+                self._active += 1
+                return
+            loop = asyncio.get_running_loop()
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+
+        future = waiter[1]
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove(waiter)
+                    granted = False
+                except ValueError:
+                    granted = True
+            # 名额已经交给了当前等待者，但任务被取消，需要归还
+            if granted and future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def resize(self, limit: Optional[int]) -> None:
+        """调整上限，上限变大时立即唤醒等待者"""
+        with self._lock:
+            self.limit = limit
+            while self._waiters and (limit is None or self._active < limit):
+                loop, future = self._waiters.popleft()
+                if loop.is_closed():
+                    continue
+                self._active += 1
+                loop.call_soon_threadsafe(self._grant, future)
+
+    def release(self) -> None:
+        with self._lock:
+            # 上限被调小后，占用数降到上限以下之前不再转交名额
+            while self._waiters and (self.limit is None or self._active <= self.limit):
+                loop, future = self._waiters.popleft()
+                if loop.is_closed():
+                    continue
+                # 名额直接转交给等待者，占用数不变
+                loop.call_soon_threadsafe(self._grant, future)
+                return
+            self._active -= 1
+
+    def _grant(self, future: asyncio.Future) -> None:
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+
+class SharedExecutor:
+    """
+    进程内共享的执行器，所有工作流和节点共用。
+
+    - 一个常驻的后台事件循环，同步的 run 都提交到这里执行
+    - 一个有上限的线程池，用于解释器、GeneralAgent 等阻塞调用
+    - 全局、按 provider、按 base_url 的 LLM 并发上限
+
+    嵌套的工作流直接在同一事件循环中 await 子节点，不会再创建线程池；
+    并发名额只在真正发起 LLM 调用时占用，因此外层工作流不会因为等待子工作流
+    而占住名额。
+    """
+
+    def __init__(self, config: Optional[ExecutorConfig] = None):
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._global_limiter = ConcurrencyLimiter()
+        self._provider_limiters: Dict[str, ConcurrencyLimiter] = {}
+        self._base_url_limiters: Dict[str, ConcurrencyLimiter] = {}
+        self.config = ExecutorConfig()
+        self.configure(config or ExecutorConfig())
+
+    def configure(self, config: ExecutorConfig) -> None:
+        """更新并发上限；正在占用名额的调用会归还到原来的限流器"""
+        with self._lock:
+            if self._pool is not None and config.max_workers != self.config.max_workers:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+            self.config = config
+            self._global_limiter = ConcurrencyLimiter(config.max_concurrency)
+            self._provider_limiters = {
+                name: ConcurrencyLimiter(limit)
+                for name, limit in config.provider_limits.items()
+            }
+            self._base_url_limiters = {
+                url: ConcurrencyLimiter(limit)
+                for url, limit in config.base_url_limits.items()
+            }
+        logger.debug("⚙️[Executor]Configured shared executor: {}", config)
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name="config2llmworkflow-loop",
+                    daemon=True,
+                )
+                self._loop_thread.start()
+            return self._loop
+
+    @property
+    def pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.config.max_workers,
+                    thread_name_prefix="config2llmworkflow-worker",
+                )
+            return self._pool
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        """把协程提交到后台事件循环"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def run_blocking(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """在共享线程池中运行阻塞函数，函数继承调用方的 contextvars（如当前的 span）"""
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self.pool, functools.partial(context.run, func, *args, **kwargs)
+        )
+
+    @contextlib.asynccontextmanager
+    async def slot(self, provider: Optional[str] = None, base_url: Optional[str] = None):
+        """占用一次 LLM 调用的并发名额，按 base_url、provider、全局的固定顺序获取"""
+        limiters = [
+            limiter
+            for limiter in (
+                self._base_url_limiters.get(base_url),
+                self._provider_limiters.get(provider),
+                self._global_limiter,
+            )
+            if limiter is not None
+        ]
+        acquired = []
+        try:
+            for limiter in limiters:
+                await limiter.acquire()
+                acquired.append(limiter)
+            yield
+        finally:
+            for limiter in reversed(acquired):
+                limiter.release()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            loop, self._loop = self._loop, None
+            pool, self._pool = self._pool, None
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(loop.stop)
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+
+_executor: Optional[SharedExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> SharedExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = SharedExecutor()
+        return _executor
+
+
+def configure_executor(config: Optional[ExecutorConfig | Dict[str, Any]]) -> None:
+    if config is None:
+        return
+    if isinstance(config, dict):
+        config = ExecutorConfig(**config)
+    get_executor().configure(config)
@@ -0,0 +1,142 @@
+import ast
+import functools
+from typing import Any, Callable, Dict, FrozenSet, Mapping
+
+import numpy as np
+
+
+def _reduce(func: Callable[[Any, Any], Any]) -> Callable[..., Any]:
+    # min(a, b, c) 按元素比较；只有一个参数时在数组内部归约
+    def wrapper(*args):
+        if len(args) == 1:
+            return func.reduce(np.asarray(args[0], dtype=float))
+        return functools.reduce(func, args)
+
+    return wrapper
+
+
+def _mean(*args):
+    if len(args) == 1:
+        return np.mean(args[0])
+    return sum(args) / len(args)
+
+
+def _sum(*args):
+    if len(args) == 1:
+        return np.sum(args[0])
+    return sum(args)
+
+
+# 表达式中可以调用的函数，全部支持 NumPy 数组
+FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    "abs": np.abs,
+    "sqrt": np.sqrt,
+    "round": np.round,
+    "floor": np.floor,
+    "ceil": np.ceil,
+    "exp": np.exp,
+    "log": np.log,
+    "min": _reduce(np.minimum),
+    "max": _reduce(np.maximum),
+    "mean": _mean,
+    "sum": _sum,
+    "where": np.where,
+}
+
+_allowed_nodes = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Compare,
+    ast.Call,
+    ast.Name,
+    ast.Load,
+    ast.Constant,
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.FloorDiv,
+    ast.Mod,
+    ast.Pow,
+    ast.USub,
+    ast.UAdd,
+    ast.Eq,
+    ast.NotEq,
+    ast.Lt,
+    ast.LtE,
+    ast.Gt,
+    ast.GtE,
+)
+
+
+def _to_numeric(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return np.asarray(value, dtype=float)
+    if isinstance(value, str):
+        return float(value)
+    return value
+
+
+def _to_python(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.item() if value.ndim == 0 else value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class CompiledExpression:
+    """
+    数值表达式，只允许四则运算、比较、数字常量、变量和 FUNCTIONS 中的函数。
+
+    表达式在构建时解析和编译一次，引用的变量记录在 fields 中；
+    变量为列表时按 NumPy 数组计算，结果中的数组转换为列表。
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        try:
+            tree = ast.parse(expression.strip(), mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Invalid expression {expression!r}: {e.msg}")
+
+        fields = set()
+        for node in ast.walk(tree):
+            if not isinstance(node, _allowed_nodes):
+                raise ValueError(
+                    f"Unsupported syntax {type(node).__name__} in expression "
+                    f"{expression!r}"
+                )
+            if isinstance(node, ast.Constant) and not isinstance(
+                node.value, (int, float)
+            ):
+                raise ValueError(f"Only numeric constants are allowed: {expression!r}")
+            if isinstance(node, ast.Call):
+                if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+                    raise ValueError(
+                        f"Unknown function in expression {expression!r}, "
+                        f"available: {sorted(FUNCTIONS)}"
+                    )
+                if node.keywords:
+                    raise ValueError(f"Keyword arguments are not allowed: {expression!r}")
+            if isinstance(node, ast.Name):
+                fields.add(node.id)
+
+        # 函数名不是变量
+        call_names = {
+            node.func.id for node in ast.walk(tree) if isinstance(node, ast.Call)
+        }
+        self.fields: FrozenSet[str] = frozenset(fields - call_names)
+        self._code = compile(tree, f"<expression {expression!r}>", "eval")
+
+    def evaluate(self, variables: Mapping[str, Any]) -> Any:
+        missing = self.fields - variables.keys()
+        if missing:
+            raise KeyError(f"Missing expression variables: {sorted(missing)}")
+        namespace = dict(FUNCTIONS)
+        namespace.update((name, _to_numeric(variables[name])) for name in self.fields)
+        return _to_python(eval(self._code, {"__builtins__": {}}, namespace))
+
+    def __repr__(self) -> str:
+        return f"CompiledExpression({self.expression!r})"
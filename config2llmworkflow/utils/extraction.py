@@ -0,0 +1,165 @@
+import re
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+from config2llmworkflow.configs.nodes.base import ExtractionConfig, OutputVariableConfig
+from config2llmworkflow.utils.errors import InvalidInputError
+
+
+class ExtractionError(InvalidInputError):
+    """节点输出无法解析出配置的字段"""
+
+    def __init__(self, node: str, var: str, reason: str):
+        super().__init__(f"Failed to extract {var!r} from node {node!r}: {reason}")
+        self.node = node
+        self.var = var
+        self.reason = reason
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in ("true", "yes", "1", "是"):
+            return True
+        if lowered in ("false", "no", "0", "否", ""):
+            return False
+        raise ValueError(f"not a boolean: {value!r}")
+    return bool(value)
+
+
+def _to_int(value: Any) -> int:
+    # "3" 和 "3.0" 都可以，"3.7" 不能截断为 3
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, int):
+        return value
+    number = float(value.strip() if isinstance(value, str) else value)
+    if not number.is_integer():
+        raise ValueError(f"not an integer: {value!r}")
+    return int(number)
+
+
+_coercers: Dict[str, Callable[[Any], Any]] = {
+    "str": lambda value: value if isinstance(value, str) else str(value),
+    "int": _to_int,
+    "float": float,
+    "bool": _to_bool,
+}
+
+_json_decoder = json.JSONDecoder()
+
+
+def _find_json(text: str) -> Optional[Any]:
+    """返回文本中第一个可以解析的 JSON 对象或数组"""
+    for match in re.finditer(r"[\[{]", text):
+        try:
+            value, _ = _json_decoder.raw_decode(text, match.start())
+            return value
+        except ValueError:
+            continue
+    return None
+
+
+class Extractor:
+    """
+    编译后的单个输出变量的解析规则。
+
+    先用正则匹配，没有结果且配置了 json_path 时再解析文本中的 JSON；
+    列出的字段按类型转换，没有默认值的字段缺失时解析失败。
+    """
+
+    def __init__(self, var: OutputVariableConfig):
+        self.var = var.name
+        self.config: ExtractionConfig = var.extract
+        self.pattern = re.compile(self.config.pattern) if self.config.pattern else None
+        if self.pattern is not None and not self.pattern.groupindex:
+            if self.pattern.groups != 2:
+                raise ValueError(
+                    f"Extraction pattern for {var.name!r} needs named groups "
+                    f"or exactly two groups (key, value): {self.config.pattern!r}"
+                )
+        self.json_path: Optional[List[str]] = None
+        if self.config.json_path is not None:
+            self.json_path = [part for part in self.config.json_path.split(".") if part]
+        if self.pattern is None and self.json_path is None:
+            self.json_path = []
+        self.fields = [
+            (field.key or field.name, field.name, _coercers[field.type], field.default)
+            for field in self.config.fields
+        ]
+        self.field_keys = {key for key, _, _, _ in self.fields}
+        self.retries = self.config.retries
+
+    @property
+    def names(self) -> List[str]:
+        """解析后一定会产生的变量名"""
+        return [name for _, name, _, _ in self.fields]
+
+    def _match_regex(self, text: str) -> Dict[str, Any]:
+        data = {}
+        if self.pattern.groupindex:
+            for match in self.pattern.finditer(text):
+                for key, value in match.groupdict().items():
+                    if value is not None:
+                        data.setdefault(key, value)
+        else:
+            for key, value in self.pattern.findall(text):
+                data[key] = value
+        return data
+
+    def _match_json(self, text: str) -> Dict[str, Any]:
+        value = _find_json(text)
+        for part in self.json_path:
+            if isinstance(value, list) and part.isdigit() and int(part) < len(value):
+                value = value[int(part)]
+            elif isinstance(value, dict) and part in value:
+                value = value[part]
+            else:
+                return {}
+        return value if isinstance(value, dict) else {}
+
+    def extract(self, node: str, text: Any) -> Dict[str, Any]:
+        if not isinstance(text, str):
+            text = json.dumps(text, ensure_ascii=False)
+
+        data = self._match_regex(text) if self.pattern is not None else {}
+        if not data and self.json_path is not None:
+            data = self._match_json(text)
+        if not data:
+            raise ExtractionError(node, self.var, "nothing matched")
+
+        result = {}
+        if self.config.keep_extra:
+            result.update(
+                (key, value) for key, value in data.items() if key not in self.field_keys
+            )
+        missing = []
+        for key, name, coerce, default in self.fields:
+            if key not in data:
+                if default is None:
+                    missing.append(key)
+                    continue
+                value = default
+            else:
+                value = data[key]
+            try:
+                result[name] = coerce(value)
+            except (TypeError, ValueError) as e:
+                raise ExtractionError(node, self.var, f"field {key!r}: {e}")
+        if missing:
+            raise ExtractionError(node, self.var, f"missing fields {missing}")
+        return result
+
+
+def compile_extractors(output_vars: Optional[List[OutputVariableConfig]]) -> List[Extractor]:
+    return [Extractor(var) for var in output_vars or [] if var.extract is not None]
+
+
+def extract_outputs(
+    node: str, extractors: List[Extractor], outputs: Dict[str, Any]
+) -> Dict[str, Any]:
+    """依次解析节点的输出变量，返回所有解析出的字段"""
+    extracted = {}
+    for extractor in extractors:
+        extracted.update(extractor.extract(node, outputs.get(extractor.var, "")))
+    return extracted
@@ -0,0 +1,120 @@
+from typing import Any, Dict, List, Optional
+
+from config2llmworkflow.configs.agents.base import HistoryConfig
+from config2llmworkflow.utils.errors import InvalidInputError
+from config2llmworkflow.utils.tokens import (
+    MESSAGE_OVERHEAD,
+    context_window,
+    count_tokens,
+    message_text,
+)
+
+# 解释器的运行结果以这个前缀作为 assistant 消息加入历史
+INTERPRETER_RESULT_PREFIX = "我调用Python的运行结果是："
+
+
+class PromptTooLongError(InvalidInputError):
+    """丢弃所有可以丢弃的消息之后，提示词仍然超过 token 预算"""
+
+    def __init__(self, tokens: int, budget: int, model: Optional[str]):
+        super().__init__(
+            f"Prompt needs about {tokens} tokens but the budget for model {model!r} "
+            f"is {budget} after dropping earlier messages; shorten the system prompt, "
+            f"task or latest message, or raise history.max_prompt_tokens"
+        )
+        self.tokens = tokens
+        self.budget = budget
+        self.model = model
+
+
+def prompt_budget(
+    config: HistoryConfig, model: Optional[str] = None, completion_tokens: int = 0
+) -> Optional[int]:
+    """prompt 的 token 预算：max_prompt_tokens，未设置时为模型的上下文窗口减去补全长度"""
+    if config.max_prompt_tokens is not None:
+        return config.max_prompt_tokens
+    window = context_window(model)
+    if window is None:
+        return None
+    return max(window - completion_tokens, 0)
+
+
+def _is_interpreter_output(message: Dict[str, Any]) -> bool:
+    content = message.get("content")
+    return isinstance(content, str) and content.startswith(INTERPRETER_RESULT_PREFIX)
+
+
+def _compress(message: Dict[str, Any], limit: int) -> Dict[str, Any]:
+    content = message["content"]
+    if len(content) <= limit:
+        return message
+    half = limit // 2
+    return {
+        **message,
+        "content": f"{content[:half]}\n...[省略 {len(content) - 2 * half} 个字符]...\n"
+        f"{content[-half:]}",
+    }
+
+
+def _tokens(message: Dict[str, Any], model: Optional[str]) -> int:
+    return MESSAGE_OVERHEAD + count_tokens(message_text(message), model)
+
+
+def fit_history(
+    messages: List[Dict[str, Any]],
+    config: HistoryConfig,
+    model: Optional[str] = None,
+    completion_tokens: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    按历史策略返回本次请求实际发送的消息，不修改 messages。
+
+    1. 保留开头的系统提示词和第一条用户消息，之后只保留最近 keep_last 条；
+    2. 除最近一次以外的解释器输出截断到 max_output_chars，只保留首尾；
+    3. 有 token 预算（见 prompt_budget）时，继续丢弃最早的消息直到放得下，最后一条总是保留；
+       仍然放不下时抛出 PromptTooLongError，而不是把超长的请求发给模型。
+
+    丢弃了消息时插入一条说明，避免模型误以为对话是完整的。
+    """
+    start = 0
+    while start < len(messages) and messages[start].get("role") == "system":
+        start += 1
+    if start < len(messages) and messages[start].get("role") == "user":
+        start += 1
+    head, rest = messages[:start], messages[start:]
+
+    dropped = 0
+    if config.keep_last is not None and len(rest) > config.keep_last:
+        dropped = len(rest) - config.keep_last
+        # 不从一组工具调用的中间截断：向前扩展到发起调用的 assistant 消息
+        while dropped and rest[dropped].get("role") == "tool":
+            dropped -= 1
+        rest = rest[dropped:]
+
+    if config.max_output_chars > 0:
+        outputs = [
+            index for index, message in enumerate(rest) if _is_interpreter_output(message)
+        ]
+        if len(outputs) > 1:
+            for index in outputs[:-1]:
+                rest[index] = _compress(rest[index], config.max_output_chars)
+
+    budget = prompt_budget(config, model, completion_tokens)
+    if budget is not None:
+        total = sum(_tokens(message, model) for message in head + rest) + 2
+        while len(rest) > 1 and total > budget:
+            total -= _tokens(rest[0], model)
+            rest = rest[1:]
+            dropped += 1
+        if total > budget:
+            raise PromptTooLongError(total, budget, model)
+
+    # 工具的返回必须紧跟发起调用的 assistant 消息，开头落单的工具消息一起丢弃
+    while len(rest) > 1 and rest[0].get("role") == "tool":
+        rest = rest[1:]
+        dropped += 1
+
+    if not dropped:
+        return head + rest
+    note = {"role": "user", "content": f"[已省略较早的 {dropped} 条消息]"}
+    return head + [note] + rest
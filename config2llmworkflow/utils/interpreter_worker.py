@@ -0,0 +1,187 @@
+"""
+Python 解释器进程池的工作进程，由 python_interpreter.InterpreterPool 启动。
+
+协议：每行一个 JSON。
+  启动完成后输出 {"ready": true}
+  输入 {"code": "..."}，
+  输出 {"ok": bool, "stdout": str, "stderr": str, "fatal": bool, "dirty": bool}
+
+协议使用启动时复制出的 stdin/stdout 文件描述符，原来的 0/1 号描述符被重定向到
+/dev/null，用户代码（包括 C 扩展）的输出不会破坏协议。
+
+同一个进程会先后执行来自不同会话的代码。每段代码使用全新的 __main__ 命名空间，
+执行前把当前目录、环境变量和 sys.path 恢复到启动时的状态，并用系统熵重新设置
+random 和 numpy.random 的种子。代码导入了预加载以外的模块，或修改了预加载模块、
+builtins、os 的属性时返回 dirty，由父进程回收这个进程。
+
+仍然会在代码之间共享的状态：写入磁盘的文件、用户代码启动的线程和子进程、
+信号处理函数、资源限制，以及模块内部不可见的状态（如 C 扩展的全局变量）。
+"""
+
+import io
+import json
+import os
+import random
+import sys
+import traceback
+from typing import Dict, Iterable
+
+
+class _CappedWriter(io.TextIOBase):
+    """最多保留 limit 个字符的输出"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.parts = []
+        self.size = 0
+        self.truncated = False
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        remaining = self.limit - self.size
+        if remaining <= 0:
+            self.truncated = self.truncated or bool(text)
+            return len(text)
+        if len(text) > remaining:
+            self.truncated = True
+        self.parts.append(text[:remaining])
+        self.size += min(len(text), remaining)
+        return len(text)
+
+    def getvalue(self) -> str:
+        value = "".join(self.parts)
+        if self.truncated:
+            value += "\n...[output truncated]"
+        return value
+
+
+class _Baseline:
+    """启动（预加载）完成后的进程状态，每段代码执行前恢复，执行后比较"""
+
+    def __init__(self, modules: Iterable[str]):
+        # numpy.random 在第一次设置种子时才导入，先设置一次，让它成为基线的一部分
+        self._reseed()
+        self.cwd = os.getcwd()
+        self.environ = dict(os.environ)
+        self.path = list(sys.path)
+        self.loaded = set(sys.modules)
+        self.watched = {
+            name: self._attributes(sys.modules[name])
+            for name in ["builtins", "os", *modules]
+            if name in sys.modules
+        }
+
+    @staticmethod
+    def _attributes(module) -> Dict[str, int]:
+        return {name: id(value) for name, value in vars(module).items()}
+
+    def restore(self) -> None:
+        os.chdir(self.cwd)
+        if dict(os.environ) != self.environ:
+            os.environ.clear()
+            os.environ.update(self.environ)
+        sys.path[:] = self.path
+        self._reseed()
+
+    @staticmethod
+    def _reseed() -> None:
+        random.seed()
+        numpy = sys.modules.get("numpy")
+        if numpy is not None:
+            numpy.random.seed()
+
+    def dirty(self) -> bool:
+        """代码是否导入了新模块，或修改了被监视模块的属性"""
+        if not set(sys.modules) <= self.loaded:
+            return True
+        return any(
+            self._attributes(sys.modules[name]) != attributes
+            for name, attributes in self.watched.items()
+        )
+
+
+def _execute(code: str, max_output_chars: int) -> dict:
+    stdout = _CappedWriter(max_output_chars)
+    stderr = _CappedWriter(max_output_chars)
+    sys.stdout, sys.stderr = stdout, stderr
+    ok = True
+    fatal = False
+    try:
+        # 与 python -c 一致：每段代码使用全新的 __main__ 命名空间
+        exec(compile(code, "<string>", "exec"), {"__name__": "__main__"})
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            ok = False
+            if not isinstance(e.code, int):
+                print(e.code, file=stderr)
+    except BaseException as e:
+        ok = False
+        # 内存耗尽后进程状态不可靠，让父进程回收这个进程
+        fatal = isinstance(e, (MemoryError, KeyboardInterrupt))
+        # 去掉当前函数这一层，只保留用户代码的调用栈
+        stderr.write(
+            "".join(traceback.format_exception(type(e), e, e.__traceback__.tb_next))
+        )
+    finally:
+        sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+    return {
+        "ok": ok,
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+        "fatal": fatal,
+    }
+
+
+def main() -> None:
+    # 以脚本方式启动时 sys.path[0] 是 utils 目录，改成与 python -c 一样的当前目录
+    if sys.path and os.path.abspath(sys.path[0]) == os.path.dirname(
+        os.path.abspath(__file__)
+    ):
+        sys.path[0] = ""
+
+    max_output_chars = int(os.environ.get("C2LW_MAX_OUTPUT_CHARS", "20000"))
+    memory_limit_mb = os.environ.get("C2LW_MEMORY_LIMIT_MB")
+    preload = [m for m in os.environ.get("C2LW_PRELOAD", "").split(",") if m]
+
+    requests = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    responses = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+
+    for module in preload:
+        try:
+            __import__(module)
+        except Exception:
+            pass
+
+    # 在预加载之后再限制内存，限制只作用于用户代码
+    if memory_limit_mb:
+        try:
+            import resource
+
+            limit = int(memory_limit_mb) * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError):
+            pass
+
+    baseline = _Baseline(preload)
+
+    responses.write(json.dumps({"ready": True}) + "\n")
+    responses.flush()
+
+    for line in requests:
+        request = json.loads(line)
+        baseline.restore()
+        response = _execute(request["code"], max_output_chars)
+        response["dirty"] = baseline.dirty()
+        responses.write(json.dumps(response, ensure_ascii=False) + "\n")
+        responses.flush()
+        if response["fatal"]:
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import inspect
+import logging
+import re
+import sys
+import threading
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from pydantic import BaseModel
+
+from config2llmworkflow.configs.logging.base import LoggingConfig
+from config2llmworkflow.utils.tracing import current_span
+
+_config = LoggingConfig()
+_config_lock = threading.Lock()
+_handler_ids: list = []
+_level_cache: Dict[str, int] = {}
+_redacted = "***"
+
+
+def _level_no(level: str) -> int:
+    return logger.level(level.upper()).no
+
+
+def subsystem_level(name: Optional[str]) -> int:
+    """按最长的名称前缀匹配模块的日志级别"""
+    name = name or ""
+    level = _level_cache.get(name)
+    if level is None:
+        prefix = max(
+            (
+                prefix
+                for prefix in _config.levels
+                if name == prefix or name.startswith(prefix + ".")
+            ),
+            key=len,
+            default=None,
+        )
+        level = _level_no(_config.levels[prefix] if prefix else _config.level)
+        _level_cache[name] = level
+    return level
+
+
+def _filter(record: Dict[str, Any]) -> bool:
+    return record["level"].no >= subsystem_level(record["name"])
+
+
+def _patch(record: Dict[str, Any]) -> None:
+    # 日志和追踪可以按 trace_id 关联
+    span = current_span()
+    if span.recording:
+        record["extra"]["trace_id"] = span.trace_id
+        record["extra"]["span_id"] = span.span_id
+
+
+class InterceptHandler(logging.Handler):
+    """把标准库 logging 的记录转发给 loguru，统一输出格式和级别"""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            level = logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+        # 找到调用 logging 的位置，loguru 记录的模块名和行号才是正确的
+        frame, depth = inspect.currentframe(), 0
+        while frame and (depth == 0 or frame.f_code.co_filename == logging.__file__):
+            frame = frame.f_back
+            depth += 1
+        # 按标准库 logger 的名称过滤级别，而不是调用处的模块名
+        logger.patch(lambda r: r.update(name=record.name)).opt(
+            depth=depth, exception=record.exc_info
+        ).log(level, record.getMessage())
+
+
+def _redact_pattern(keys: List[str]) -> Optional[re.Pattern]:
+    # 覆盖 repr 或 JSON 中的 api_key='...'、"api_key": "..." 等写法
+    if not keys:
+        return None
+    names = "|".join(re.escape(key) for key in keys)
+    return re.compile(
+        rf"""(["']?\b(?:{names})["']?\s*[:=]\s*)(["'])(?:\\.|(?!\2).)*\2""",
+        re.IGNORECASE,
+    )
+
+
+_redact_re = _redact_pattern(_config.redact_keys)
+
+
+def redact(value: Any) -> Any:
+    """把字典、列表和 pydantic 模型中 redact_keys 列出的字段的值替换为 ***"""
+    keys = {key.lower() for key in _config.redact_keys}
+    if not keys:
+        return value
+
+    def walk(value: Any) -> Any:
+        if isinstance(value, BaseModel):
+            value = value.model_dump()
+        if isinstance(value, dict):
+            return {
+                key: _redacted
+                if isinstance(key, str) and key.lower() in keys and item
+                else walk(item)
+                for key, item in value.items()
+            }
+        if isinstance(value, (list, tuple)):
+            return [walk(item) for item in value]
+        return value
+
+    return walk(value)
+
+
+def redact_text(text: str) -> str:
+    if _redact_re is None:
+        return text
+    return _redact_re.sub(rf"\1\2{_redacted}\2", text)
+
+
+class _Payload:
+    """日志参数的占位，只有日志真正输出时才渲染并截断"""
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: Any, limit: Optional[int]):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        value = self.value() if callable(self.value) else self.value
+        # 配置中的 api_key 等字段不写入日志
+        value = redact(value)
+        items = _config.max_payload_items
+        if isinstance(value, (list, tuple)) and len(value) > items > 1:
+            keep = items // 2
+            value = [
+                *value[:keep],
+                f"...[{len(value) - 2 * keep} items omitted]...",
+                *value[-keep:],
+            ]
+        return truncate(redact_text(str(value)), self.limit)
+
+    __repr__ = __str__
+
+    def __format__(self, spec: str) -> str:
+        return format(str(self), spec)
+
+
+def payload(value: Any, limit: Optional[int] = None) -> _Payload:
+    """
+    包装较大的日志参数，如提示词、变量字典和消息历史。
+
+    value 可以是一个无参函数，日志级别未开启时既不会调用它也不会转成字符串；
+    redact_keys 中字段的值替换为 ***，过长的列表只保留首尾的元素，
+    过长的文本截断到 limit（默认 max_payload_chars）。
+    """
+    return _Payload(value, limit)
+
+
+def truncate(text: str, limit: Optional[int] = None) -> str:
+    limit = _config.max_payload_chars if limit is None else limit
+    if limit <= 0 or len(text) <= limit:
+        return text
+    return text[:limit] + f"...[{len(text) - limit} chars truncated]"
+
+
+def get_logging_config() -> LoggingConfig:
+    return _config
+
+
+def configure_logging(config: Optional[LoggingConfig | Dict[str, Any]]) -> None:
+    """
+    替换 loguru 的输出：stderr 和按大小轮转的 JSON 行文件，并接管标准库 logging。
+
+    配置没有变化时直接返回，Streamlit 每次重跑脚本都调用也不会重复添加输出。
+    """
+    global _config, _redact_re
+    if config is None:
+        return
+    if isinstance(config, dict):
+        config = LoggingConfig(**config)
+    with _config_lock:
+        if _handler_ids and config == _config:
+            return
+        _config = config
+        _redact_re = _redact_pattern(config.redact_keys)
+        _level_cache.clear()
+
+        # 输出的最低级别，更低的日志在格式化参数之前就被丢弃
+        floor = min(_level_no(level) for level in [config.level, *config.levels.values()])
+        logger.remove()
+        _handler_ids.clear()
+        logger.configure(patcher=_patch)
+        if config.console:
+            _handler_ids.append(
+                logger.add(sys.stderr, level=floor, filter=_filter, enqueue=config.enqueue)
+            )
+        if config.path:
+            _handler_ids.append(
+                logger.add(
+                    config.path,
+                    level=floor,
+                    filter=_filter,
+                    serialize=True,
+                    rotation=config.rotation,
+                    retention=config.retention,
+                    enqueue=config.enqueue,
+                    encoding="utf-8",
+                )
+            )
+
+        # 标准库的日志在 Logger 上按级别过滤，未开启的级别不会格式化消息
+        logging.basicConfig(handlers=[InterceptHandler()], level=0, force=True)
+        logging.getLogger().setLevel(_level_no(config.level))
+        for name, level in config.levels.items():
+            logging.getLogger(name).setLevel(_level_no(level))
+    logger.debug("📝[Logging]Configured logging: {}", config)
+
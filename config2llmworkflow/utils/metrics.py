@@ -0,0 +1,329 @@
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+from config2llmworkflow.configs.metrics.base import MetricsConfig
+
+_Labels = Tuple[Tuple[str, str], ...]
+
+# 指标名 -> (类型, 说明)
+_metric_help: Dict[str, Tuple[str, str]] = {
+    "llm_calls_total": ("counter", "LLM calls by node, model and cache hit"),
+    "llm_errors_total": ("counter", "LLM calls that failed after all retries"),
+    "llm_retries_total": ("counter", "Retried LLM requests"),
+    "llm_tokens_total": ("counter", "Tokens reported by providers"),
+    "llm_call_seconds": ("histogram", "Wall time of an LLM call including retries"),
+    "llm_queue_wait_seconds": ("histogram", "Time spent waiting for an executor slot"),
+    "interpreter_runs_total": ("counter", "Python interpreter executions"),
+    "interpreter_seconds": ("histogram", "Wall time of a Python interpreter execution"),
+    "tool_calls_total": ("counter", "Tool calls by node, tool and status"),
+    "tool_seconds": ("histogram", "Wall time of a tool call"),
+    "node_runs_total": ("counter", "Node runs by status"),
+    "node_seconds": ("histogram", "Wall time of a node run"),
+    "server_jobs_total": ("counter", "Jobs finished by the HTTP service"),
+}
+
+
+def _labels(labels: Dict[str, Any]) -> _Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: _Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    items = labels + extra
+    if not items:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(
+            key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        for key, value in items
+    )
+    return "{" + body + "}"
+
+
+class _Histogram:
+    def __init__(self, buckets: List[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> Iterator[Tuple[str, int]]:
+        total = 0
+        for bound, count in zip(self.buckets + [float("inf")], self.counts):
+            total += count
+            yield ("+Inf" if bound == float("inf") else repr(float(bound))), total
+
+
+class MetricsRegistry:
+    """
+    进程内的计数器和直方图，线程安全。
+
+    指标按 (名称, 标签) 聚合，可以导出为 JSON 快照或 Prometheus 文本格式。
+    """
+
+    def __init__(self, config: Optional[MetricsConfig] = None):
+        self.config = config or MetricsConfig()
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[_Labels, float]] = {}
+        self._histograms: Dict[str, Dict[_Labels, _Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        if not self.config.enabled:
+            return
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        if not self.config.enabled:
+            return
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = _Histogram(list(self.config.latency_buckets))
+            series[key].observe(value)
+
+    def record_llm_call(self, node: str, model: str, call: Dict[str, Any]) -> None:
+        """记录一次 LLM 调用，call 是节点日志 llm_calls 中的一条"""
+        labels = {"node": node, "model": model}
+        self.inc("llm_calls_total", cached=str(call["cached"]).lower(), **labels)
+        if call["cached"]:
+            return
+        usage = call.get("usage") or {}
+        self.inc("llm_tokens_total", usage.get("prompt_tokens", 0), kind="prompt", **labels)
+        self.inc(
+            "llm_tokens_total",
+            usage.get("completion_tokens", 0),
+            kind="completion",
+            **labels,
+        )
+        if call.get("retries"):
+            self.inc("llm_retries_total", call["retries"], **labels)
+        self.observe("llm_call_seconds", call["latency_s"], **labels)
+        self.observe("llm_queue_wait_seconds", call["queue_wait_s"], **labels)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = {
+                name: [
+                    {"labels": dict(labels), "value": value}
+                    for labels, value in series.items()
+                ]
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: [
+                    {
+                        "labels": dict(labels),
+                        "count": histogram.count,
+                        "sum": round(histogram.sum, 6),
+                        "buckets": dict(histogram.cumulative()),
+                    }
+                    for labels, histogram in series.items()
+                ]
+                for name, series in self._histograms.items()
+            }
+        return {
+            "started_at": self.started,
+            "uptime_s": round(time.time() - self.started, 3),
+            "counters": counters,
+            "histograms": histograms,
+        }
+
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                kind, help_text = _metric_help.get(name, ("counter", name))
+                lines.append(f"# HELP config2llmworkflow_{name} {help_text}")
+                lines.append(f"# TYPE config2llmworkflow_{name} {kind}")
+                for labels, value in series.items():
+                    lines.append(
+                        f"config2llmworkflow_{name}{_format_labels(labels)} {value}"
+                    )
+            for name, series in sorted(self._histograms.items()):
+                kind, help_text = _metric_help.get(name, ("histogram", name))
+                lines.append(f"# HELP config2llmworkflow_{name} {help_text}")
+                lines.append(f"# TYPE config2llmworkflow_{name} {kind}")
+                for labels, histogram in series.items():
+                    for bound, count in histogram.cumulative():
+                        lines.append(
+                            f"config2llmworkflow_{name}_bucket"
+                            f"{_format_labels(labels, (('le', bound),))} {count}"
+                        )
+                    lines.append(
+                        f"config2llmworkflow_{name}_sum{_format_labels(labels)} "
+                        f"{histogram.sum}"
+                    )
+                    lines.append(
+                        f"config2llmworkflow_{name}_count{_format_labels(labels)} "
+                        f"{histogram.count}"
+                    )
+        return "\n".join(lines) + "\n"
+
+    def export(self) -> None:
+        """按配置把指标写入文件，先写临时文件再替换，读取方不会看到写了一半的内容"""
+        for path, render in (
+            (self.config.prometheus_path, self.render_prometheus),
+            (
+                self.config.json_path,
+                lambda: json.dumps(self.snapshot(), ensure_ascii=False, indent=2),
+            ),
+        ):
+            if not path:
+                continue
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                file.write(render())
+            os.replace(tmp_path, path)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+_metrics: Optional[MetricsRegistry] = None
+_metrics_lock = threading.Lock()
+_exporter_stop = threading.Event()
+
+
+def get_metrics() -> MetricsRegistry:
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = MetricsRegistry()
+        return _metrics
+
+
+def _export_loop(registry: MetricsRegistry, stop: threading.Event) -> None:
+    while not stop.wait(registry.config.flush_interval):
+        try:
+            registry.export()
+        except OSError as e:
+            logger.warning("📈[Metrics]Failed to export metrics: {}", e)
+
+
+@atexit.register
+def _export_at_exit() -> None:
+    _exporter_stop.set()
+    if _metrics is not None:
+        try:
+            _metrics.export()
+        except OSError as e:
+            logger.warning("📈[Metrics]Failed to export metrics: {}", e)
+
+
+def configure_metrics(config: Optional[MetricsConfig | Dict[str, Any]]) -> None:
+    global _metrics, _exporter_stop
+    if config is None:
+        return
+    if isinstance(config, dict):
+        config = MetricsConfig(**config)
+    with _metrics_lock:
+        _exporter_stop.set()
+        _exporter_stop = threading.Event()
+        _metrics = MetricsRegistry(config)
+        if config.prometheus_path or config.json_path:
+            threading.Thread(
+                target=_export_loop,
+                args=(_metrics, _exporter_stop),
+                name="metrics-exporter",
+                daemon=True,
+            ).start()
+    logger.debug("📈[Metrics]Configured metrics: {}", config)
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {
+        "runs": 0,
+        "latency_s": 0.0,
+        "llm_calls": 0,
+        "cached_calls": 0,
+        "retries": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "llm_latency_s": 0.0,
+        "queue_wait_s": 0.0,
+        "interpreter_runs": 0,
+        "interpreter_s": 0.0,
+        "tool_calls": 0,
+        "tool_s": 0.0,
+    }
+
+
+def _add_node(totals: Dict[str, Any], log: Dict[str, Any]) -> None:
+    for call in log.get("llm_calls", []):
+        usage = call.get("usage") or {}
+        totals["llm_calls"] += 1
+        totals["cached_calls"] += int(call.get("cached", False))
+        totals["retries"] += call.get("retries", 0)
+        totals["prompt_tokens"] += usage.get("prompt_tokens", 0)
+        totals["completion_tokens"] += usage.get("completion_tokens", 0)
+        totals["llm_latency_s"] += call.get("latency_s", 0.0)
+        totals["queue_wait_s"] += call.get("queue_wait_s", 0.0)
+    for run in log.get("interpreter_calls", []):
+        totals["interpreter_runs"] += 1
+        totals["interpreter_s"] += run.get("latency_s", 0.0)
+    for call in log.get("tool_call", []):
+        totals["tool_calls"] += 1
+        totals["tool_s"] += call.get("latency_s", 0.0)
+
+
+# 节点日志中不包含子节点的字段
+_leaf_keys = ("llm_calls", "interpreter_calls", "messages", "tool_call")
+
+
+def run_metrics(logs: Any) -> Dict[str, Any]:
+    """
+    汇总一次工作流运行的节点日志，返回 {"nodes": {节点名: 指标}, "total": 指标}。
+
+    嵌套工作流的节点按各自的名称汇总，节点的 latency_s 是最近一次运行的耗时。
+    """
+    nodes: Dict[str, Dict[str, Any]] = {}
+    total = _empty_totals()
+    stack = [logs]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, list):
+            stack.extend(item)
+            continue
+        if not isinstance(item, dict):
+            continue
+        if "llm_calls" in item or "interpreter_calls" in item or "latency_s" in item:
+            entry = nodes.setdefault(item.get("name", "?"), _empty_totals())
+            if "latency_s" in item:
+                entry["runs"] += 1
+                entry["latency_s"] += item["latency_s"]
+            _add_node(entry, item)
+            _add_node(total, item)
+        stack.extend(
+            value
+            for key, value in item.items()
+            if key not in _leaf_keys and isinstance(value, (dict, list))
+        )
+    for entry in [total, *nodes.values()]:
+        for key, value in entry.items():
+            if isinstance(value, float):
+                entry[key] = round(value, 3)
+    total.pop("runs")
+    total.pop("latency_s")
+    return {"nodes": nodes, "total": total}
@@ -1,16 +1,290 @@
 import re
+import os
+import ast
+import json
+import queue
+import select
+import hashlib
+import atexit
 import subprocess
 import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config2llmworkflow.configs.interpreter.base import InterpreterConfig
+from config2llmworkflow.utils.cache import MemoryCache
+from config2llmworkflow.utils.tracing import span
+from config2llmworkflow.utils.log import payload
 
 import logging
 
 logger = logging.getLogger(__name__)
 
+_worker_script = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "interpreter_worker.py"
+)
+
+
+class WorkerError(Exception):
+    """工作进程超时或意外退出"""
+
+
+# 结果依赖时间、随机数、环境或文件的代码不缓存
+_uncacheable_modules = {
+    "datetime",
+    "glob",
+    "io",
+    "os",
+    "pathlib",
+    "random",
+    "secrets",
+    "shutil",
+    "socket",
+    "subprocess",
+    "sys",
+    "tempfile",
+    "time",
+    "urllib",
+    "uuid",
+}
+_uncacheable_names = {"open", "input", "__import__", "eval", "exec"}
+# 预加载的 numpy 无需导入即可使用，按属性名识别随机数和读文件
+_uncacheable_attributes = {
+    "random",
+    "load",
+    "loadtxt",
+    "genfromtxt",
+    "fromfile",
+    "read_csv",
+    "read_text",
+    "read_bytes",
+    "now",
+    "today",
+}
+
+
+def cacheable(code: str) -> bool:
+    """代码的输出是否只由代码本身决定，可以按代码哈希缓存"""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        # 语法错误的结果总是相同的
+        return True
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            modules = [node.module or ""]
+        elif isinstance(node, ast.Name):
+            if node.id in _uncacheable_names:
+                return False
+            continue
+        elif isinstance(node, ast.Attribute):
+            if node.attr in _uncacheable_attributes:
+                return False
+            continue
+        else:
+            continue
+        if any(module.split(".")[0] in _uncacheable_modules for module in modules):
+            return False
+    return True
+
+
+class InterpreterWorker:
+    """一个预热的 Python 进程，通过管道逐行收发 JSON"""
+
+    def __init__(self, config: InterpreterConfig):
+        self.config = config
+        self.jobs = 0
+        env = dict(os.environ)
+        env.update(
+            {
+                "C2LW_MAX_OUTPUT_CHARS": str(config.max_output_chars),
+                "C2LW_MEMORY_LIMIT_MB": str(config.memory_limit_mb or ""),
+                "C2LW_PRELOAD": ",".join(config.preload_modules),
+                # 限制 BLAS 线程，避免每个进程预留大量内存
+                "OPENBLAS_NUM_THREADS": env.get("OPENBLAS_NUM_THREADS", "1"),
+            }
+        )
+        self.process = subprocess.Popen(
+            [sys.executable, "-u", _worker_script],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=env,
+        )
+        self._buffer = b""
+        self._ready = False
+
+    def _read_message(self, timeout: Optional[float]) -> Dict[str, Any]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        fd = self.process.stdout.fileno()
+        while b"\n" not in self._buffer:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise WorkerError(f"Execution timed out after {timeout}s")
+            readable, _, _ = select.select([fd], [], [], remaining)
+            if not readable:
+                continue
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise WorkerError(
+                    f"Interpreter worker exited with code {self.process.wait()}"
+                )
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return json.loads(line)
+
+    def wait_ready(self, timeout: float = 60) -> None:
+        if not self._ready:
+            self._read_message(timeout)
+            self._ready = True
+
+    def execute(self, code: str, timeout: float) -> Dict[str, Any]:
+        self.wait_ready()
+        self.jobs += 1
+        try:
+            self.process.stdin.write(
+                (json.dumps({"code": code}, ensure_ascii=False) + "\n").encode("utf-8")
+            )
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise WorkerError(f"Interpreter worker is not available: {e}")
+        return self._read_message(timeout)
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def kill(self) -> None:
+        if self.alive:
+            self.process.kill()
+        self.process.wait()
+        for stream in (self.process.stdin, self.process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+
+class InterpreterPool:
+    """
+    常驻的 Python 工作进程池。
+
+    工作进程启动时预先导入常用模块，之后通过管道接收代码，避免每段代码都启动
+    新的解释器；每次执行有超时、内存和输出长度限制，执行 max_jobs_per_worker
+    次后回收进程，导入了新模块或修改了预加载模块的进程立即回收（见 interpreter_worker）。
+    结果只依赖代码本身的代码（见 cacheable），相同代码的结果按代码哈希缓存。
+    """
+
+    def __init__(self, config: Optional[InterpreterConfig] = None):
+        self.config = config or InterpreterConfig()
+        self.cache = (
+            MemoryCache(self.config.cache_max_entries)
+            if self.config.cache_max_entries > 0
+            else None
+        )
+        self._idle: "queue.Queue[InterpreterWorker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+        self._closed = False
+
+    def start(self) -> None:
+        """启动所有工作进程，进程在后台并行预热"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for _ in range(self.config.pool_size):
+            self._idle.put(InterpreterWorker(self.config))
+
+    def _release(self, worker: InterpreterWorker, healthy: bool) -> None:
+        if healthy and worker.alive and worker.jobs < self.config.max_jobs_per_worker:
+            self._idle.put(worker)
+            return
+        worker.kill()
+        if not self._closed:
+            # 立即补充新进程，让它在下次使用前完成预热
+            self._idle.put(InterpreterWorker(self.config))
+
+    def execute(self, code: str) -> Dict[str, Any]:
+        """执行代码，返回 {"ok": bool, "stdout": str, "stderr": str}"""
+        key = None
+        if self.cache is not None and cacheable(code):
+            key = hashlib.sha256(code.encode("utf-8")).hexdigest()
+            cached = self.cache.get(key)
+            if cached is not None:
+                logger.info("Python code result cache hit: %s", key)
+                return dict(cached)
+
+        self.start()
+        worker = self._idle.get()
+        healthy = True
+        try:
+            response = worker.execute(code, self.config.timeout)
+            fatal = response.pop("fatal", False)
+            # 状态被代码修改过的进程不再交给其他会话使用
+            dirty = response.pop("dirty", False)
+            healthy = not fatal and not dirty
+        except WorkerError as e:
+            # 超时或进程崩溃的结果不缓存
+            healthy = False
+            return {"ok": False, "stdout": "", "stderr": str(e)}
+        finally:
+            self._release(worker, healthy)
+
+        if key is not None:
+            self.cache.set(key, dict(response))
+        return response
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().kill()
+            except queue.Empty:
+                break
+
+
+_pool: Optional[InterpreterPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_interpreter_pool() -> InterpreterPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = InterpreterPool()
+        return _pool
+
+
+@atexit.register
+def _close_pool() -> None:
+    if _pool is not None:
+        _pool.close()
+
+
+def configure_interpreter(config: Optional[InterpreterConfig | Dict[str, Any]]) -> None:
+    global _pool
+    if config is None:
+        return
+    if isinstance(config, dict):
+        config = InterpreterConfig(**config)
+    with _pool_lock:
+        previous, _pool = _pool, InterpreterPool(config)
+    if previous is not None:
+        previous.close()
+    # 构建应用时就开始预热
+    _pool.start()
+    logger.debug("Configured interpreter pool: %s", config)
+
 
 class PythonInterpreter:
     code_pattern = re.compile(r"```python\n(.*?)\n```", re.DOTALL)
     code: str = None
     result: str = None
+    ok: bool = False
 
     def __init__(self, text: str):
         self.text = text
@@ -28,23 +302,24 @@ class PythonInterpreter:
             logger.error("No code to run")
             return None
 
-        logger.info(f"Running Python code: {self.code}")
+        logger.debug("Running Python code: %s", payload(self.code))
 
-        try:
-            # 开启进程，使用python运行代码
-            result = subprocess.run(
-                [sys.executable, "-c", self.code],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                check=True,
+        # 在预热的工作进程中运行代码
+        with span("interpreter", **{"code.chars": len(self.code)}) as current:
+            result = get_interpreter_pool().execute(self.code)
+            current.set_attributes(
+                {
+                    "interpreter.ok": result["ok"],
+                    "interpreter.stdout_chars": len(result["stdout"]),
+                }
             )
+        self.ok = result["ok"]
+        if result["ok"]:
             # 获取输出
-            self.result = result.stdout.strip()
-            logger.info(f"Python code output: {self.result}")
-
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Error running Python code: {e.stderr}")
-            self.result = e.stderr.strip()
+            self.result = result["stdout"].strip()
+            logger.debug("Python code output: %s", payload(self.result))
+        else:
+            logger.error("Error running Python code: %s", payload(result["stderr"]))
+            self.result = result["stderr"].strip()
 
         return self.result
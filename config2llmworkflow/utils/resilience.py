@@ -0,0 +1,308 @@
+import asyncio
+import email.utils
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from loguru import logger
+
+from config2llmworkflow.configs.agents.base import ResilienceConfig
+from config2llmworkflow.utils.executor import ConcurrencyLimiter
+from config2llmworkflow.utils.tokens import count_message_tokens
+
+
+class CircuitOpenError(RuntimeError):
+    """端点连续失败，熔断期间直接失败，不再请求"""
+
+
+class TokenBucket:
+    """
+    每分钟补充 per_minute 个令牌的令牌桶，可以在多个事件循环之间共享。
+
+    获取令牌时先扣减（允许为负），再等待到余额回到 0，因此先到的请求先通过；
+    实际用量与预估不同时用 adjust 修正。
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1) -> None:
+        with self._lock:
+            self._refill(time.monotonic())
+            self.level -= min(amount, self.capacity)
+            wait = -self.level / self.rate if self.level < 0 else 0
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def adjust(self, amount: float) -> None:
+        with self._lock:
+            self._refill(time.monotonic())
+            self.level = min(self.capacity, self.level - amount)
+
+
+class AdaptiveLimiter:
+    """AIMD 并发控制：每个成功窗口上限加 1，过载时减半"""
+
+    def __init__(self, max_limit: int, min_limit: int = 1):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.current = float(max_limit)
+        self.limiter = ConcurrencyLimiter(max_limit)
+        self._lock = threading.Lock()
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.current = min(self.max_limit, self.current + 1 / self.current)
+            self.limiter.resize(int(self.current))
+
+    def on_overload(self) -> None:
+        with self._lock:
+            self.current = max(self.min_limit, self.current / 2)
+            self.limiter.resize(int(self.current))
+        logger.warning("🐢[Resilience]Overloaded, concurrency limit now {}", int(self.current))
+
+
+class CircuitBreaker:
+    """连续失败 failure_threshold 次后熔断，reset_timeout 秒后放行一次试探请求"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self, name: str) -> bool:
+        """熔断时抛出 CircuitOpenError；返回这次调用是否是半开状态下的试探请求"""
+        if self.failure_threshold <= 0:
+            return False
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return False
+            if state == "half_open" and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            raise CircuitOpenError(
+                f"Circuit open for {name} after {self.failures} consecutive failures"
+            )
+
+    def release_trial(self) -> None:
+        """试探请求没有结果就结束了（被取消），保持半开状态，下一个请求可以再次试探"""
+        with self._lock:
+            self.trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self, name: str) -> None:
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            self.failures += 1
+            if self.trial_in_flight or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self.trial_in_flight:
+                    logger.error("⛔[Resilience]Circuit opened for {}", name)
+                self.opened_at = time.monotonic()
+                self.trial_in_flight = False
+
+
+def _parse_retry_after(headers: Any) -> Optional[float]:
+    if not headers:
+        return None
+    try:
+        value = headers.get("retry-after-ms")
+        if value is not None:
+            return float(value) / 1000
+        value = headers.get("retry-after")
+    except AttributeError:
+        return None
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        parsed = email.utils.parsedate_to_datetime(value)
+        return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+
+_transient_names = (
+    "Timeout",
+    "Connection",
+    "ServiceUnavailable",
+    "RateLimit",
+    "Overloaded",
+    "ResourceExhausted",
+    "DeadlineExceeded",
+    "InternalServerError",
+)
+
+
+def classify_error(error: BaseException) -> Tuple[bool, Optional[float], bool]:
+    """返回 (是否可重试, Retry-After 秒数, 是否表示过载)"""
+    status = getattr(error, "status_code", None) or getattr(error, "http_status", None)
+    if status is None and isinstance(getattr(error, "code", None), int):
+        status = error.code
+    response = getattr(error, "response", None)
+    retry_after = _parse_retry_after(
+        getattr(response, "headers", None) or getattr(error, "headers", None)
+    )
+
+    if isinstance(status, int):
+        retryable = status in (408, 409, 429) or status >= 500
+        return retryable, retry_after, status in (429, 503)
+
+    # 回放的错误保留了原始的异常类型名
+    name = getattr(error, "error_type", None) or type(error).__name__
+    retryable = isinstance(
+        error, (asyncio.TimeoutError, TimeoutError, ConnectionError)
+    ) or any(part in name for part in _transient_names)
+    overloaded = any(part in name for part in ("RateLimit", "Overloaded", "ResourceExhausted"))
+    return retryable, retry_after, overloaded
+
+
+class EndpointGuard:
+    """一个 (provider, base_url, model) 端点的限流、重试、并发调整和熔断"""
+
+    def __init__(self, name: str, config: ResilienceConfig):
+        self.name = name
+        self.config = config
+        self.requests = TokenBucket(config.rpm_limit) if config.rpm_limit else None
+        self.tokens = TokenBucket(config.tpm_limit) if config.tpm_limit else None
+        self.adaptive = (
+            AdaptiveLimiter(config.adaptive_concurrency)
+            if config.adaptive_concurrency
+            else None
+        )
+        self.breaker = CircuitBreaker(
+            config.circuit_failure_threshold, config.circuit_reset_timeout
+        )
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        # 指数退避加随机抖动，服务端给出 Retry-After 时至少等待这么久
+        delay = min(self.config.retry_max_delay, self.config.retry_base_delay * 2**attempt)
+        delay = random.uniform(delay / 2, delay)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    async def call(
+        self,
+        func: Callable[[], Awaitable[Dict[str, Any]]],
+        estimated_tokens: int = 0,
+    ) -> Dict[str, Any]:
+        """调用 func 并返回其结果；func 返回的 usage 用于修正 tokens/min 的预估"""
+        attempt = 0
+        while True:
+            trial = self.breaker.before_call(self.name)
+            settled = False
+            try:
+                if self.requests is not None:
+                    await self.requests.acquire(1)
+                if self.tokens is not None:
+                    await self.tokens.acquire(estimated_tokens)
+
+                if self.adaptive is not None:
+                    await self.adaptive.limiter.acquire()
+                try:
+                    response = await func()
+                except Exception as e:
+                    retryable, retry_after, overloaded = classify_error(e)
+                    if overloaded and self.adaptive is not None:
+                        self.adaptive.on_overload()
+                    if retryable:
+                        self.breaker.record_failure(self.name)
+                    else:
+                        # 请求本身有问题（如 400、401），端点仍然可用
+                        self.breaker.record_success()
+                    settled = True
+                    if not retryable or attempt >= self.config.max_retries:
+                        raise
+                    delay = self._backoff(attempt, retry_after)
+                    attempt += 1
+                    logger.warning(
+                        "🔁[Resilience]{} failed with {}: {}, retry {}/{} in {:.1f}s",
+                        self.name,
+                        type(e).__name__,
+                        e,
+                        attempt,
+                        self.config.max_retries,
+                        delay,
+                    )
+                else:
+                    self.breaker.record_success()
+                    settled = True
+                    if self.adaptive is not None:
+                        self.adaptive.on_success()
+                    if self.tokens is not None:
+                        usage = response.get("usage") or {}
+                        actual = usage.get("prompt_tokens", 0) + usage.get(
+                            "completion_tokens", 0
+                        )
+                        if actual:
+                            self.tokens.adjust(actual - estimated_tokens)
+                    return response
+                finally:
+                    if self.adaptive is not None:
+                        self.adaptive.limiter.release()
+            finally:
+                if trial and not settled:
+                    # 试探请求被取消（如工作流取消同级节点）时交还试探机会
+                    self.breaker.release_trial()
+            await asyncio.sleep(delay)
+
+
+class ResilienceRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._guards: Dict[Tuple, EndpointGuard] = {}
+
+    def get(
+        self,
+        provider: str,
+        base_url: Optional[str],
+        model: Optional[str],
+        config: ResilienceConfig,
+    ) -> EndpointGuard:
+        key = (provider, base_url, model)
+        with self._lock:
+            if key not in self._guards:
+                self._guards[key] = EndpointGuard(f"{provider}:{model}@{base_url}", config)
+            return self._guards[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._guards.clear()
+
+
+_registry = ResilienceRegistry()
+
+
+def get_resilience_registry() -> ResilienceRegistry:
+    return _registry
+
+
+def estimate_tokens(messages: Any, max_tokens: int = 0, model: Optional[str] = None) -> int:
+    """估计一次请求消耗的 token：prompt 按 tiktoken 计数，再加上补全长度的一半"""
+    return count_message_tokens(messages, model) + max_tokens // 2
@@ -0,0 +1,76 @@
+import contextvars
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Union
+
+from config2llmworkflow.nodes.base import Node
+from config2llmworkflow.nodes.context import RunContext
+
+
+class StreamEvent(Enum):
+    """除新增文本之外发给 TokenSink 的事件"""
+
+    # 这次 LLM 请求失败、即将重试，已经输出的部分应当丢弃
+    RETRY = "retry"
+    # 这次 LLM 请求已经完成
+    DONE = "done"
+
+
+# 接收流式输出的回调，参数为 (节点名称, 新增文本或 StreamEvent)
+TokenSink = Callable[[str, Union[str, StreamEvent]], None]
+
+_token_sink: contextvars.ContextVar[Optional[TokenSink]] = contextvars.ContextVar(
+    "token_sink", default=None
+)
+
+
+def get_token_sink() -> Optional[TokenSink]:
+    return _token_sink.get()
+
+
+class NodeStreams:
+    """
+    按节点累积流式输出，用于显示。
+
+    已完成的请求之间用空行分隔；请求重试时只丢弃这次请求已经输出的部分，
+    同一节点之前完成的请求（如工具调用的前几轮）仍然保留。
+    """
+
+    def __init__(self):
+        self._done: Dict[str, str] = {}
+        self._pending: Dict[str, str] = {}
+
+    def feed(self, name: str, delta: Union[str, StreamEvent]) -> str:
+        """处理一条流式输出，返回节点当前应显示的全部文本"""
+        if delta is StreamEvent.RETRY:
+            self._pending[name] = ""
+        elif delta is StreamEvent.DONE:
+            pending = self._pending.pop(name, "")
+            self._done[name] = self._done.get(name, "") + pending + "\n\n"
+        else:
+            self._pending[name] = self._pending.get(name, "") + delta
+        return self.text(name)
+
+    def text(self, name: str) -> str:
+        return self._done.get(name, "") + self._pending.get(name, "")
+
+
+async def arun_streaming(
+    node: Node,
+    input_vars: Dict[str, Any],
+    on_token: TokenSink,
+    context: Optional[RunContext] = None,
+) -> Any:
+    """
+    运行节点，并把其中所有 LLM 调用的流式输出交给 on_token。
+
+    回调通过 contextvar 传递，节点内部创建的任务会自动继承；
+    回调在事件循环线程中调用，不能直接操作 Streamlit 元素。
+    传入 context 时在其中运行，运行结束后可以从中读取日志。
+    """
+    token = _token_sink.set(on_token)
+    try:
+        if context is not None:
+            return await context.arun(node, input_vars)
+        return await node.arun(input_vars)
+    finally:
+        _token_sink.reset(token)
@@ -0,0 +1,61 @@
+import string
+from typing import Any, FrozenSet, List, Mapping, Optional, Tuple
+
+_formatter = string.Formatter()
+
+
+def _root_name(field_name: str) -> str:
+    # "a.b" / "a[0]" 只依赖变量 a
+    for index, char in enumerate(field_name):
+        if char in ".[":
+            return field_name[:index]
+    return field_name
+
+
+class PromptTemplate:
+    """
+    str.format 风格的模板，在构建节点时解析一次并记录引用的变量。
+
+    渲染时只读取模板需要的变量，缺少变量时抛出 KeyError 并列出所有缺失的变量名；
+    非法模板和位置参数（"{}"、"{0}"）在解析时就抛出 ValueError。
+    """
+
+    def __init__(self, template: str):
+        self.template = template
+        # (字面文本, 字段名, 格式说明, 转换符)
+        self._segments: List[Tuple[str, Optional[str], str, Optional[str]]] = []
+        fields = set()
+        for literal, field_name, format_spec, conversion in _formatter.parse(template):
+            if field_name is not None:
+                name = _root_name(field_name)
+                if not name or name.isdigit():
+                    raise ValueError(
+                        f"Positional field {{{field_name}}} is not supported in template: "
+                        f"{template!r}"
+                    )
+                fields.add(name)
+                # 格式说明中也可以嵌套字段，例如 {value:{width}}
+                if format_spec:
+                    fields |= PromptTemplate(format_spec).fields
+            self._segments.append((literal, field_name, format_spec or "", conversion))
+        self.fields: FrozenSet[str] = frozenset(fields)
+
+    def render(self, variables: Mapping[str, Any]) -> str:
+        missing = self.fields - variables.keys()
+        if missing:
+            raise KeyError(f"Missing template variables: {sorted(missing)}")
+
+        parts = []
+        for literal, field_name, format_spec, conversion in self._segments:
+            parts.append(literal)
+            if field_name is None:
+                continue
+            value, _ = _formatter.get_field(field_name, (), variables)
+            value = _formatter.convert_field(value, conversion)
+            if "{" in format_spec:
+                format_spec = _formatter.vformat(format_spec, (), variables)
+            parts.append(format(value, format_spec))
+        return "".join(parts)
+
+    def __repr__(self) -> str:
+        return f"PromptTemplate({self.template!r})"
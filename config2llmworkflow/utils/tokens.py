@@ -0,0 +1,123 @@
+import functools
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+# 没有对应 tiktoken 编码的模型（如 deepseek、qwen）按这个编码估计
+DEFAULT_ENCODING = "cl100k_base"
+# 每条消息的角色和分隔符大约占用的 token
+MESSAGE_OVERHEAD = 4
+
+# 常用模型的上下文窗口（输入 token 数），按最长的名称前缀匹配
+CONTEXT_WINDOWS = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-4": 8192,
+    "gpt-4-32k": 32768,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4.1": 1047576,
+    "o1": 200000,
+    "o3": 200000,
+    "o4-mini": 200000,
+    "deepseek-chat": 131072,
+    "deepseek-reasoner": 131072,
+    "deepseek-coder": 128000,
+    "gemini-pro": 32760,
+    "gemini-1.5-flash": 1048576,
+    "gemini-1.5-pro": 2097152,
+    "gemini-2.0": 1048576,
+    "gemini-2.5": 1048576,
+    "claude": 200000,
+    "moonshot-v1-8k": 8192,
+    "moonshot-v1-32k": 32768,
+    "moonshot-v1-128k": 131072,
+    "qwen-max": 32768,
+    "qwen-plus": 131072,
+    "qwen-turbo": 1000000,
+    "glm-4": 128000,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding_name(model: str) -> str:
+    import tiktoken
+
+    try:
+        return tiktoken.encoding_name_for_model(model)
+    except KeyError:
+        return DEFAULT_ENCODING
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding(name: str) -> Optional[Any]:
+    # 编码器第一次加载时需要读取（或下载）词表，之后进程内复用；加载失败也会被缓存，不再重试
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        logger.warning(
+            "🔢[Tokens]Failed to load tiktoken encoding {}, estimating by characters: {}",
+            name,
+            e,
+        )
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def context_window(model: Optional[str]) -> Optional[int]:
+    """模型的上下文窗口，未知的模型返回 None；忽略 deepseek/deepseek-chat 这样的服务商前缀"""
+    if not model:
+        return None
+    name = model.rsplit("/", 1)[-1].lower()
+    prefix = max(
+        (prefix for prefix in CONTEXT_WINDOWS if name.startswith(prefix)),
+        key=len,
+        default=None,
+    )
+    return CONTEXT_WINDOWS[prefix] if prefix else None
+
+
+def get_encoding(model: Optional[str] = None) -> Optional[Any]:
+    """模型对应的 tiktoken 编码器，无法加载时返回 None"""
+    try:
+        name = _encoding_name(model) if model else DEFAULT_ENCODING
+    except ImportError:
+        return None
+    return _encoding(name)
+
+
+@functools.lru_cache(maxsize=4096)
+def _count(text: str, model: Optional[str]) -> int:
+    encoding = get_encoding(model)
+    if encoding is None:
+        return len(text) // 3
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    文本的 token 数。
+
+    结果按 (文本, 模型) 缓存，多轮对话中反复发送的系统提示词和历史消息只编码一次。
+    """
+    return _count(text, model) if text else 0
+
+
+def message_text(message: Dict[str, Any]) -> str:
+    """消息中计入 prompt 的文本：内容和工具调用的名称、参数"""
+    text = str(message.get("content") or "")
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call.get("function", tool_call)
+        text += f"\n{function.get('name', '')}{function.get('arguments', '')}"
+    return text
+
+
+def count_message_tokens(
+    messages: List[Dict[str, Any]], model: Optional[str] = None
+) -> int:
+    """一组 chat 消息作为 prompt 时大约占用的 token"""
+    return sum(
+        MESSAGE_OVERHEAD + count_tokens(message_text(message), model)
+        for message in messages
+    ) + 2
@@ -0,0 +1,311 @@
+import atexit
+import contextlib
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from loguru import logger
+
+from config2llmworkflow.configs.tracing.base import TracingConfig
+
+SPAN_KIND_INTERNAL = "SPAN_KIND_INTERNAL"
+SPAN_KIND_CLIENT = "SPAN_KIND_CLIENT"
+
+
+def _otel_value(value: Any, max_chars: int) -> Dict[str, Any]:
+    # OTLP/JSON 的 AnyValue，64 位整数按字符串编码
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otel_value(v, max_chars) for v in value]}}
+    if not isinstance(value, str):
+        value = json.dumps(value, ensure_ascii=False, default=str)
+    if len(value) > max_chars:
+        value = value[:max_chars] + f"...[{len(value) - max_chars} chars truncated]"
+    return {"stringValue": value}
+
+
+def _otel_attributes(attributes: Dict[str, Any], max_chars: int) -> List[Dict[str, Any]]:
+    return [
+        {"key": key, "value": _otel_value(value, max_chars)}
+        for key, value in attributes.items()
+        if value is not None
+    ]
+
+
+class Span:
+    """一段有起止时间的操作，结束时交给导出器"""
+
+    recording = True
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        kind: str,
+        attributes: Dict[str, Any],
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = dict(attributes)
+        self.events: List[Dict[str, Any]] = []
+        self.status_code = "STATUS_CODE_UNSET"
+        self.status_message = ""
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        self.events.append(
+            {"name": name, "time": time.time_ns(), "attributes": attributes or {}}
+        )
+
+    def record_exception(self, error: BaseException) -> None:
+        self.status_code = "STATUS_CODE_ERROR"
+        self.status_message = f"{type(error).__name__}: {error}"
+        self.add_event(
+            "exception",
+            {"exception.type": type(error).__name__, "exception.message": str(error)},
+        )
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.tracer.export(self)
+
+    def to_otel(self, max_chars: int) -> Dict[str, Any]:
+        data = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otel_attributes(self.attributes, max_chars),
+            "status": {"code": self.status_code},
+        }
+        if self.parent_id is not None:
+            data["parentSpanId"] = self.parent_id
+        if self.status_message:
+            data["status"]["message"] = self.status_message
+        if self.events:
+            data["events"] = [
+                {
+                    "name": event["name"],
+                    "timeUnixNano": str(event["time"]),
+                    "attributes": _otel_attributes(event["attributes"], max_chars),
+                }
+                for event in self.events
+            ]
+        return data
+
+
+class _NonRecordingSpan:
+    """未启用追踪或未被采样时使用，所有操作都是空操作"""
+
+    recording = False
+    trace_id = None
+    span_id = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        pass
+
+    def record_exception(self, error: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+NON_RECORDING_SPAN = _NonRecordingSpan()
+
+_current_span: contextvars.ContextVar[Optional[Any]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+def current_span() -> Any:
+    span = _current_span.get()
+    return span if span is not None else NON_RECORDING_SPAN
+
+
+class JsonlSpanExporter:
+    """
+    在后台线程中把结束的 span 追加写入 JSONL 文件。
+
+    每行是一个 OTLP/JSON 的 ExportTraceServiceRequest，可以直接被
+    OpenTelemetry Collector 的 otlpjsonfile receiver 读取。
+    """
+
+    def __init__(self, config: TracingConfig):
+        self.config = config
+        self._queue: "queue.SimpleQueue[Optional[Span]]" = queue.SimpleQueue()
+        directory = os.path.dirname(config.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(
+            target=self._write_loop, name="span-exporter", daemon=True
+        )
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        self._queue.put(span)
+
+    def _batch(self) -> Iterator[List[Span]]:
+        while True:
+            span = self._queue.get()
+            if span is None:
+                return
+            batch = [span]
+            # 一次取出队列中已有的所有 span，写成一行
+            while True:
+                try:
+                    span = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if span is None:
+                    yield batch
+                    return
+                batch.append(span)
+            yield batch
+
+    def _write_loop(self) -> None:
+        resource = {
+            "attributes": _otel_attributes(
+                {"service.name": self.config.service_name}, self.config.max_attribute_chars
+            )
+        }
+        with open(self.config.path, "a", encoding="utf-8") as file:
+            for batch in self._batch():
+                request = {
+                    "resourceSpans": [
+                        {
+                            "resource": resource,
+                            "scopeSpans": [
+                                {
+                                    "scope": {"name": "config2llmworkflow"},
+                                    "spans": [
+                                        span.to_otel(self.config.max_attribute_chars)
+                                        for span in batch
+                                    ],
+                                }
+                            ],
+                        }
+                    ]
+                }
+                file.write(json.dumps(request, ensure_ascii=False, default=str) + "\n")
+                file.flush()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+
+class Tracer:
+    def __init__(self, config: Optional[TracingConfig] = None):
+        self.config = config or TracingConfig()
+        self.exporter = JsonlSpanExporter(self.config) if self.config.enabled else None
+
+    @contextlib.contextmanager
+    def span(
+        self, name: str, kind: str = SPAN_KIND_INTERNAL, **attributes: Any
+    ) -> Iterator[Any]:
+        """
+        开始一个 span，with 块内开始的 span 都是它的子 span。
+
+        父 span 通过 contextvar 传递，同一个事件循环中创建的任务和
+        共享线程池中运行的函数都会继承；是否采样在根 span 决定，整棵树一致。
+        """
+        if self.exporter is None:
+            yield NON_RECORDING_SPAN
+            return
+
+        parent = _current_span.get()
+        if parent is None:
+            if random.random() >= self.config.sample_rate:
+                span = NON_RECORDING_SPAN
+            else:
+                span = Span(self, name, os.urandom(16).hex(), None, kind, attributes)
+        elif not parent.recording:
+            span = NON_RECORDING_SPAN
+        else:
+            span = Span(self, name, parent.trace_id, parent.span_id, kind, attributes)
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    def export(self, span: Span) -> None:
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+    def close(self) -> None:
+        if self.exporter is not None:
+            self.exporter.close()
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+        return _tracer
+
+
+def span(name: str, kind: str = SPAN_KIND_INTERNAL, **attributes: Any):
+    return get_tracer().span(name, kind, **attributes)
+
+
+@atexit.register
+def _close_tracer() -> None:
+    if _tracer is not None:
+        _tracer.close()
+
+
+def configure_tracing(config: Optional[TracingConfig | Dict[str, Any]]) -> None:
+    global _tracer
+    if config is None:
+        return
+    if isinstance(config, dict):
+        config = TracingConfig(**config)
+    with _tracer_lock:
+        previous, _tracer = _tracer, Tracer(config)
+    if previous is not None:
+        previous.close()
+    logger.debug("🧵[Tracing]Configured tracing: {}", config)
@@ -1,36 +1,110 @@
-import re
-from typing import List, Dict, Any
-import concurrent.futures
-import streamlit as st
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import time
 from config2llmworkflow.configs.workflows.base import BaseWorkflowConfig
 from config2llmworkflow.nodes.base import Node
+from config2llmworkflow.nodes.context import current_run, run_context, run_state
 from config2llmworkflow.configs.nodes.base import NodeType
+from config2llmworkflow.workflows.scheduler import (
+    build_dependencies,
+    input_fingerprint,
+    memoizable,
+    node_produced_vars,
+    node_required_vars,
+    ready_nodes,
+    validate_workflow,
+)
+from config2llmworkflow.utils.aio import run_sync
+from config2llmworkflow.utils.cache import bypass_cache_read
+from config2llmworkflow.utils.errors import InvalidInputError
+from config2llmworkflow.utils.extraction import ExtractionError, extract_outputs
+from config2llmworkflow.utils.metrics import get_metrics
+from config2llmworkflow.utils.tracing import span
+from config2llmworkflow.utils.log import payload
 from loguru import logger
 
 
-def run_node(node: Node, variables: Dict[str, Any]) -> Dict[str, Any]:
+async def arun_node(node: Node, variables: Dict[str, Any]) -> Dict[str, Any]:
     logger.debug("🔄[Node]Running node: {}", node.config.name)
-    logger.debug("🔄[Node]variables: {}", variables)
-    return node(variables)
+    logger.debug("🔄[Node]variables: {}", payload(variables))
+    start = time.perf_counter()
+    status = "error"
+    try:
+        with span(
+            f"node {node.config.name}",
+            **{
+                "node.name": node.config.name,
+                "node.type": node.config.node_type,
+                "node.priority": node.config.priority,
+            },
+        ):
+            # 子工作流通过 RunContext.arun 显式沿用本次运行的上下文
+            result = await current_run().arun(node, variables)
+        status = "ok"
+        return result
+    finally:
+        latency = time.perf_counter() - start
+        node.node_log["latency_s"] = round(latency, 4)
+        metrics = get_metrics()
+        labels = {"node": node.config.name, "type": node.config.node_type}
+        metrics.inc("node_runs_total", status=status, **labels)
+        metrics.observe("node_seconds", latency, **labels)
+
+
+async def arun_extracting(
+    node: Node, variables: Dict[str, Any]
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    运行节点并按输出变量的 extract 配置解析结果，返回 (节点输出, 解析出的字段)。
+
+    解析失败时只重新请求这一个节点，重新请求时不读取响应缓存。
+    """
+    retries = max((extractor.retries for extractor in node.extractors), default=0)
+    attempt = 0
+    while True:
+        if attempt:
+            with bypass_cache_read():
+                result = await arun_node(node, variables)
+        else:
+            result = await arun_node(node, variables)
+        try:
+            return result, extract_outputs(node.config.name, node.extractors, result)
+        except ExtractionError as e:
+            if attempt >= retries:
+                raise
+            attempt += 1
+            logger.warning(
+                "🔁[Workflow]{}, re-querying node ({}/{})", e, attempt, retries
+            )
 
 
 class BaseWorkflow(Node):
     type = NodeType.WORKFLOW
+    # 本次运行中已经产生的变量
+    variables = run_state(lambda node: {})
 
     def __init__(self, config: BaseWorkflowConfig = None):
         super().__init__(config)
         self.config = config
-        self.variables = {}
         self.nodes = []
 
         logger.debug(
-            r"🏗️[Workflow]BaseWorkflow -> {}: {}", type(self.config), self.config
+            r"🏗️[Workflow]BaseWorkflow -> {}: {}", type(self.config), payload(self.config)
         )
 
         self._init_nodes()
+        self.dependencies = build_dependencies(self.nodes)
+        logger.debug(
+            "🔗[Workflow]Dependencies for {}: {}",
+            self.config.name,
+            {
+                node.config.name: [self.nodes[index].config.name for index in deps]
+                for node, deps in zip(self.nodes, self.dependencies)
+            },
+        )
 
     def _init_nodes(self) -> List[Node]:
-        logger.debug("📋[Workflow]self.config.nodes: \n {}", self.config.nodes)
+        logger.debug("📋[Workflow]self.config.nodes: \n {}", payload(self.config.nodes))
 
         from config2llmworkflow.utils.factory import NodeFactory
 
@@ -39,11 +113,13 @@ class BaseWorkflow(Node):
             logger.info(
                 "🔨[Workflow]Creating node: {} \n config: {}",
                 node_config.name,
-                node_config,
+                payload(node_config),
             )
-            node = NodeFactory.create(node_config.to_dict())
+            node = NodeFactory.create(self._with_global_agent(node_config.to_dict()))
             self.nodes.append(node)
 
+        self._init_computed_nodes()
+
         logger.info(
             "✅[Workflow]Created nodes for {}: {}",
             self.config.name,
@@ -51,6 +127,44 @@ class BaseWorkflow(Node):
         )
         return self.nodes
 
+    def _with_global_agent(self, node_config: Dict[str, Any]) -> Dict[str, Any]:
+        """节点配置中未设置的字段使用 global_agent 中的值"""
+        if self.config.global_agent is None:
+            return node_config
+        return self.config.global_agent.apply(node_config)
+
+    def validate(self) -> None:
+        """检查所有节点引用的变量都有来源，应在最外层工作流构建完成后调用"""
+        validate_workflow(self)
+
+    def _init_computed_nodes(self) -> None:
+        from config2llmworkflow.nodes.computed import ComputedNode
+
+        # computed_vars 作为不调用 LLM 的节点加入依赖图，默认优先级与其最晚的上游相同，
+        # 这样同优先级及之后的节点都能依赖它
+        for variable in self.config.computed_vars:
+            node = ComputedNode(variable)
+            producers = [
+                other.config.priority
+                for other in self.nodes
+                if node_produced_vars(other) & node_required_vars(node)
+            ]
+            if variable.priority is None:
+                node.config.priority = max(
+                    producers,
+                    default=min((n.config.priority for n in self.nodes), default=1.0),
+                )
+            logger.info(
+                "🧮[Workflow]Computed variable {} = {} (priority {})",
+                variable.name,
+                variable.expression,
+                node.config.priority,
+            )
+            self.nodes.append(node)
+
+    def run(self, input_vars: Dict[str, Any]) -> Dict[str, Any]:
+        return run_sync(self.arun(input_vars))
+
     @property
     def logs(self) -> Dict[str, Any]:
         logger.debug("📊[Workflow]Current workflow: {}", self.config.name)
@@ -59,7 +173,7 @@ class BaseWorkflow(Node):
         )
 
         if self.nodes:
-            self.node_log["nodes"] = [node.logs for node in self.nodes]
+            return {**self.node_log, "nodes": [node.logs for node in self.nodes]}
 
         return self.node_log
 
@@ -69,212 +183,106 @@ class DefaultWorkflow(BaseWorkflow):
     def __init__(self, config: BaseWorkflowConfig = None):
         super().__init__(config)
 
-    def run(self, input_vars: Dict[str, Any]) -> Dict[str, Any]:
+    async def arun(self, input_vars: Dict[str, Any]) -> Dict[str, Any]:
+        # 使用 RunContext.arun 传入的上下文，直接调用时使用新的上下文
+        with run_context(), span(
+            f"workflow {self.config.name}", **{"workflow.name": self.config.name}
+        ):
+            return await self._arun(input_vars)
+
+    async def _arun(
+        self,
+        input_vars: Dict[str, Any],
+        memo: Optional[Dict[int, Tuple[str, Dict[str, Any]]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        运行所有节点。传入 memo 时，记录确定性节点（见 memoizable）输入的摘要和输出，
+        下次运行时输入未变化的节点直接复用上次的输出。
+        """
         logger.info("▶️[Workflow]Running default workflow: {}\n", self.config.name)
-        logger.debug("📋[Workflow]All nodes: {}\n", self.nodes)
+        logger.debug("📋[Workflow]All nodes: {}\n", payload(self.nodes))
         # 验证输入变量
         for var in self.config.input_vars:
             if var.name not in input_vars:
-                raise ValueError(f"Missing input variable: {var.name}")
+                raise InvalidInputError(f"Missing input variable: {var.name}")
 
         # 合并输入变量和已有变量
         self.variables.update(input_vars)
-        
+
         #在此处增加一个智能体用于读取输入，并计算出原始数值更新self.variables
 
-        # 对智能体进行优先级排序
-        node_priority_dict = {}
-        for node in self.nodes:
-            if node.config.priority not in node_priority_dict:
-                node_priority_dict[node.config.priority] = []
-            node_priority_dict[node.config.priority].append(node)
-        logger.info("🔀[Workflow]node_priority_dict: {}\n", node_priority_dict)
+        # 按依赖关系调度：节点的输入变量都已产生即可运行，无需等待同优先级的其他节点
+        output_vars = {}
+        pending = set(range(len(self.nodes)))
+        done = set()
+        running = {}
+
+        # 在同一个事件循环中并发运行智能体
+        # arun_node 返回 Dict[str, Any]
+        try:
+            while pending or running:
+                for index in ready_nodes(self.nodes, self.dependencies, pending, done):
+                    pending.discard(index)
+                    node = self.nodes[index]
+                    # 传入变量快照，避免其他节点完成时修改正在格式化的字典
+                    variables = dict(self.variables)
 
-        # 获取所有优先级，从 1 到 n 排序
-        priorities = sorted(node_priority_dict.keys())
+                    fingerprint = None
+                    if memo is not None and memoizable(node):
+                        fingerprint = input_fingerprint(node, variables)
+                        previous = memo.get(index)
+                        if previous is not None and previous[0] == fingerprint:
+                            logger.info(
+                                "♻️[Workflow]Inputs of node {} unchanged, reusing outputs\n",
+                                node.config.name,
+                            )
+                            future = asyncio.get_running_loop().create_future()
+                            future.set_result(previous[1])
+                            running[future] = (index, fingerprint)
+                            continue
 
-        
-        # 逐个优先级运行智能体, 必须按照优先级顺序运行
-        output_vars = {}
-        for priority in priorities:
-            logger.info("⚡[Workflow]Running nodes at priority {}\n", priority)
-            nodes = node_priority_dict[priority]
-
-            # 多线程并行运行智能体
-            # run_node 返回 Dict[str, Any]
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                futures = [
-                    executor.submit(run_node, node, self.variables) for node in nodes
-                ]
-                results = [
-                    future.result()
-                    for future in concurrent.futures.as_completed(futures)
-                ]
-
-            # 更新变量
-            for result in results:
-                
-                self.variables.update(result)
-            
-            # 更新输出变量
-            import json,re
-            datas = {}
-            for node in nodes:
-                for var in node.config.output_vars:
-                    output_vars[var.name] = self.variables[var.name]
-                    if var.name == 'summary_1':
-                        logger.info("⚡ summary_1:{}\n",self.variables['summary_1'])
-                        pattern = r'\s*["]*(\w+)["]*:\s*["]*([-+]?\d+\.?\d*)["]*'
-                        matches = re.findall(pattern, self.variables['summary_1'])
-                        # result_1 = json.loads(matches)
-                        # for match in matches:
-                        result_1 = {key: value for key, value in matches}
-                        if result_1:
-                        # result_1=json.loads(self.variables['summary_1'])
-                            logger.info("⚡ summary_1:{}\n",result_1)
-                            output_vars.update(result_1)
-                        else:
-                            result_1 = json.loads(self.variables['summary_1'])
-                            if result_1:
-                                logger.info("⚡ summary_1:{}\n",result_1)
-                                output_vars.update(result_1)
-                            else:
-                                st.write("Agent1 识别有误，请再次运行")
-                            # raise ValueError("result_1 is None, rerun please.")
-                        
-                    if var.name == 'summary_2':
-                        logger.info("⚡ summary_2:{}\n",self.variables['summary_2'])
-                        pattern = r'\s*["]*(\w+)["]*:\s*["]*([-+]?\d+\.?\d*)["]*'
-                        matches = re.findall(pattern, self.variables['summary_2'])
-                        # result_1 = json.loads(matches)
-                        # for match in matches:
-                        data = {key: value for key, value in matches}
-                        
-                        output_vars.update(data)
-                        L1 = 2*float(data['dL1'])+float(data['hL1'])+0.8*float(data['tL1'])
-                        U1 = 2*float(data['dU1'])+float(data['hU1'])+0.8*float(data['tU1'])
-                        output_vars.update({'L1':L1,'U1':U1})
-                        self.variables['summary_2'] += "{下切牙所需的牙列间隙变化L1:"+str(L1)+",'上切牙所需的牙列间隙变化U1': '"+str(U1)+"' }"
-                        logger.info("⚡ summary_2:{}\n",output_vars)
-                        # logger.info("⚡ summary_2:{}\n",data)
-
-                    if var.name == 'summary_3':
-                        logger.info("⚡ summary_3:{}\n",self.variables['summary_3'])
-                        # pattern = r'"(\w+)":\s*(\S+)'
-                        # matches = re.findall(pattern, self.variables['summary_3'])
-                        pattern = r'\s*["]*(\w+)["]*:\s*["]*([-+]?\d+\.?\d*)["]*'
-                        matches = re.findall(pattern, self.variables['summary_3'])
-                        # result_1 = json.loads(matches)
-                        # for match in matches:
-                        data = {key: value for key, value in matches}
-                        if data:
-                        # result_1=json.loads(self.variables['summary_1'])
-                            logger.info("⚡ summary_3:{}\n",data)
-                            output_vars.update(data)
-                        else:
-                            # import streamlit as st
-                            result_1 = json.loads(self.variables['summary_3'])
-                            if result_1:
-                                logger.info("⚡ summary_3 正则表达式匹配有误，尝试使用json:{}\n",result_1)
-                                output_vars.update(result_1)
-                            else:
-                                st.write("Agent3 识别有误，请再次运行")
-                        
-                        # 计算上下总间隙量
-                        # kuoGong = float(data['D1'])+4-float(data['D2'])
-                        # logger.info("⚡扩弓量=D1{}-D2{}+4 ：{}\n",data['D1'],data['D2'],kuoGong)
-                        # shangHe = ((float(data['HL'])+float(data['HR'])) + 18)*0.2
-                        # logger.info("⚡上颌平均：{}\n",shangHe)
-                        # xiaHe = ((float(data['DL'])+float(data['DR'])) + 60)*0.2
-                        # logger.info("⚡下颌平均：{}\n",xiaHe)
-                        
-                        # output_vars.update({'上颌牙弓总间隙量':kuoGong+shangHe,'下颌牙弓总间隙量':kuoGong+xiaHe})
-                        # logger.info("⚡ summary_3:{}\n",output_vars)
-                        # self.variables['summary_3'] += "{'上颌牙弓总间隙量':"+str(kuoGong+shangHe)+",'下颌牙弓总间隙量': '"+str(kuoGong+xiaHe)+"' }"
-                        kuoGong = 0.5*(float(data['D1'])+4-float(data['D2']))
-                        logger.info("⚡扩弓量=D1{}-D2{}+4 ：{}\n",data['D1'],data['D2'],kuoGong)
-                        
-                        logger.info("⚡ summary_3:{}\n",output_vars)
-                        self.variables['summary_3'] += "{'扩弓量': '"+str(kuoGong)+"' }"
-                    if var.name == 'summary_4':
-                        # logger.info("⚡ summary_4:{}\n",self.variables['summary_4'])
-                        pattern = r'\s*[\'"]*(\w+)[\'"]*:\s*[\'"]*([-+]?\d+\.?\d*)[\'"]*'
-                        matches = re.findall(pattern, self.variables['summary_4'])
-                        # result_1 = json.loads(matches)
-                        # for match in matches:
-                        data = {key: value for key, value in matches}
-                        if data:
-                        # result_1=json.loads(self.variables['summary_1'])
-                            # logger.info("⚡ _1:{}\n",result_1)
-                            output_vars.update(data)
-                        else:
-                            # import streamlit as st
-                            result_1 = json.loads(self.variables['summary_1'])
-                            if result_1:
-                                logger.info("⚡ summary_4 正则表达式匹配有误，尝试使用json::{}\n",result_1)
-                                output_vars.update(result_1)
-                            else:
-                                st.write("Agent4识别有误，请再次运行")
-                        SpeeAvg = 0.5*(float(data['左Spee曲线深度']) + float(data['右Spee曲线深度']))+0.5
-                        # output_vars.update(data)
-                        output_vars.update({'Spee整平所需间隙':SpeeAvg})
-                        self.variables['summary_4'] += "{'Spee整平所需间隙':" + str(SpeeAvg) + "}\\n"
-                        # logger.info("⚡ Agent 4 data:{}\n",output_vars)
-                    if var.name == 'summary_5':
-                        # logger.info("⚡ summary_5:{}\n",self.variables['summary_5'])
-                        pattern = r'\s*[\'"]*(\w+)[\'"]*:\s*[\'"]*([-+]?\d+\.?\d*)[\'"]*'
-                        matches = re.findall(pattern, self.variables['summary_5'])
-                        data = {key: value for key, value in matches}
-                        if data:
-                        # result_1=json.loads(self.variables['summary_1'])
-                            # logger.info("⚡ _1:{}\n",result_1)
-                            output_vars.update(data)
-                        else:
-                            # import streamlit as st
-                            result_1 = json.loads(self.variables['summary_1'])
-                            if result_1:
-                                logger.info("⚡ summary_5 正则表达式匹配有误，尝试使用json:{}\n",result_1)
-                                output_vars.update(result_1)
-
-                            else:
-                                st.write("Agent5 识别有误，请再次运行")
-                        # output_vars.update(data)
-                        # logger.info("⚡ summary_5:{}\n",data)
-                 
-                    if var.name == 'summary_6':
-                        # logger.info("⚡ result_6:{}\n",output_vars['result_6'])
-                        pattern = r'\s*["]*(\w+)["]*:\s*["]*([-+]?\d+\.?\d*)["]*'
-                        matches = re.findall(pattern, self.variables['summary_6'])
-                        data_1 = {'A1': '0', 'B1': '0', 'C1': '0', 'D1': '0', 'A2': '0', 'B2': '0','C2':'0', 'D2': '0','E2':'0'}
-                        output_vars.update(data_1)
-                        data = {key: value for key, value in matches}
-                        if data:
-                        # result_1=json.loads(self.variables['summary_1'])
-                            logger.info("⚡ summary_6:{}\n",data)
-                            output_vars.update(data)
-                        else:
-                            # import streamlit as st
-                            
-                            st.write("Agent6 识别有误，请再次运行")
-                        # try:
-                        
-                        shangHeZong = float(data['A1']) + float(data['B1']) +float(data['C1']) + float(data['D1'])
-                        if output_vars['E2']:
-                            xiaHeZong = float(data['A2']) + float(data['B2']) +float(data['C2']) + float(data['D2']) +float(output_vars['E2']) 
-                        # except:
-                        else:
-                            xiaHeZong = float(data['A2']) + float(data['B2']) +float(data['C2']) + float(data['D2'])
-
-                        # logger.info("⚡ result_6:{}\n",data)
-                        result = {'上颌总间隙需求量':shangHeZong,'下颌总间隙需求量':xiaHeZong}
-                        self.variables.update({'summary_6':result})
+                    logger.info(
+                        "⚡[Workflow]Starting node {} (priority {})\n",
+                        node.config.name,
+                        node.config.priority,
+                    )
+                    task = asyncio.ensure_future(arun_extracting(node, variables))
+                    running[task] = (index, fingerprint)
 
+                finished, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in finished:
+                    index, fingerprint = running.pop(task)
+                    result, extracted = task.result()
+                    if fingerprint is not None:
+                        memo[index] = (fingerprint, (result, extracted))
+                    # 更新变量
+                    self.variables.update(result)
+                    self.variables.update(extracted)
+                    # 更新输出变量
+                    self._collect_outputs(self.nodes[index], output_vars, extracted)
+                    done.add(index)
+        except BaseException:
+            # 任一节点失败时取消仍在运行的节点
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            raise
 
         logger.info(
             "✅[Workflow]Finished running default workflow: {}", self.config.name
         )
         return output_vars
 
+    def _collect_outputs(
+        self, node: Node, output_vars: Dict[str, Any], extracted: Dict[str, Any]
+    ) -> None:
+        for var in node.config.output_vars:
+            output_vars[var.name] = self.variables[var.name]
+        # 解析出的字段在 arun_extracting 中已经按类型转换
+        output_vars.update(extracted)
+
     def to_dict(self):
         return {
             "config": self.config.model_dump(),
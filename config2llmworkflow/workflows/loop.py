@@ -1,8 +1,11 @@
 from typing import Any, Dict
 from config2llmworkflow.configs.nodes.base import NodeType
 
-from config2llmworkflow.workflows.base import DefaultWorkflow
+from config2llmworkflow.nodes.context import run_context
+from config2llmworkflow.workflows.base import DefaultWorkflow, arun_extracting
 from config2llmworkflow.configs.workflows.base import BaseLoopWorkflowConfig
+from config2llmworkflow.utils.tracing import span
+from config2llmworkflow.utils.log import payload
 
 import logging
 
@@ -16,7 +19,7 @@ def _match_condition(condition: str, vars: dict) -> bool:
         condition = condition.format(**vars)
         return eval(condition)
     except Exception as e:
-        logger.error(f"Error when match condition: {condition}, {e}")
+        logger.error("Error when match condition: %s, %s", condition, e)
         return False
 
 
@@ -31,50 +34,70 @@ class LoopWorkflow(DefaultWorkflow):
         from config2llmworkflow.utils.factory import AgentProxyFactory
 
         self.watchdog_agent = AgentProxyFactory.create(
-            config=self.config.watchdog_agent.to_dict()
+            config=self._with_global_agent(
+                self.config.watchdog_agent.model_dump(exclude_unset=True)
+            )
         )
 
-    def run(self, input_vars: Dict[str, Any]) -> Dict[str, Any]:
+    async def arun(self, input_vars: Dict[str, Any]) -> Dict[str, Any]:
+        with run_context(), span(
+            f"workflow {self.config.name}", **{"workflow.name": self.config.name}
+        ):
+            return await self._arun_loop(input_vars)
+
+    async def _arun_loop(self, input_vars: Dict[str, Any]) -> Dict[str, Any]:
         # 先运行完所有的节点，再让 watchdog_agent 运行判断结果
-        logger.debug(f"Start running loop workflow, name: {self.config.name}")
+        logger.debug("Start running loop workflow, name: %s", self.config.name)
         output_vars = input_vars.copy()
         # output_vars = input_vars
         loop_time = 1
 
+        # 记录每个节点上一轮的输入摘要和输出，输入没有变化的节点不再重复调用
+        memo = {} if self.config.incremental else None
+        # watchdog 的输出会作为下一轮的输入反馈给节点，第一轮还没有反馈
+        input_vars = {
+            **{var.name: "" for var in self.watchdog_agent.config.output_vars},
+            **input_vars,
+        }
+
         while True:
             logger.info(
-                f"Loop work flow [{self.config.name}] running loop time: {loop_time}"
+                "Loop work flow [%s] running loop time: %s", self.config.name, loop_time
             )
-            logger.debug(f"{input_vars=}")
-            logger.info(f"Start running nodes")
-            logger.info(f"nodes: {self.nodes}")
-            tmp_output_vars = super().run(input_vars)
-            logger.info(f"End running nodes")
-            logger.debug(f"{tmp_output_vars=}")
-            # 让 watchdog_agent 运行
-            tmp_watchdog_output_vars = self.watchdog_agent.run(tmp_output_vars)
+            logger.debug("input_vars=%s", payload(input_vars))
+            logger.debug("Start running nodes: %s", payload(self.nodes))
+            with span(f"loop iteration {loop_time}", **{"loop.iteration": loop_time}):
+                tmp_output_vars = await self._arun(input_vars, memo)
+                logger.debug("End running nodes")
+                logger.debug("tmp_output_vars=%s", payload(tmp_output_vars))
+                # 让 watchdog_agent 运行
+                tmp_watchdog_output_vars, extracted = await arun_extracting(
+                    self.watchdog_agent, tmp_output_vars
+                )
+            tmp_watchdog_output_vars.update(extracted)
 
             logger.debug(
-                f"{tmp_watchdog_output_vars=}"
+                "tmp_watchdog_output_vars=%s", payload(tmp_watchdog_output_vars)
             )  # {'result_match': '0', 'result_2': ''}
 
             # 检查是否满足结束条件
             end_condition = self.config.end_condition.format(**tmp_watchdog_output_vars)
-            logger.info(f"Check end condition: {end_condition}")
+            logger.info("Check end condition: %s", end_condition)
             if (
                 _match_condition(end_condition, tmp_watchdog_output_vars)
                 or loop_time > self.config.max_loops
             ):
-                logger.info(f"loop has match condition or above max loops")
+                logger.info("loop has match condition or above max loops")
                 output_vars.update(tmp_output_vars)
                 output_vars.update(tmp_watchdog_output_vars)
                 break
 
             loop_time += 1
-            logger.info(f"loop time update to {loop_time}")
+            logger.info("loop time update to %s", loop_time)
+            input_vars = {**input_vars, **tmp_watchdog_output_vars}
 
-        logger.debug(f"End running loop workflow, name: {self.config.name}")
-        logger.debug(f"output_vars: {output_vars}")
+        logger.debug("End running loop workflow, name: %s", self.config.name)
+        logger.debug("output_vars: %s", payload(output_vars))
 
         return output_vars
 
@@ -87,7 +110,8 @@ class LoopWorkflow(DefaultWorkflow):
 
     @property
     def logs(self) -> Dict[str, Any]:
-        self.node_log["nodes"] = [node.logs for node in self.nodes]
-        self.node_log["watchdog_agent"] = self.watchdog_agent.logs
-
-        return self.node_log
+        return {
+            **self.node_log,
+            "nodes": [node.logs for node in self.nodes],
+            "watchdog_agent": self.watchdog_agent.logs,
+        }
@@ -0,0 +1,190 @@
+import json
+import hashlib
+from typing import Any, Dict, Iterable, List, Set
+
+from loguru import logger
+
+from config2llmworkflow.nodes.base import Node
+
+
+def node_required_vars(node: Node) -> Set[str]:
+    """节点运行前需要的变量：input_vars 以及 role/prompt 中的占位符"""
+    required = {var.name for var in node.config.input_vars or []}
+    for template in getattr(node, "templates", None) or []:
+        required |= template.fields
+
+    # 子工作流的节点直接读取外层变量，其内部没有产生的变量也是依赖
+    children = list(getattr(node, "nodes", None) or [])
+    watchdog_agent = getattr(node, "watchdog_agent", None)
+    if watchdog_agent is not None:
+        children.append(watchdog_agent)
+    if children:
+        produced = set().union(*(node_produced_vars(child) for child in children))
+        for child in children:
+            required |= node_required_vars(child) - produced
+    return required
+
+
+def node_produced_vars(node: Node) -> Set[str]:
+    produced = {var.name for var in node.config.output_vars or []}
+    for extractor in getattr(node, "extractors", None) or []:
+        produced.update(extractor.names)
+    return produced
+
+
+def input_fingerprint(node: Node, variables: Dict[str, Any]) -> str:
+    """节点实际读取的变量值的摘要，相同摘要意味着渲染出的 role/prompt 相同"""
+    values = {name: variables.get(name) for name in sorted(node_required_vars(node))}
+    payload = json.dumps(values, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def memoizable(node: Node) -> bool:
+    """
+    节点的输出是否只由输入决定，只有这样的节点才能在循环中复用上一轮的输出。
+
+    智能体需要符合响应缓存的条件（默认即温度为 0），且不调用工具和 Python 解释器；
+    子工作流需要其中所有节点都满足条件。温度大于 0 的节点每轮都重新运行，
+    “重试直到 watchdog 通过”的循环才能得到不同的结果。
+    """
+    children = list(getattr(node, "nodes", None) or [])
+    watchdog_agent = getattr(node, "watchdog_agent", None)
+    if watchdog_agent is not None:
+        children.append(watchdog_agent)
+    if children:
+        return all(memoizable(child) for child in children)
+    use_cache = getattr(node, "_use_cache", None)
+    if use_cache is None:
+        # 计算节点等没有 LLM 调用的节点
+        return True
+    return use_cache() and not node.config.tools and node.config.disable_python_run
+
+
+def build_dependencies(nodes: List[Node]) -> List[Set[int]]:
+    """
+    根据节点的输入输出变量推断依赖关系，返回每个节点依赖的上游节点下标。
+
+    只有优先级不高于消费者的生产者才会成为上游节点，因此原有的优先级配置
+    仍然决定数据流向；同一变量被多个节点产生时，消费者会等待所有生产者。
+    多个节点读取并改写同一变量时（如 computed_vars 的 append_to），按声明顺序依次运行。
+    """
+    producers: Dict[str, List[int]] = {}
+    for index, node in enumerate(nodes):
+        for name in node_produced_vars(node):
+            producers.setdefault(name, []).append(index)
+
+    dependencies = [set() for _ in nodes]
+    for index, node in enumerate(nodes):
+        rewritten = node_produced_vars(node)
+        for name in node_required_vars(node):
+            for producer in producers.get(name, []):
+                if (
+                    producer != index
+                    and nodes[producer].config.priority <= node.config.priority
+                    and not (
+                        name in rewritten
+                        and name in node_required_vars(nodes[producer])
+                        and producer > index
+                    )
+                ):
+                    dependencies[index].add(producer)
+
+    _check_acyclic(nodes, dependencies)
+    return dependencies
+
+
+def _check_acyclic(nodes: List[Node], dependencies: List[Set[int]]) -> None:
+    remaining = {index: set(deps) for index, deps in enumerate(dependencies)}
+    while remaining:
+        ready = [index for index, deps in remaining.items() if not deps]
+        if not ready:
+            names = sorted(nodes[index].config.name for index in remaining)
+            raise ValueError(f"Cyclic variable dependency between nodes: {names}")
+        for index in ready:
+            del remaining[index]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+def upstream_nodes(dependencies: List[Set[int]], index: int) -> Set[int]:
+    """节点直接和间接依赖的所有上游节点"""
+    upstream = set()
+    stack = list(dependencies[index])
+    while stack:
+        current = stack.pop()
+        if current not in upstream:
+            upstream.add(current)
+            stack.extend(dependencies[current])
+    return upstream
+
+
+def validate_workflow(workflow: Node, available: Iterable[str] = ()) -> None:
+    """
+    在运行前检查工作流中每个节点引用的变量都能由外部输入或上游节点提供。
+
+    available 是外层传入的变量名；嵌套工作流以外层在该节点之前可用的变量继续检查。
+    节点缺少变量时抛出 ValueError；watchdog 只收到节点的输出，
+    其中还可能包含 _collect_outputs 推导出的变量，无法静态确定，因此只给出警告。
+    """
+    available = set(available) | {var.name for var in workflow.config.input_vars or []}
+    watchdog_agent = getattr(workflow, "watchdog_agent", None)
+    if watchdog_agent is not None:
+        # 循环工作流第一轮会用空字符串初始化 watchdog 的输出
+        available |= node_produced_vars(watchdog_agent)
+
+    errors = []
+    for index, node in enumerate(workflow.nodes):
+        visible = set(available)
+        for upstream in upstream_nodes(workflow.dependencies, index):
+            visible |= node_produced_vars(workflow.nodes[upstream])
+
+        if getattr(node, "nodes", None) is not None:
+            try:
+                validate_workflow(node, visible)
+            except ValueError as e:
+                errors.append(str(e))
+            continue
+
+        missing = node_required_vars(node) - visible
+        if missing:
+            errors.append(
+                f"Node {node.config.name!r} in workflow {workflow.config.name!r} "
+                f"references variables not provided by any input or upstream node: "
+                f"{sorted(missing)}"
+            )
+
+    if errors:
+        raise ValueError("\n".join(errors))
+
+    if watchdog_agent is not None:
+        produced = set().union(*(node_produced_vars(node) for node in workflow.nodes))
+        missing = node_required_vars(watchdog_agent) - produced
+        if missing:
+            logger.warning(
+                "⚠️[Workflow]Watchdog {} of {} references variables not declared as "
+                "node outputs: {}",
+                watchdog_agent.config.name,
+                workflow.config.name,
+                sorted(missing),
+            )
+
+
+def workflow_output_vars(workflow: Node) -> Set[str]:
+    """工作流运行结束时返回的变量：节点的输出，循环工作流还包括输入和 watchdog 的输出"""
+    produced = set().union(*(node_produced_vars(node) for node in workflow.nodes))
+    watchdog_agent = getattr(workflow, "watchdog_agent", None)
+    if watchdog_agent is not None:
+        produced |= {var.name for var in workflow.config.input_vars or []}
+        produced |= node_produced_vars(watchdog_agent)
+    return produced
+
+
+def ready_nodes(
+    nodes: List[Node],
+    dependencies: List[Set[int]],
+    pending: Set[int],
+    done: Set[int],
+) -> List[int]:
+    """返回依赖已全部完成的待运行节点，按优先级排序"""
+    ready = [index for index in pending if dependencies[index] <= done]
+    return sorted(ready, key=lambda index: (nodes[index].config.priority, index))
@@ -0,0 +1,12 @@
+import os
+
+from config2llmworkflow.configs.logging.base import LoggingConfig
+from config2llmworkflow.server import main
+from config2llmworkflow.utils.log import configure_logging
+
+configure_logging(LoggingConfig(path=os.path.join("logs", "server.jsonl")))
+
+
+if __name__ == "__main__":
+    # python server.py --config ./configs/config.yaml --port 8000
+    main()
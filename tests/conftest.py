@@ -0,0 +1,90 @@
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import pytest
+
+from config2llmworkflow.agents.openai_agent_proxy import OpenaiAgentProxy
+from config2llmworkflow.utils.cache import configure_cache
+from config2llmworkflow.utils.cassette import configure_cassette
+from config2llmworkflow.utils.resilience import get_resilience_registry
+
+Reply = Union[str, Dict[str, Any], Callable[[List[Dict[str, Any]]], Any]]
+
+
+class FakeLLM:
+    """
+    代替 OpenAI 接口的假模型：按顺序返回预设的回复，用完后重复最后一条。
+
+    回复可以是字符串、_aquery 格式的字典，或以消息列表为参数返回前两者的函数。
+    calls 记录每次请求的 (节点名, 消息)。
+    """
+
+    def __init__(self, *replies: Reply):
+        self.replies = list(replies) or ["ok"]
+        self.calls: List[tuple] = []
+
+    async def __call__(self, proxy: OpenaiAgentProxy, messages: List[Dict[str, Any]]):
+        index = min(len(self.calls), len(self.replies) - 1)
+        self.calls.append((proxy.config.name, [dict(message) for message in messages]))
+        reply = self.replies[index]
+        if callable(reply):
+            reply = reply(messages)
+        if isinstance(reply, str):
+            reply = {"content": reply, "tool_calls": []}
+        return {"usage": {"prompt_tokens": 1, "completion_tokens": 1}, **reply}
+
+
+@pytest.fixture(autouse=True)
+def isolated_runtime():
+    # 响应缓存、录制回放和端点状态是进程级单例，每个用例从干净的状态开始
+    configure_cache({"enabled": False})
+    configure_cassette({"mode": "off"})
+    get_resilience_registry().clear()
+    yield
+    configure_cache({"enabled": False})
+    configure_cassette({"mode": "off"})
+    get_resilience_registry().clear()
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    def install(*replies: Reply) -> FakeLLM:
+        llm = FakeLLM(*replies)
+
+        async def aquery(proxy, messages):
+            return await llm(proxy, messages)
+
+        monkeypatch.setattr(OpenaiAgentProxy, "_aquery", aquery)
+        return llm
+
+    return install
+
+
+def agent(name: str, prompt: str = "{question}", outputs=("answer",), **config):
+    return {
+        "name": name,
+        "node_type": "agent",
+        "provider": "openai",
+        "role": "assistant",
+        "prompt": prompt,
+        "output_vars": [{"name": output, "type": "str"} for output in outputs],
+        "api_key": "test",
+        "base_url": "http://llm.test/v1",
+        "disable_python_run": True,
+        **config,
+    }
+
+
+def workflow(nodes: List[Dict[str, Any]], inputs=("question",), **config):
+    return {
+        "name": "wf",
+        "node_type": "workflow",
+        "provider": "default",
+        "input_vars": [{"name": name, "type": "str"} for name in inputs],
+        "nodes": nodes,
+        **config,
+    }
+
+
+def run(coroutine) -> Any:
+    return asyncio.run(coroutine)
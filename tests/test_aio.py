@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from config2llmworkflow.agents.base import BaseAgentProxy
+from config2llmworkflow.agents.openai_agent_proxy import OpenaiAgentProxy
+from config2llmworkflow.configs.agents.base import BaseAgentProxyConfig
+from config2llmworkflow.utils.aio import run_sync
+from config2llmworkflow.utils.clients import get_client_registry
+from config2llmworkflow.utils.executor import get_executor
+from config2llmworkflow.utils.factory import WorkflowFactory
+
+from tests.conftest import agent, run, workflow
+
+
+async def current_loop():
+    return asyncio.get_running_loop()
+
+
+def test_run_sync_uses_the_shared_loop():
+    assert run_sync(current_loop()) is get_executor().loop
+
+
+def test_run_sync_inside_another_loop_still_uses_the_shared_loop():
+    async def main():
+        return run_sync(current_loop())
+
+    assert asyncio.run(main()) is get_executor().loop
+
+
+def test_run_sync_on_the_shared_loop_fails_loudly():
+    async def nested():
+        return run_sync(current_loop())
+
+    with pytest.raises(RuntimeError, match="await the coroutine"):
+        get_executor().submit(nested()).result(timeout=5)
+
+
+def test_sync_run_matches_arun(fake_llm):
+    fake_llm(lambda messages: messages[-1]["content"] + "!")
+    wf = WorkflowFactory.create(
+        config=workflow([agent("a", outputs=("x",)), agent("b", "{x}")])
+    )
+
+    assert wf.run({"question": "q"}) == run(wf.arun({"question": "q"}))
+    assert wf.run({"question": "q"})["answer"] == "q!!"
+
+
+def test_failing_node_cancels_running_siblings(monkeypatch):
+    cancelled = []
+
+    async def aquery(proxy, messages):
+        if proxy.config.name == "fail":
+            raise RuntimeError("boom")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(proxy.config.name)
+            raise
+
+    monkeypatch.setattr(OpenaiAgentProxy, "_aquery", aquery)
+    wf = WorkflowFactory.create(
+        config=workflow(
+            [
+                agent("slow", outputs=("x",)),
+                agent("fail", outputs=("y",), resilience={"max_retries": 0}),
+            ]
+        )
+    )
+
+    with pytest.raises(RuntimeError, match="boom"):
+        run(wf.arun({"question": "q"}))
+    assert cancelled == ["slow"]
+
+
+def test_agent_proxies_must_implement_aquery():
+    class Incomplete(BaseAgentProxy):
+        def _init_client(self):
+            pass
+
+    with pytest.raises(TypeError, match="_aquery"):
+        Incomplete(BaseAgentProxyConfig(**agent("worker")))
+
+
+def test_gemini_clients_are_per_api_key():
+    pytest.importorskip("google.generativeai")
+    from config2llmworkflow.utils.factory import AgentProxyFactory
+
+    def proxy(api_key):
+        return AgentProxyFactory.create(
+            config={
+                "name": api_key,
+                "node_type": "agent",
+                "provider": "gemini",
+                "role": "r",
+                "prompt": "p",
+                "api_key": api_key,
+            }
+        )
+
+    async def clients():
+        proxies = [proxy("key-1"), proxy("key-2"), proxy("key-1")]
+        return [proxy.client._async_client for proxy in proxies]
+
+    first, second, again = get_executor().submit(clients()).result(timeout=30)
+    assert first is not second
+    assert first is again
+    get_client_registry().close()
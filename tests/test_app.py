@@ -0,0 +1,75 @@
+import pytest
+import streamlit as st
+import yaml
+from streamlit.testing.v1 import AppTest
+
+from config2llmworkflow.configs.logging.base import LoggingConfig
+from config2llmworkflow.utils.factory import AppFactory
+from config2llmworkflow.utils.log import configure_logging
+
+from tests.conftest import agent, workflow
+
+
+def streamlit_script(config_path):
+    import app
+
+    app.main(config_path=config_path)
+
+
+@pytest.fixture
+def config_path(tmp_path, monkeypatch):
+    # app.py 在启动时把日志写到工作目录下的 logs/
+    monkeypatch.chdir(tmp_path)
+    config = workflow([agent("worker", stream=False)])
+    config["input_vars"] = [
+        {"name": "question", "type": "str", "label": "问题", "component": "text_input"}
+    ]
+    path = tmp_path / "config.yaml"
+    app = {"name": "测试", "output": "答案：{answer}", "workflow": config}
+    path.write_text(yaml.safe_dump({"app": app}, allow_unicode=True), "utf-8")
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    yield str(path)
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    configure_logging(LoggingConfig(path=None))
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    created = []
+    create = AppFactory.create
+
+    def counting_create(*args, **kwargs):
+        created.append(kwargs)
+        return create(*args, **kwargs)
+
+    monkeypatch.setattr(AppFactory, "create", counting_create)
+    return created
+
+
+def session(config_path):
+    return AppTest.from_function(streamlit_script, args=(config_path,)).run()
+
+
+def test_app_is_built_once_across_reruns_and_sessions(config_path, builds):
+    first = session(config_path)
+    first.text_input[0].input("q").run()
+    second = session(config_path)
+
+    assert not first.exception and not second.exception
+    assert len(builds) == 1
+
+
+def test_results_survive_reruns(config_path, builds, fake_llm):
+    fake_llm("ok")
+    at = session(config_path)
+    at.text_input[0].input("q")
+    at.button[0].click().run()
+    assert "答案：ok" in [markdown.value for markdown in at.markdown]
+
+    # 其他控件触发的重跑仍然显示本会话的结果，其他会话看不到
+    at.text_input[0].input("another").run()
+    assert "答案：ok" in [markdown.value for markdown in at.markdown]
+    assert at.session_state["workflow_output"] == "答案：ok"
+    assert "workflow_output" not in session(config_path).session_state
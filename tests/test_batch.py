@@ -0,0 +1,93 @@
+import json
+
+import pytest
+import yaml
+
+from config2llmworkflow import batch
+from config2llmworkflow.app import base as app_base
+from config2llmworkflow.configs.logging.base import LoggingConfig
+from config2llmworkflow.utils.log import configure_logging
+
+from tests.conftest import agent, workflow
+
+
+@pytest.fixture
+def files(tmp_path):
+    def write(cases, logging=None, suffix=".jsonl"):
+        app = {"workflow": workflow([agent("worker")])}
+        if logging is not None:
+            app["logging"] = logging
+        config = tmp_path / "config.yaml"
+        config.write_text(yaml.safe_dump({"app": app}, allow_unicode=True), "utf-8")
+        cases_path = tmp_path / f"cases{suffix}"
+        if suffix == ".csv":
+            lines = ["question", *cases]
+        else:
+            lines = [json.dumps(case, ensure_ascii=False) for case in cases]
+        cases_path.write_text("\n".join(lines) + "\n", "utf-8")
+        return config, cases_path, tmp_path / "results.jsonl"
+
+    yield write
+    configure_logging(LoggingConfig(path=None))
+
+
+def run_batch(config, cases, output, *extra):
+    args = ["--config", str(config), "--input", str(cases), "--output", str(output)]
+    return batch.main([*args, *extra])
+
+
+def results(path):
+    return [json.loads(line) for line in path.read_text("utf-8").splitlines()]
+
+
+def test_cases_are_run_and_written_as_they_finish(fake_llm, files):
+    fake_llm(lambda messages: messages[-1]["content"].upper())
+    config, cases, output = files([{"question": "a"}, {"question": "b", "id": "x"}])
+
+    assert run_batch(config, cases, output, "--concurrency", "2") == 0
+
+    records = sorted(results(output), key=lambda record: record["index"])
+    assert [record["outputs"]["answer"] for record in records] == ["A", "B"]
+    assert [record["id"] for record in records] == [0, "x"]
+    assert all(record["llm_calls"] == 1 for record in records)
+
+
+def test_resume_skips_finished_cases(fake_llm, files):
+    llm = fake_llm("ok")
+    config, cases, output = files([{"question": "a"}, {"question": "b"}])
+    run_batch(config, cases, output, "--limit", "1")
+    assert len(llm.calls) == 1
+
+    run_batch(config, cases, output, "--resume")
+
+    assert len(llm.calls) == 2
+    assert sorted(record["index"] for record in results(output)) == [0, 1]
+
+
+def test_csv_cases_and_failures_are_reported(fake_llm, files):
+    fake_llm("ok")
+    config, cases, output = files(["a", "b,c"], suffix=".csv")
+
+    assert run_batch(config, cases, output) == 0
+    assert len(results(output)) == 2
+
+    config, cases, output = files([{"other": "a"}])
+    # 缺少输入变量的用例记录为失败，退出码为 1
+    assert run_batch(config, cases, output) == 1
+    assert results(output)[-1]["status"] == "error"
+
+
+def test_log_level_flag_overrides_the_config(fake_llm, files, monkeypatch):
+    fake_llm("ok")
+    applied = []
+    monkeypatch.setattr(batch, "configure_logging", applied.append)
+    monkeypatch.setattr(app_base, "configure_logging", applied.append)
+    config, cases, output = files(
+        [{"question": "a"}], logging={"level": "WARNING", "path": None}
+    )
+
+    run_batch(config, cases, output, "--log-level", "DEBUG")
+
+    assert applied[-1].level == "DEBUG"
+    assert applied[-1].path is None
+    assert any(config.level == "WARNING" for config in applied)
@@ -0,0 +1,86 @@
+import inspect
+import json
+
+import numpy as np
+import pytest
+
+from config2llmworkflow.agents.agent_tools import (
+    tool_name_to_func_map,
+    tool_name_to_schema_map,
+)
+from config2llmworkflow.nodes.context import RunContext
+from config2llmworkflow.utils.factory import WorkflowFactory
+
+from tests.conftest import agent, run, workflow
+from tests.test_tools import calls, tool_call
+
+TOOLS = [
+    "calculate_gap_requirements",
+    "calculate_space_requirements",
+    "calculate_spee_space",
+    "calculate_total_space_requirement",
+    "calculate_molar_space",
+]
+
+
+def scalar_values(result) -> dict:
+    # 标量版本把单位拼在字符串里，如 "3.8mm" 或 "3.8 mm"
+    if not isinstance(result, dict):
+        return {"spee_space_required": result}
+    return {key: float(value.removesuffix("mm")) for key, value in result.items()}
+
+
+@pytest.mark.parametrize("name", TOOLS)
+def test_batched_tools_match_the_scalar_tools(name):
+    scalar = tool_name_to_func_map[name]
+    batched = tool_name_to_func_map[f"{name}_batch"]
+    parameters = list(inspect.signature(scalar).parameters)
+    rng = np.random.default_rng(0)
+    arrays = {param: rng.uniform(-30, 30, size=50).round(3) for param in parameters}
+
+    result = batched(**arrays)
+
+    for index in range(50):
+        case = {param: float(values[index]) for param, values in arrays.items()}
+        expected = scalar_values(scalar(**case))
+        assert expected.keys() == set(result)
+        # 运算顺序与标量版本相同，结果逐位一致
+        assert {key: float(result[key][index]) for key in result} == expected
+    assert set(result.units.values()) == {"mm"}
+
+
+def test_scalar_arguments_are_broadcast():
+    batched = tool_name_to_func_map["calculate_spee_space_batch"]
+    result = batched(left_spee_depth=[1, 2, 3], right_spee_depth=1)
+
+    assert result["spee_space_required"].tolist() == [1.5, 2.0, 2.5]
+    with pytest.raises(ValueError):
+        batched(left_spee_depth=[1, 2, 3], right_spee_depth=[1, 2])
+
+
+def test_batch_schemas_take_arrays():
+    schema = tool_name_to_schema_map["calculate_spee_space_batch"]["function"]
+
+    assert schema["name"] == "calculate_spee_space_batch"
+    for prop in schema["parameters"]["properties"].values():
+        assert prop["type"] == "array"
+        assert prop["items"] == {"type": "number"}
+    # 生成批量 schema 时不修改标量工具的 schema
+    scalar = tool_name_to_schema_map["calculate_spee_space"]["function"]
+    assert scalar["parameters"]["properties"]["left_spee_depth"]["type"] == "number"
+
+
+def test_batch_results_are_sent_to_the_model_as_json(fake_llm):
+    arguments = {"left_spee_depth": [1, 3], "right_spee_depth": [2, 3]}
+    call = tool_call(0, name="calculate_spee_space_batch", **arguments)
+    llm = fake_llm(calls(call), "done")
+    node = agent("worker", tools=["calculate_spee_space_batch"])
+    wf = WorkflowFactory.create(config=workflow([node]))
+
+    outputs = run(RunContext().arun(wf, {"question": "q"}))
+
+    assert outputs["answer"] == "done"
+    assert json.loads(llm.calls[1][1][-1]["content"]) == {
+        "values": {"spee_space_required": [2.0, 3.5]},
+        "units": {"spee_space_required": "mm"},
+    }
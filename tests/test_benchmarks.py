@@ -0,0 +1,142 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from config2llmworkflow.nodes.context import RunContext
+from config2llmworkflow.utils.aio import run_sync
+from config2llmworkflow.utils.clients import get_client_registry
+from config2llmworkflow.utils.factory import WorkflowFactory
+from config2llmworkflow.utils.streaming import StreamEvent, arun_streaming
+
+from tests.conftest import agent, workflow
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.dirname(__file__)), "benchmarks")
+sys.path.insert(0, BENCHMARKS)
+
+from mock_llm import MockLLMServer, MockProfile  # noqa: E402
+
+
+@pytest.fixture
+def mock_server():
+    servers = []
+
+    def start(**profile):
+        servers.append(MockLLMServer(MockProfile(**profile)).start())
+        return servers[-1]
+
+    yield start
+    # 关闭客户端的长连接，模拟服务的处理线程随之退出，不会留到之后的用例中
+    get_client_registry().close()
+    for server in servers:
+        server.stop()
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline and any(
+        "process_request" in thread.name for thread in threading.enumerate()
+    ):
+        time.sleep(0.01)
+
+
+def mock_workflow(server, **config):
+    resilience = {"max_retries": 1, "retry_base_delay": 0.0}
+    node = agent("worker", base_url=server.base_url, resilience=resilience, **config)
+    return WorkflowFactory.create(config=workflow([node]))
+
+
+def test_workflows_run_against_the_mock_server(mock_server):
+    server = mock_server(completion_tokens=3)
+
+    outputs = mock_workflow(server, stream=False).run({"question": "q"})
+
+    assert outputs["answer"] == "tok0 tok1 tok2 "
+    assert server.stats()["requests"] == 1
+
+
+def test_mock_server_streams_tokens(mock_server):
+    server = mock_server(completion_tokens=3)
+    deltas = []
+
+    outputs = run_sync(
+        arun_streaming(
+            mock_workflow(server),
+            {"question": "q"},
+            lambda name, delta: deltas.append(delta),
+            RunContext(),
+        )
+    )
+
+    assert outputs["answer"] == "tok0 tok1 tok2 "
+    assert deltas[-1] is StreamEvent.DONE
+    assert "".join(deltas[:-1]) == outputs["answer"]
+
+
+def test_injected_errors_are_retried(mock_server):
+    server = mock_server(error_rate=1.0, error_statuses=[503])
+
+    with pytest.raises(Exception):
+        mock_workflow(server, stream=False).run({"question": "q"})
+
+    stats = server.stats()
+    assert stats["requests"] == stats["errors"] == 2
+
+
+def test_plans_are_reproducible_with_a_seed():
+    profile = MockProfile(latency_ms=100, distribution="lognormal", jitter=0.5, seed=7)
+    servers = [MockLLMServer(profile), MockLLMServer(profile)]
+    try:
+        plans = [[server.plan({}) for _ in range(5)] for server in servers]
+    finally:
+        for server in servers:
+            server.server_close()
+
+    assert [plan["ttft"] for plan in plans[0]] == [plan["ttft"] for plan in plans[1]]
+    assert len({plan["ttft"] for plan in plans[0]}) == 5
+
+
+def test_tool_calls_follow_the_tool_schema():
+    server = MockLLMServer(MockProfile(tool_call_rate=1.0, parallel_tool_calls=2))
+    tool = {
+        "type": "function",
+        "function": {
+            "name": "sum_floats",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "values": {"type": "array", "items": {"type": "number"}}
+                },
+                "required": ["values"],
+            },
+        },
+    }
+    try:
+        plan = server.plan({"tools": [tool], "messages": [{"role": "user"}]})
+        answered = server.plan({"tools": [tool], "messages": [{"role": "tool"}]})
+    finally:
+        server.server_close()
+
+    assert len(plan["tool_calls"]) == 2
+    arguments = json.loads(plan["tool_calls"][0]["function"]["arguments"])
+    assert arguments == {"values": [1.0, 1.0]}
+    # 收到工具结果后直接回答
+    assert answered["tool_calls"] == []
+
+
+def test_workflow_bench_reports_every_scenario(tmp_path):
+    output = tmp_path / "results.json"
+    args = ["--workflow", "default,loop", "--nodes", "2", "--layout", "chain"]
+    args += ["--concurrency", "1", "--runs", "2", "--warmup", "0", "--latency-ms", "0"]
+    subprocess.run(
+        [sys.executable, os.path.join(BENCHMARKS, "workflow_bench.py"), *args]
+        + ["--no-overhead", "--json", str(output)],
+        capture_output=True,
+        check=True,
+        timeout=120,
+    )
+
+    scenarios = json.loads(output.read_text("utf-8"))["scenarios"]
+    assert [row["workflow"] for row in scenarios] == ["default", "loop"]
+    assert all(row["errors"] == 0 for row in scenarios)
@@ -0,0 +1,72 @@
+from config2llmworkflow.nodes.context import RunContext
+from config2llmworkflow.utils.cache import bypass_cache_read, configure_cache
+from config2llmworkflow.utils.factory import WorkflowFactory
+
+from tests.conftest import agent, run, workflow
+
+
+def run_twice(**config):
+    wf = WorkflowFactory.create(config=workflow([agent("worker", **config)]))
+    contexts = [RunContext(), RunContext()]
+    outputs = [run(context.arun(wf, {"question": "q"})) for context in contexts]
+    calls = [context.logs(wf)["nodes"][0]["llm_calls"] for context in contexts]
+    return outputs, calls
+
+
+def test_deterministic_requests_are_answered_from_the_cache(fake_llm):
+    configure_cache({"enabled": True})
+    llm = fake_llm("first", "second")
+
+    outputs, calls = run_twice()
+
+    assert len(llm.calls) == 1
+    assert [output["answer"] for output in outputs] == ["first", "first"]
+    assert [call[0]["cached"] for call in calls] == [False, True]
+
+
+def test_sampled_requests_bypass_the_cache(fake_llm):
+    configure_cache({"enabled": True})
+    llm = fake_llm("first", "second")
+
+    outputs, _ = run_twice(temperature=0.7)
+
+    assert len(llm.calls) == 2
+    assert [output["answer"] for output in outputs] == ["first", "second"]
+
+
+def test_cache_can_be_disabled_per_agent(fake_llm):
+    configure_cache({"enabled": True})
+    llm = fake_llm("first", "second")
+
+    run_twice(cache=False)
+
+    assert len(llm.calls) == 2
+
+
+def test_bypassed_reads_refresh_the_cache(fake_llm):
+    configure_cache({"enabled": True})
+    llm = fake_llm("first", "second")
+    wf = WorkflowFactory.create(config=workflow([agent("worker")]))
+
+    run(wf.arun({"question": "q"}))
+    with bypass_cache_read():
+        refreshed = run(wf.arun({"question": "q"}))
+    cached = run(wf.arun({"question": "q"}))
+
+    assert len(llm.calls) == 2
+    assert refreshed["answer"] == cached["answer"] == "second"
+
+
+def test_disk_cache_survives_a_new_memory_tier(fake_llm, tmp_path):
+    config = {"enabled": True, "disk_path": str(tmp_path / "cache.sqlite")}
+    configure_cache(config)
+    llm = fake_llm("first", "second")
+    wf = WorkflowFactory.create(config=workflow([agent("worker")]))
+
+    run(wf.arun({"question": "q"}))
+    # 重新配置会丢弃内存中的条目，只剩磁盘上的缓存
+    configure_cache(config)
+    outputs = run(wf.arun({"question": "q"}))
+
+    assert len(llm.calls) == 1
+    assert outputs["answer"] == "first"
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from config2llmworkflow.utils.cassette import CassetteMiss, configure_cassette
+from config2llmworkflow.utils.factory import WorkflowFactory
+
+from tests.conftest import agent, run, workflow
+
+
+def offline(messages):
+    raise AssertionError("replay must not call the model")
+
+
+def create():
+    nodes = [
+        agent("a", outputs=("x",)),
+        agent("b", prompt="{x}", outputs=("answer",)),
+    ]
+    return WorkflowFactory.create(config=workflow(nodes))
+
+
+def test_recorded_runs_replay_without_calling_the_model(fake_llm, tmp_path):
+    path = tmp_path / "llm.jsonl"
+    fake_llm(lambda messages: messages[-1]["content"].upper() + "!")
+
+    configure_cassette({"mode": "record", "path": str(path)})
+    recorded = run(create().arun({"question": "q"}))
+    entries = [json.loads(line) for line in path.read_text("utf-8").splitlines()]
+    assert [entry["node"] for entry in entries] == ["a", "b"]
+
+    llm = fake_llm(offline)
+    configure_cassette({"mode": "replay", "path": str(path)})
+    replayed = run(create().arun({"question": "q"}))
+
+    assert replayed == recorded
+    assert recorded["answer"] == "Q!!"
+    assert llm.calls == []
+
+
+def test_replay_raises_on_unrecorded_requests(fake_llm, tmp_path):
+    path = tmp_path / "llm.jsonl"
+    fake_llm("ok")
+    configure_cassette({"mode": "record", "path": str(path)})
+    run(create().arun({"question": "q"}))
+
+    fake_llm(offline)
+    configure_cassette({"mode": "replay", "path": str(path)})
+    with pytest.raises(CassetteMiss) as error:
+        run(create().arun({"question": "other"}))
+    assert error.value.node == "a"
+
+
+def test_replay_or_record_fills_in_missing_requests(fake_llm, tmp_path):
+    path = tmp_path / "llm.jsonl"
+    llm = fake_llm(lambda messages: messages[-1]["content"].upper())
+    configure_cassette({"mode": "replay_or_record", "path": str(path)})
+
+    first = run(create().arun({"question": "q"}))
+    second = run(create().arun({"question": "q"}))
+
+    assert first == second
+    assert len(llm.calls) == 2
+    assert len(path.read_text("utf-8").splitlines()) == 2
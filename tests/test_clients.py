@@ -0,0 +1,71 @@
+import asyncio
+
+import google.ai.generativelanguage as glm
+import httpx
+import pytest
+
+from config2llmworkflow.configs.clients.base import ClientPoolConfig
+from config2llmworkflow.utils.clients import ClientRegistry
+
+
+@pytest.fixture
+def gemini_clients(monkeypatch):
+    created = []
+
+    class FakeClient:
+        def __init__(self, client_options):
+            created.append(client_options)
+
+    monkeypatch.setattr(glm, "GenerativeServiceAsyncClient", FakeClient)
+    return created
+
+
+def test_clients_are_shared_per_key_within_a_loop(gemini_clients):
+    registry = ClientRegistry()
+
+    async def clients():
+        return [
+            registry.get("gemini", None, "k1"),
+            registry.get("gemini", None, "k1"),
+            registry.get("gemini", None, "k2"),
+        ]
+
+    first, same, other = asyncio.run(clients())
+    again, _, _ = asyncio.run(clients())
+
+    assert first is same
+    assert first is not other
+    # 异步客户端绑定事件循环，新的事件循环中会重新创建
+    assert again is not first
+    assert gemini_clients[:2] == [{"api_key": "k1"}, {"api_key": "k2"}]
+
+
+def test_gemini_clients_fall_back_to_environment_keys(gemini_clients, monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.setenv("GOOGLE_API_KEY", "env-key")
+
+    async def build():
+        return ClientRegistry().get("gemini")
+
+    asyncio.run(build())
+
+    assert gemini_clients == [{"api_key": "env-key"}]
+
+
+def test_openai_clients_use_the_pool_settings():
+    config = ClientPoolConfig(max_connections=3, timeout=7)
+    registry = ClientRegistry(config)
+
+    async def build():
+        return registry.get("openai", "http://localhost:1/v1", "key")
+
+    client = asyncio.run(build())
+
+    assert client.max_retries == 0
+    assert client.timeout == httpx.Timeout(7)
+    assert str(client.base_url) == "http://localhost:1/v1/"
+
+
+def test_unknown_providers_are_rejected():
+    with pytest.raises(ValueError, match="Unsupported client provider"):
+        ClientRegistry().get("unknown")
@@ -0,0 +1,79 @@
+import asyncio
+
+from config2llmworkflow.nodes.context import RunContext, current_run
+from config2llmworkflow.utils.factory import AgentProxyFactory, WorkflowFactory
+
+from tests.conftest import agent, run, workflow
+
+
+def visible_variables(workflow_node):
+    # 假模型在运行中读取工作流当前的变量名，作为回答
+    return lambda messages: ",".join(sorted(workflow_node.variables))
+
+
+def test_top_level_runs_start_from_a_fresh_context(fake_llm):
+    wf = WorkflowFactory.create(config=workflow([agent("worker")]))
+    llm = fake_llm(visible_variables(wf))
+
+    async def main():
+        # 运行之外的读写不会保存下来，也不会被之后的运行沿用
+        wf.variables["stale"] = "x"
+        assert wf.variables == {}
+        first = await wf.arun({"question": "q", "extra": "e"})
+        second = await wf.arun({"question": "q"})
+        return first, second
+
+    first, second = run(main())
+    assert first["answer"] == "extra,question"
+    assert second["answer"] == "question"
+    assert len(llm.calls) == 2
+
+
+def test_current_run_outside_a_run_is_not_stored():
+    async def main():
+        assert current_run() is not current_run()
+
+    run(main())
+
+
+def test_concurrent_runs_keep_separate_state(fake_llm):
+    wf = WorkflowFactory.create(config=workflow([agent("worker")]))
+    fake_llm(lambda messages: messages[-1]["content"].upper())
+    contexts = [RunContext(), RunContext()]
+
+    async def main():
+        return await asyncio.gather(
+            contexts[0].arun(wf, {"question": "a"}),
+            contexts[1].arun(wf, {"question": "b"}),
+        )
+
+    outputs = run(main())
+    assert [output["answer"] for output in outputs] == ["A", "B"]
+    replies = [context.logs(wf)["nodes"][0]["messages"][-1] for context in contexts]
+    assert [reply["content"] for reply in replies] == ["A", "B"]
+
+
+def test_nested_workflows_share_the_run_context(fake_llm):
+    fake_llm("inner answer")
+    inner = workflow(
+        [agent("worker")],
+        name="inner",
+        output_vars=[{"name": "answer", "type": "str"}],
+    )
+    outer = WorkflowFactory.create(config=workflow([inner], name="outer"))
+    context = RunContext()
+
+    outputs = run(context.arun(outer, {"question": "q"}))
+
+    assert outputs["answer"] == "inner answer"
+    inner_logs = context.logs(outer)["nodes"][0]
+    assert inner_logs["nodes"][0]["messages"][-1]["content"] == "inner answer"
+
+
+def test_agents_can_run_outside_a_workflow(fake_llm):
+    fake_llm("ok")
+    node = AgentProxyFactory.create(config=agent("worker"))
+
+    assert run(node.arun({"question": "q"}))["answer"] == "ok"
+    # 这次调用的状态随调用结束丢弃
+    assert node.answer == {}
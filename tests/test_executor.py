@@ -0,0 +1,111 @@
+import asyncio
+import collections
+import threading
+
+import pytest
+
+from config2llmworkflow.agents.openai_agent_proxy import OpenaiAgentProxy
+from config2llmworkflow.configs.executor.base import ExecutorConfig
+from config2llmworkflow.utils.executor import ConcurrencyLimiter, get_executor
+from config2llmworkflow.utils.factory import WorkflowFactory
+
+from tests.conftest import agent, workflow
+
+
+@pytest.fixture
+def executor():
+    executor = get_executor()
+    yield executor
+    executor.configure(ExecutorConfig())
+
+
+@pytest.fixture
+def slow_llm(monkeypatch):
+    """记录每个 base_url 及全部（键为 None）同时进行的请求数峰值，以及请求运行所在的线程"""
+    active = collections.Counter()
+    peaks = collections.Counter()
+    threads = []
+
+    async def aquery(proxy, messages):
+        keys = (proxy.config.base_url, None)
+        for key in keys:
+            active[key] += 1
+            peaks[key] = max(peaks[key], active[key])
+        threads.append(threading.current_thread().name)
+        await asyncio.sleep(0.02)
+        for key in keys:
+            active[key] -= 1
+        return {"content": "ok", "tool_calls": [], "usage": {}}
+
+    monkeypatch.setattr(OpenaiAgentProxy, "_aquery", aquery)
+    return peaks, threads
+
+
+def parallel_agents(count, prefix="worker", **config):
+    return [
+        agent(f"{prefix}{i}", outputs=(f"{prefix}_answer{i}",), **config)
+        for i in range(count)
+    ]
+
+
+def test_provider_and_base_url_limits_cap_parallel_calls(executor, slow_llm):
+    peaks, _ = slow_llm
+    executor.configure(
+        ExecutorConfig(
+            provider_limits={"openai": 3},
+            base_url_limits={"http://llm.test/v1": 1},
+        )
+    )
+    nodes = parallel_agents(3) + parallel_agents(
+        3, prefix="other", base_url="http://other.test/v1"
+    )
+
+    WorkflowFactory.create(config=workflow(nodes)).run({"question": "q"})
+
+    assert peaks["http://llm.test/v1"] == 1
+    assert peaks["http://other.test/v1"] >= 2
+    assert peaks[None] == 3
+
+
+def test_nested_workflows_do_not_hold_slots(executor, slow_llm):
+    _, threads = slow_llm
+    executor.configure(ExecutorConfig(max_concurrency=1))
+    inner = workflow(
+        parallel_agents(2),
+        name="inner",
+        output_vars=[{"name": "worker_answer0", "type": "str"}],
+    )
+    outer = workflow([inner, agent("outer", outputs=("summary",))])
+
+    outputs = WorkflowFactory.create(config=outer).run({"question": "q"})
+
+    assert outputs["worker_answer0"] == outputs["summary"] == "ok"
+    # 同步 run 都提交到共享执行器的后台事件循环
+    assert set(threads) == {"config2llmworkflow-loop"}
+
+
+def test_limiter_is_shared_across_event_loops():
+    limiter = ConcurrencyLimiter(1)
+    active, peak = [0], [0]
+
+    async def call():
+        await limiter.acquire()
+        try:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await asyncio.sleep(0.01)
+            active[0] -= 1
+        finally:
+            limiter.release()
+
+    async def calls():
+        await asyncio.gather(*(call() for _ in range(3)))
+
+    threads = [threading.Thread(target=asyncio.run, args=(calls(),)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak[0] == 1
+    assert limiter.active == 0 and limiter.waiting == 0
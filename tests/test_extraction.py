@@ -0,0 +1,137 @@
+import pytest
+
+from config2llmworkflow.configs.nodes.base import OutputVariableConfig
+from config2llmworkflow.nodes.context import RunContext
+from config2llmworkflow.utils.extraction import ExtractionError, Extractor
+from config2llmworkflow.utils.factory import WorkflowFactory
+
+from tests.conftest import agent, run, workflow
+
+PAIRS = r'\s*["]*(\w+)["]*:\s*["]*([-+]?\d+\.?\d*)["]*'
+
+
+def extractor(*fields, **config) -> Extractor:
+    return Extractor(
+        OutputVariableConfig(
+            name="summary",
+            type="str",
+            extract={"pattern": PAIRS, "json_path": "", "fields": fields, **config},
+        )
+    )
+
+
+@pytest.mark.parametrize(
+    "field_type, text, expected",
+    [
+        ("int", '"n": 3', 3),
+        ("int", '"n": 3.0', 3),
+        ("int", '{"n": 4}', 4),
+        ("float", '"n": -2.5', -2.5),
+        ("str", '"n": 7', "7"),
+        ("bool", '{"n": false}', False),
+    ],
+)
+def test_fields_are_coerced_to_their_type(field_type, text, expected):
+    result = extractor({"name": "n", "type": field_type}).extract("node", text)
+    assert result["n"] == expected
+    assert type(result["n"]) is type(expected)
+
+
+def test_non_integral_values_are_rejected_for_int_fields():
+    with pytest.raises(ExtractionError, match="not an integer"):
+        extractor({"name": "n", "type": "int"}).extract("node", '"n": 3.7')
+
+
+def test_json_path_reads_the_first_json_object():
+    json_only = Extractor(
+        OutputVariableConfig(
+            name="summary",
+            type="str",
+            extract={"json_path": "data", "fields": [{"name": "A1", "type": "float"}]},
+        )
+    )
+    assert json_only.extract("node", 'see {"data": {"A1": "1.5"}}') == {"A1": 1.5}
+
+
+def test_missing_fields_use_defaults_or_fail():
+    assert extractor({"name": "E2", "type": "float", "default": 0}).extract(
+        "node", '"A1": 1'
+    ) == {"A1": "1", "E2": 0.0}
+    with pytest.raises(ExtractionError, match="missing fields"):
+        extractor({"name": "E2", "type": "float"}).extract("node", '"A1": 1')
+
+
+def test_nothing_matched_fails():
+    with pytest.raises(ExtractionError, match="nothing matched"):
+        extractor({"name": "n", "type": "int"}).extract("node", "no numbers here")
+
+
+def extracting_agent(name: str, output: str, *fields, **config):
+    return agent(
+        name,
+        output_vars=[
+            {
+                "name": output,
+                "type": "str",
+                "extract": {"pattern": PAIRS, "fields": fields, **config},
+            }
+        ],
+    )
+
+
+def run_workflow(config) -> dict:
+    workflow_node = WorkflowFactory.create(config=config)
+    return run(RunContext().arun(workflow_node, {"question": "q"}))
+
+
+def test_failing_node_is_requeried_within_retries(fake_llm):
+    llm = fake_llm("no numbers", '"n": 2')
+    node = extracting_agent("counter", "answer", {"name": "n", "type": "int"})
+    outputs = run_workflow(workflow([node]))
+    assert outputs["n"] == 2
+    assert len(llm.calls) == 2
+
+
+def test_computed_vars_can_append_to_summary_text(fake_llm):
+    # 兼容旧配置：派生量追加到 summary 文本后，下游节点仍从文本中读取
+    llm = fake_llm('"a": 1, "b": 2', "done")
+    source = extracting_agent(
+        "source",
+        "summary_2",
+        {"name": "a", "type": "float"},
+        {"name": "b", "type": "float"},
+        retries=0,
+    )
+    reader = agent("reader", "{summary_2}", priority=2)
+    config = workflow(
+        [source, reader],
+        computed_vars=[
+            {"name": "total", "expression": "a + b", "append_to": "summary_2"},
+            {"name": "double", "expression": "2 * a", "append_to": "summary_2"},
+        ],
+    )
+    run_workflow(config)
+    prompt = llm.calls[-1][1][-1]["content"]
+    assert prompt == "\"a\": 1, \"b\": 2{'total': 3.0}{'double': 2.0}"
+
+
+def test_computed_vars_run_after_their_producers(fake_llm):
+    fake_llm('"a": 1, "b": 2')
+    source = extracting_agent(
+        "source", "summary", {"name": "a", "type": "float"}, {"name": "b", "type": "float"}
+    )
+    wf = WorkflowFactory.create(
+        config=workflow(
+            [{**source, "priority": 3}],
+            computed_vars=[
+                {"name": "total", "expression": "a + b"},
+                {"name": "late", "expression": "a", "priority": 5},
+            ],
+        )
+    )
+    priorities = {node.config.name: node.config.priority for node in wf.nodes}
+
+    # 未配置优先级的派生量与其最晚的上游相同，显式配置的保持不变
+    assert priorities["computed:total"] == 3
+    assert priorities["computed:late"] == 5
+    assert run(RunContext().arun(wf, {"question": "q"}))["total"] == 3.0
@@ -0,0 +1,67 @@
+from config2llmworkflow.utils.factory import WorkflowFactory
+
+from tests.conftest import agent, workflow
+
+
+def test_agents_fall_back_to_global_agent_settings():
+    wf = WorkflowFactory.create(
+        config=workflow(
+            [agent("worker", temperature=0.0, resilience={"rpm_limit": 10})],
+            global_agent={
+                "model": "global-model",
+                "temperature": 0.5,
+                "tool_timeout": 5,
+                "resilience": {"max_retries": 0},
+                "history": {"keep_last": 2},
+            },
+        )
+    )
+    config = wf.nodes[0].config
+
+    assert config.model == "global-model"
+    assert config.tool_timeout == 5
+    assert config.history.keep_last == 2
+    # 节点自己的设置优先，嵌套设置按字段合并
+    assert config.temperature == 0.0
+    assert config.resilience.rpm_limit == 10
+    assert config.resilience.max_retries == 0
+
+
+def test_unset_global_fields_keep_agent_defaults():
+    wf = WorkflowFactory.create(
+        config=workflow([agent("worker", model="own")], global_agent={"cache": False})
+    )
+    config = wf.nodes[0].config
+
+    assert config.model == "own"
+    assert config.cache is False
+    assert config.resilience.max_retries == 3
+
+
+def test_nested_workflows_and_watchdogs_inherit_global_settings():
+    inner = workflow(
+        [agent("inner_worker")],
+        name="inner",
+        global_agent={"temperature": 0.3},
+    )
+    loop = workflow(
+        [agent("loop_worker")],
+        name="loop",
+        provider="loop",
+        node_type="workflow",
+        end_condition="True",
+        watchdog_agent=agent("watchdog", "{answer}", outputs=("done",)),
+    )
+    wf = WorkflowFactory.create(
+        config=workflow(
+            [inner, loop],
+            global_agent={"model": "global-model", "temperature": 0.7},
+        )
+    )
+    inner_config = wf.nodes[0].nodes[0].config
+    loop_node = wf.nodes[1]
+
+    assert inner_config.model == "global-model"
+    assert inner_config.temperature == 0.3
+    assert loop_node.nodes[0].config.temperature == 0.7
+    assert loop_node.watchdog_agent.config.model == "global-model"
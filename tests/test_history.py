@@ -0,0 +1,69 @@
+import pytest
+
+from config2llmworkflow.configs.agents.base import HistoryConfig
+from config2llmworkflow.nodes.context import RunContext
+from config2llmworkflow.utils.factory import WorkflowFactory
+from config2llmworkflow.utils.history import PromptTooLongError, fit_history
+from config2llmworkflow.utils.tokens import context_window
+
+from tests.conftest import agent, run, workflow
+
+
+def conversation(turns: int, size: int = 300):
+    messages = [
+        {"role": "system", "content": "system"},
+        {"role": "user", "content": "task"},
+    ]
+    for turn in range(turns):
+        messages.append({"role": "assistant", "content": f"{turn} " + "a" * size})
+        messages.append({"role": "user", "content": f"{turn} " + "u" * size})
+    return messages
+
+
+@pytest.mark.parametrize(
+    "model, window",
+    [
+        ("gpt-4", 8192),
+        ("gpt-4-turbo-2024-04-09", 128000),
+        ("gpt-4o-mini", 128000),
+        ("deepseek/deepseek-chat", 131072),
+        ("my-local-model", None),
+        (None, None),
+    ],
+)
+def test_context_window_matches_the_longest_prefix(model, window):
+    assert context_window(model) == window
+
+
+def test_keep_last_keeps_the_task_and_recent_messages():
+    messages = conversation(5)
+    sent = fit_history(messages, HistoryConfig(keep_last=2, max_prompt_tokens=None))
+    assert sent[:2] == messages[:2]
+    assert sent[2]["content"] == "[已省略较早的 8 条消息]"
+    assert sent[3:] == messages[-2:]
+
+
+def test_budget_defaults_to_the_context_window_minus_completion_tokens():
+    messages = conversation(5)
+    config = HistoryConfig(keep_last=None)
+    # 未知模型不限制
+    assert fit_history(messages, config, "my-local-model", 8000) == messages
+    # gpt-4 的上下文窗口是 8192，留给 prompt 的只有 192
+    sent = fit_history(messages, config, "gpt-4", 8000)
+    assert len(sent) < len(messages)
+    assert sent[-1] == messages[-1]
+
+
+def test_prompt_that_cannot_fit_raises():
+    messages = conversation(1, size=3000)
+    with pytest.raises(PromptTooLongError, match="budget"):
+        fit_history(messages, HistoryConfig(max_prompt_tokens=100))
+
+
+def test_oversized_prompt_is_not_sent(fake_llm):
+    llm = fake_llm("ok")
+    node = agent("worker", model="gpt-4", token_limit=8000)
+    wf = WorkflowFactory.create(config=workflow([node]))
+    with pytest.raises(PromptTooLongError):
+        run(RunContext().arun(wf, {"question": "q" * 10000}))
+    assert llm.calls == []
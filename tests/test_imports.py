@@ -0,0 +1,65 @@
+import json
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+import config2llmworkflow.agents as agents
+from config2llmworkflow.agents.agent_tools import LazyRegistry
+
+from tests.conftest import agent, workflow
+
+HEAVY_MODULES = [
+    "streamlit",
+    "litellm",
+    "google.generativeai",
+    "together",
+    "GeneralAgent",
+]
+
+
+def loaded_modules(code: str) -> list:
+    """在新的解释器中运行代码，返回其中已导入的重量级模块"""
+    script = textwrap.dedent(code) + textwrap.dedent(
+        f"""
+        import json, sys
+        print(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))
+        """
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_building_an_openai_workflow_skips_other_sdks():
+    config = workflow([agent("worker")])
+    code = f"""
+        from config2llmworkflow.utils.factory import WorkflowFactory
+        WorkflowFactory.create(config={config!r})
+    """
+    assert loaded_modules(code) == []
+
+
+def test_package_import_does_not_load_streamlit():
+    assert loaded_modules("import config2llmworkflow, config2llmworkflow.agents") == []
+
+
+def test_proxy_classes_resolve_on_first_access():
+    from config2llmworkflow.agents.openai_agent_proxy import OpenaiAgentProxy
+
+    assert agents.OpenaiAgentProxy is OpenaiAgentProxy
+    assert "GeminiAgentProxy" in dir(agents)
+    with pytest.raises(AttributeError, match="MissingProxy"):
+        agents.MissingProxy
+
+
+def test_lazy_registry_imports_on_lookup():
+    registry = LazyRegistry({"dumps": "json.dumps"})
+
+    assert "dumps" in registry and "loads" not in registry
+    assert list(registry) == ["dumps"] and len(registry) == 1
+    assert registry["dumps"] is json.dumps
+    with pytest.raises(KeyError):
+        registry["loads"]
@@ -0,0 +1,91 @@
+import pytest
+
+from config2llmworkflow.configs.interpreter.base import InterpreterConfig
+from config2llmworkflow.utils.python_interpreter import InterpreterPool, cacheable
+
+
+@pytest.fixture
+def pool():
+    config = InterpreterConfig(
+        pool_size=1, timeout=5, preload_modules=["math", "json", "os", "numpy"]
+    )
+    pool = InterpreterPool(config)
+    yield pool
+    pool.close()
+
+
+def worker_pid(pool: InterpreterPool) -> int:
+    return int(pool.execute("import os; print(os.getpid())")["stdout"])
+
+
+def test_cwd_and_environment_are_restored_between_jobs(pool, tmp_path):
+    pool.execute(f"import os; os.chdir({str(tmp_path)!r}); os.environ['LEAK'] = '1'")
+    code = f"import os; print(os.getcwd() != {str(tmp_path)!r}, 'LEAK' in os.environ)"
+    result = pool.execute(code)
+    assert result["stdout"].split() == ["True", "False"]
+
+
+@pytest.mark.parametrize("module", ["random", "numpy.random"])
+def test_random_state_is_reseeded_between_jobs(pool, module):
+    seeded = pool.execute(
+        f"import {module}; {module}.seed(0); print({module}.random())"
+    )
+    after = pool.execute(f"import {module}; print({module}.random())")
+    assert after["stdout"] != seeded["stdout"]
+
+
+def test_worker_is_recycled_after_importing_new_modules(pool):
+    pid = worker_pid(pool)
+    assert worker_pid(pool) == pid
+    pool.execute("import xml.dom.minidom")
+    assert worker_pid(pool) != pid
+
+
+def test_worker_is_recycled_after_patching_preloaded_modules(pool):
+    pid = worker_pid(pool)
+    pool.execute("import math; math.pi = 3")
+    assert worker_pid(pool) != pid
+    assert pool.execute("import math; print(math.pi)")["stdout"].startswith("3.14")
+
+
+def test_timeout_returns_an_error_and_replaces_the_worker(pool):
+    pool.config = pool.config.model_copy(update={"timeout": 0.5})
+    pid = worker_pid(pool)
+    result = pool.execute("while True: pass")
+    assert not result["ok"] and "timed out" in result["stderr"]
+    assert pool.execute("print(1 + 1)")["stdout"].strip() == "2"
+    assert worker_pid(pool) != pid
+
+
+def test_worker_is_recycled_after_max_jobs(pool):
+    pool.config = pool.config.model_copy(update={"max_jobs_per_worker": 2})
+    pid = worker_pid(pool)
+    assert worker_pid(pool) == pid
+    assert worker_pid(pool) != pid
+
+
+def test_time_dependent_code_is_not_cached(pool):
+    code = "import time; print(time.time())"
+    assert pool.execute(code)["stdout"] != pool.execute(code)["stdout"]
+
+
+def test_cached_results_are_copies(pool):
+    first = pool.execute("print(42)")
+    first["stdout"] = "changed"
+    assert pool.execute("print(42)")["stdout"].strip() == "42"
+
+
+@pytest.mark.parametrize(
+    "code, expected",
+    [
+        ("print(sum(range(10)))", True),
+        ("import math\nprint(math.sqrt(2))", True),
+        ("import time\nprint(time.time())", False),
+        ("from datetime import datetime\nprint(datetime.now())", False),
+        ("print(numpy.random.rand())", False),
+        ("print(open('data.csv').read())", False),
+        ("import os.path\nprint(os.path.exists('x'))", False),
+    ],
+)
+def test_cacheable(code, expected):
+    assert cacheable(code) is expected
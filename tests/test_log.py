@@ -0,0 +1,53 @@
+import json
+
+import pytest
+from loguru import logger
+
+from config2llmworkflow.configs.agents.base import BaseAgentProxyConfig
+from config2llmworkflow.configs.logging.base import LoggingConfig
+from config2llmworkflow.utils.log import configure_logging, payload
+
+from tests.conftest import agent
+
+
+def test_secret_fields_are_masked_in_dicts_and_configs():
+    text = str(
+        payload(
+            {
+                "api_key": "sk-secret",
+                "headers": [{"Authorization": "Bearer secret"}],
+                "max_tokens": 3,
+                "node": BaseAgentProxyConfig(**agent("worker", api_key="sk-secret")),
+            }
+        )
+    )
+    assert "secret" not in text
+    assert "'max_tokens': 3" in text
+    assert "'name': 'worker'" in text
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "name='worker' api_key='sk-secret' base_url='http://llm.test/v1'",
+        '{"name": "worker", "API_KEY": "sk-secret"}',
+        'password="sk-\\"secret"',
+    ],
+)
+def test_secret_fields_are_masked_in_text(text):
+    rendered = str(payload(text))
+    assert "secret" not in rendered
+    assert "***" in rendered
+
+
+def test_log_file_does_not_contain_secrets(tmp_path):
+    path = tmp_path / "app.jsonl"
+    configure_logging(LoggingConfig(console=False, path=str(path), enqueue=False))
+    try:
+        config = BaseAgentProxyConfig(**agent("worker", api_key="sk-secret"))
+        logger.info("🔨[Workflow]Creating node: {}", payload(config))
+    finally:
+        configure_logging(LoggingConfig(path=None))
+    records = [json.loads(line) for line in path.read_text("utf-8").splitlines()]
+    assert any("Creating node" in record["text"] for record in records)
+    assert "sk-secret" not in path.read_text("utf-8")
@@ -0,0 +1,41 @@
+from config2llmworkflow.nodes.context import RunContext
+from config2llmworkflow.utils.factory import WorkflowFactory
+
+from tests.conftest import agent, run, workflow
+
+
+def loop_workflow(temperature: float, **config):
+    return WorkflowFactory.create(
+        config=workflow(
+            [agent("worker", temperature=temperature)],
+            provider="loop",
+            node_type="loop",
+            end_condition="{done} == 1",
+            max_loops=2,
+            watchdog_agent=agent("watchdog", "{answer}", outputs=("done",)),
+            **config,
+        )
+    )
+
+
+def worker_calls(llm) -> int:
+    return sum(name == "worker" for name, _ in llm.calls)
+
+
+def test_deterministic_nodes_are_reused_between_iterations(fake_llm):
+    llm = fake_llm("0")
+    run(RunContext().arun(loop_workflow(0.0), {"question": "q"}))
+    assert worker_calls(llm) == 1
+
+
+def test_sampling_nodes_rerun_every_iteration(fake_llm):
+    # 输入不变时温度大于 0 的节点也要重新运行，否则“重试直到通过”的循环只会重复同一个结果
+    llm = fake_llm("0")
+    run(RunContext().arun(loop_workflow(0.7), {"question": "q"}))
+    assert worker_calls(llm) == 3
+
+
+def test_incremental_can_be_disabled(fake_llm):
+    llm = fake_llm("0")
+    run(RunContext().arun(loop_workflow(0.0, incremental=False), {"question": "q"}))
+    assert worker_calls(llm) == 3
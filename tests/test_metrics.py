@@ -0,0 +1,68 @@
+from config2llmworkflow.nodes.context import RunContext
+from config2llmworkflow.utils.factory import WorkflowFactory
+from config2llmworkflow.utils.metrics import MetricsRegistry, run_metrics
+
+from tests.conftest import agent, run, workflow
+from tests.test_loop import loop_workflow
+
+
+def metrics_of(wf, inputs=None):
+    context = RunContext()
+    run(context.arun(wf, inputs or {"question": "q"}))
+    return run_metrics(context.logs(wf))
+
+
+def test_loop_iterations_keep_every_llm_call(fake_llm):
+    llm = fake_llm("0")
+    metrics = metrics_of(loop_workflow(0.7))
+
+    # 三轮循环中 worker 和 watchdog 各调用三次，之前的调用不会被下一轮覆盖
+    assert len(llm.calls) == 6
+    assert metrics["total"]["llm_calls"] == 6
+    assert metrics["total"]["prompt_tokens"] == 6
+    assert metrics["nodes"]["worker"]["llm_calls"] == 3
+    assert metrics["nodes"]["watchdog"]["llm_calls"] == 3
+
+
+def test_extraction_retries_are_counted(fake_llm):
+    llm = fake_llm("no numbers", '"n": 2')
+    node = agent(
+        "counter",
+        output_vars=[
+            {
+                "name": "answer",
+                "type": "str",
+                "extract": {
+                    "pattern": r'"(\w+)"\s*:\s*(\S+)',
+                    "fields": [{"name": "n", "type": "int"}],
+                },
+            }
+        ],
+    )
+    metrics = metrics_of(WorkflowFactory.create(config=workflow([node])))
+
+    assert len(llm.calls) == 2
+    assert metrics["nodes"]["counter"]["llm_calls"] == 2
+    assert metrics["total"]["completion_tokens"] == 2
+
+
+def test_registry_renders_calls_as_prometheus_text():
+    registry = MetricsRegistry()
+    call = {
+        "cached": False,
+        "usage": {"prompt_tokens": 5, "completion_tokens": 2},
+        "latency_s": 0.2,
+        "queue_wait_s": 0.0,
+        "retries": 1,
+    }
+    registry.record_llm_call("worker", "gpt", call)
+    registry.record_llm_call("worker", "gpt", {**call, "cached": True})
+
+    lines = registry.render_prometheus().splitlines()
+    labels = 'model="gpt",node="worker"'
+    # 命中缓存的调用只计数，不计入用量和耗时
+    assert f'config2llmworkflow_llm_calls_total{{cached="false",{labels}}} 1' in lines
+    assert f'config2llmworkflow_llm_calls_total{{cached="true",{labels}}} 1' in lines
+    assert f'config2llmworkflow_llm_tokens_total{{kind="prompt",{labels}}} 5' in lines
+    assert f"config2llmworkflow_llm_retries_total{{{labels}}} 1" in lines
+    assert f"config2llmworkflow_llm_call_seconds_count{{{labels}}} 1" in lines
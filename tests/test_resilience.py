@@ -0,0 +1,168 @@
+import asyncio
+
+import pytest
+
+from config2llmworkflow.configs.agents.base import ResilienceConfig
+from config2llmworkflow.utils.resilience import (
+    AdaptiveLimiter,
+    CircuitOpenError,
+    EndpointGuard,
+)
+
+from tests.conftest import run
+
+
+class ServerError(Exception):
+    status_code = 503
+
+
+def guard(**config) -> EndpointGuard:
+    settings = {
+        "max_retries": 0,
+        "circuit_failure_threshold": 2,
+        "circuit_reset_timeout": 0.05,
+        **config,
+    }
+    return EndpointGuard("test", ResilienceConfig(**settings))
+
+
+async def fail():
+    raise ServerError("unavailable")
+
+
+async def succeed():
+    return {"content": "ok"}
+
+
+async def open_circuit(endpoint: EndpointGuard) -> None:
+    for _ in range(endpoint.config.circuit_failure_threshold):
+        with pytest.raises(ServerError):
+            await endpoint.call(fail)
+
+
+def test_circuit_opens_after_consecutive_failures():
+    async def main():
+        endpoint = guard()
+        await open_circuit(endpoint)
+        assert endpoint.breaker.state == "open"
+        with pytest.raises(CircuitOpenError):
+            await endpoint.call(succeed)
+
+    run(main())
+
+
+def test_successful_trial_closes_the_circuit():
+    async def main():
+        endpoint = guard()
+        await open_circuit(endpoint)
+        await asyncio.sleep(0.06)
+        assert endpoint.breaker.state == "half_open"
+        assert await endpoint.call(succeed) == {"content": "ok"}
+        assert endpoint.breaker.state == "closed"
+
+    run(main())
+
+
+def test_failed_trial_reopens_the_circuit():
+    async def main():
+        endpoint = guard()
+        await open_circuit(endpoint)
+        await asyncio.sleep(0.06)
+        with pytest.raises(ServerError):
+            await endpoint.call(fail)
+        assert endpoint.breaker.state == "open"
+
+    run(main())
+
+
+def test_only_one_trial_runs_while_half_open():
+    async def main():
+        endpoint = guard()
+        await open_circuit(endpoint)
+        await asyncio.sleep(0.06)
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+            return {"content": "ok"}
+
+        trial = asyncio.ensure_future(endpoint.call(slow))
+        await asyncio.sleep(0)
+        with pytest.raises(CircuitOpenError):
+            await endpoint.call(succeed)
+        release.set()
+        await trial
+        assert endpoint.breaker.state == "closed"
+
+    run(main())
+
+
+def test_cancelled_trial_keeps_the_circuit_half_open():
+    async def main():
+        endpoint = guard()
+        await open_circuit(endpoint)
+        await asyncio.sleep(0.06)
+
+        trial = asyncio.ensure_future(endpoint.call(asyncio.Event().wait))
+        await asyncio.sleep(0)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+        # 被取消的试探不计为成功，下一个请求可以再次试探
+        assert endpoint.breaker.state == "half_open"
+        assert not endpoint.breaker.trial_in_flight
+        assert await endpoint.call(succeed) == {"content": "ok"}
+        assert endpoint.breaker.state == "closed"
+
+    run(main())
+
+
+def test_overload_lowers_concurrency_under_load():
+    async def main():
+        adaptive = AdaptiveLimiter(8)
+        resized = asyncio.Event()
+        running = 0
+        peaks = []
+
+        async def worker():
+            nonlocal running
+            await adaptive.limiter.acquire()
+            running += 1
+            if resized.is_set():
+                peaks.append(running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            adaptive.limiter.release()
+
+        tasks = [asyncio.ensure_future(worker()) for _ in range(24)]
+        await asyncio.sleep(0)
+        assert running == 8
+        adaptive.on_overload()
+        adaptive.on_overload()
+        resized.set()
+        await asyncio.gather(*tasks)
+
+        # 减半之后释放的名额不再直接转交，直到占用数降到新的上限
+        assert adaptive.limiter.limit == 2
+        assert peaks and max(peaks) <= 2
+        assert adaptive.limiter.active == 0
+
+    run(main())
+
+
+def test_client_errors_do_not_open_the_circuit():
+    class BadRequest(Exception):
+        status_code = 400
+
+    async def bad_request():
+        raise BadRequest("invalid")
+
+    async def main():
+        endpoint = guard()
+        for _ in range(3):
+            with pytest.raises(BadRequest):
+                await endpoint.call(bad_request)
+        assert endpoint.breaker.state == "closed"
+
+    run(main())
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from config2llmworkflow.agents.openai_agent_proxy import OpenaiAgentProxy
+from config2llmworkflow.utils.factory import WorkflowFactory
+
+from tests.conftest import agent, run, workflow
+
+
+def dependencies(wf):
+    return {
+        node.config.name: sorted(wf.nodes[index].config.name for index in deps)
+        for node, deps in zip(wf.nodes, wf.dependencies)
+    }
+
+
+def test_dependencies_follow_variables_within_priorities():
+    wf = WorkflowFactory.create(
+        config=workflow(
+            [
+                agent("a", outputs=("x",)),
+                agent("b", outputs=("y",)),
+                agent("c", prompt="{x} {y}", outputs=("answer",)),
+                agent("d", prompt="{answer}", outputs=("z",), priority=0.5),
+            ]
+        )
+    )
+    # d 的优先级高于 answer 的生产者，不会等待 c
+    assert dependencies(wf) == {"a": [], "b": [], "c": ["a", "b"], "d": []}
+
+
+def test_cyclic_dependencies_are_rejected():
+    nodes = [
+        agent("a", prompt="{y}", outputs=("x",)),
+        agent("b", prompt="{x}", outputs=("y",)),
+    ]
+    with pytest.raises(ValueError, match="Cyclic variable dependency"):
+        WorkflowFactory.create(config=workflow(nodes))
+
+
+def test_validate_reports_variables_without_a_source():
+    wf = WorkflowFactory.create(
+        config=workflow(
+            [
+                agent("a", prompt="{question}", outputs=("x",), priority=2),
+                agent("b", prompt="{x} {missing}", outputs=("answer",)),
+            ]
+        )
+    )
+    with pytest.raises(ValueError) as error:
+        wf.validate()
+    assert "'b'" in str(error.value)
+    assert "['missing', 'x']" in str(error.value)
+
+
+def test_ready_nodes_run_concurrently_and_consumers_wait(monkeypatch):
+    events = []
+
+    async def aquery(proxy, messages):
+        events.append(("start", proxy.config.name))
+        await asyncio.sleep(0.05)
+        events.append(("end", proxy.config.name))
+        return {"content": proxy.config.name, "tool_calls": [], "usage": {}}
+
+    monkeypatch.setattr(OpenaiAgentProxy, "_aquery", aquery)
+    wf = WorkflowFactory.create(
+        config=workflow(
+            [
+                agent("a", outputs=("x",)),
+                agent("b", outputs=("y",)),
+                agent("c", prompt="{x} {y}", outputs=("answer",)),
+            ]
+        )
+    )
+
+    outputs = run(wf.arun({"question": "q"}))
+
+    assert outputs["answer"] == "c"
+    assert {event for event in events[:2]} == {("start", "a"), ("start", "b")}
+    assert events[-2:] == [("start", "c"), ("end", "c")]
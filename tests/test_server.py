@@ -0,0 +1,133 @@
+import asyncio
+import http.client
+import json
+import threading
+import time
+
+import pytest
+from loguru import logger
+
+from config2llmworkflow.agents.openai_agent_proxy import OpenaiAgentProxy
+from config2llmworkflow.configs.app.base import BaseAppConfig
+from config2llmworkflow.server import (
+    WorkflowServer,
+    WorkflowService,
+    _configure_runtime,
+)
+
+from tests.conftest import agent, workflow
+
+
+@pytest.fixture
+def slow_llm(monkeypatch):
+    # 每次请求等待 release 后才返回，用来模拟运行中的任务
+    release = threading.Event()
+
+    async def aquery(proxy, messages):
+        while not release.is_set():
+            await asyncio.sleep(0.01)
+        return {"content": "ok", "tool_calls": [], "usage": {}}
+
+    monkeypatch.setattr(OpenaiAgentProxy, "_aquery", aquery)
+    yield release
+    release.set()
+
+
+@pytest.fixture
+def server():
+    config = BaseAppConfig(workflow=workflow([agent("worker")]))
+    service = WorkflowService({"wf": config})
+    server = WorkflowServer(("127.0.0.1", 0), service, request_timeout=0.3)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def post(server, path: str, body: dict):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=10)
+    connection.request("POST", path, json.dumps(body))
+    response = connection.getresponse()
+    return response, json.loads(response.read())
+
+
+def test_run_answers_504_when_the_job_outlives_the_request_timeout(server, slow_llm):
+    response, body = post(server, "/run", {"inputs": {"question": "q"}})
+    assert response.status == 504
+    assert response.getheader("Location") == f"/jobs/{body['job_id']}"
+
+    # 任务继续运行，完成后可以查询结果
+    slow_llm.set()
+    job = server.service.get(body["job_id"])
+    assert job.done.wait(5)
+    assert job.status == "succeeded"
+
+
+def test_input_errors_answer_422(server):
+    # 缺少输入变量
+    response, body = post(server, "/run", {"inputs": {}})
+    assert response.status == 422
+    assert body["error_type"] == "InvalidInputError"
+
+
+def test_internal_errors_answer_500(server, fake_llm):
+    def bug(messages):
+        raise KeyError("bug")
+
+    fake_llm(bug)
+    response, body = post(server, "/run", {"inputs": {"question": "q"}})
+    assert response.status == 500
+    assert body["error_type"] == "KeyError"
+
+
+def test_drain_waits_for_jobs_and_handlers(server, slow_llm):
+    server.request_timeout = 10
+    responses = []
+    client = threading.Thread(
+        target=lambda: responses.append(
+            post(server, "/run", {"inputs": {"question": "q"}})
+        )
+    )
+    client.start()
+    while not server.service.stats()["in_flight"]:
+        time.sleep(0.01)
+
+    assert not server.service.drain(timeout=0.1)
+    response, _ = post(server, "/run", {"inputs": {"question": "q"}})
+    assert response.status == 503
+
+    slow_llm.set()
+    assert server.service.drain(timeout=5)
+    # drain 返回时任务已经标记完成
+    assert all(job.done.is_set() for job in server.service._jobs.values())
+
+    server.shutdown()
+    server.server_close()
+    # server_close 等待处理线程发送完响应
+    handlers = [t for t in threading.enumerate() if "process_request" in t.name]
+    assert not handlers
+    client.join()
+    assert [response.status for response, _ in responses] == [200]
+
+
+def test_runtime_settings_come_from_the_first_config():
+    def config(**runtime):
+        return BaseAppConfig(workflow=workflow([agent("worker")]), **runtime)
+
+    warnings = []
+    sink = logger.add(warnings.append, level="WARNING", format="{message}")
+    try:
+        _configure_runtime(
+            {
+                "first": config(cache={"enabled": False}),
+                "same": config(cache={"enabled": False}),
+                "other": config(cache={"enabled": True}),
+            }
+        )
+    finally:
+        logger.remove(sink)
+
+    assert len(warnings) == 1
+    assert "['cache'] of other are ignored" in warnings[0]
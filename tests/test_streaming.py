@@ -0,0 +1,97 @@
+import pytest
+
+from config2llmworkflow.agents.openai_agent_proxy import OpenaiAgentProxy
+from config2llmworkflow.nodes.context import RunContext
+from config2llmworkflow.utils.cache import configure_cache
+from config2llmworkflow.utils.factory import WorkflowFactory
+from config2llmworkflow.utils.streaming import NodeStreams, StreamEvent, arun_streaming
+
+from tests.conftest import agent, run, workflow
+
+
+class ServerError(Exception):
+    status_code = 503
+
+
+@pytest.fixture
+def streaming_llm(monkeypatch):
+    """按顺序执行预设的流式回复：字符串逐字输出，异常在已输出的部分之后抛出"""
+
+    def install(*attempts):
+        calls = []
+
+        async def aquery_stream(proxy, messages, on_delta):
+            attempt = attempts[min(len(calls), len(attempts) - 1)]
+            calls.append(proxy.config.name)
+            text, error = attempt if isinstance(attempt, tuple) else (attempt, None)
+            for char in text:
+                on_delta(char)
+            if error is not None:
+                raise error
+            return {"content": text, "tool_calls": [], "usage": {}}
+
+        monkeypatch.setattr(OpenaiAgentProxy, "_aquery_stream", aquery_stream)
+        return calls
+
+    return install
+
+
+def stream(wf, streams: NodeStreams):
+    events = []
+
+    def on_token(name, delta):
+        events.append((name, delta))
+        streams.feed(name, delta)
+
+    outputs = run(arun_streaming(wf, {"question": "q"}, on_token, RunContext()))
+    return outputs, events
+
+
+def test_retried_requests_replace_their_partial_output(streaming_llm):
+    calls = streaming_llm(("Hel", ServerError("unavailable")), "Hello")
+    resilience = {"max_retries": 1, "retry_base_delay": 0.0}
+    wf = WorkflowFactory.create(
+        config=workflow([agent("worker", resilience=resilience)])
+    )
+    streams = NodeStreams()
+
+    outputs, events = stream(wf, streams)
+
+    assert outputs["answer"] == "Hello"
+    assert len(calls) == 2
+    assert ("worker", StreamEvent.RETRY) in events
+    assert streams.text("worker") == "Hello\n\n"
+
+
+def test_completed_requests_are_kept_across_retries():
+    streams = NodeStreams()
+    for delta in ["first", StreamEvent.DONE, "sec", StreamEvent.RETRY, "second"]:
+        streams.feed("worker", delta)
+    streams.feed("other", "x")
+
+    assert streams.text("worker") == "first\n\nsecond"
+    assert streams.text("other") == "x"
+
+
+def test_cache_hits_are_streamed_at_once(streaming_llm):
+    configure_cache({"enabled": True})
+    calls = streaming_llm("cached")
+    wf = WorkflowFactory.create(config=workflow([agent("worker")]))
+
+    stream(wf, NodeStreams())
+    _, events = stream(wf, NodeStreams())
+
+    assert len(calls) == 1
+    assert events == [("worker", "cached"), ("worker", StreamEvent.DONE)]
+
+
+def test_agents_can_opt_out_of_streaming(fake_llm, streaming_llm):
+    calls = streaming_llm("streamed")
+    fake_llm("whole")
+    wf = WorkflowFactory.create(config=workflow([agent("worker", stream=False)]))
+
+    outputs, events = stream(wf, NodeStreams())
+
+    assert outputs["answer"] == "whole"
+    assert calls == []
+    assert events == []
@@ -0,0 +1,64 @@
+import pytest
+
+from config2llmworkflow.app.base import BaseApp
+from config2llmworkflow.configs.app.base import BaseAppConfig
+from config2llmworkflow.utils.factory import WorkflowFactory
+from config2llmworkflow.utils.template import PromptTemplate
+
+from tests.conftest import agent, workflow
+
+
+class HeadlessApp(BaseApp):
+    def create_input_container(self):
+        return {}
+
+    def run(self) -> None:
+        pass
+
+
+def test_template_records_fields_and_renders_only_them():
+    template = PromptTemplate("{patient.name} 的 {L1:.1f} 和 {value:{width}}")
+
+    assert template.fields == {"patient", "L1", "value", "width"}
+    rendered = template.render(
+        {"patient": type("P", (), {"name": "A"}), "L1": 2, "value": 1, "width": 3}
+    )
+    assert rendered == "A 的 2.0 和   1"
+
+
+def test_missing_variables_are_all_listed():
+    with pytest.raises(KeyError, match=r"\['a', 'b'\]"):
+        PromptTemplate("{a} {b} {c}").render({"c": 1})
+
+
+@pytest.mark.parametrize("text", ["{}", "{0}", "{unclosed"])
+def test_invalid_templates_fail_when_parsed(text):
+    with pytest.raises(ValueError):
+        PromptTemplate(text)
+
+
+def test_invalid_prompts_fail_when_the_node_is_built():
+    with pytest.raises(ValueError):
+        WorkflowFactory.create(config=workflow([agent("worker", prompt="{}")]))
+
+
+def test_app_output_must_use_workflow_outputs():
+    config = workflow([agent("worker", outputs=("answer",))])
+    app = HeadlessApp(BaseAppConfig(workflow=config, output="结果：{answer}"))
+    assert app.output_template.render({"answer": "ok"}) == "结果：ok"
+
+    with pytest.raises(ValueError, match=r"\['question', 'summary'\]"):
+        HeadlessApp(BaseAppConfig(workflow=config, output="{question} {summary}"))
+
+
+def test_loop_app_output_can_use_inputs_and_watchdog_outputs():
+    config = workflow(
+        [agent("worker")],
+        provider="loop",
+        node_type="loop",
+        end_condition="True",
+        watchdog_agent=agent("watchdog", "{answer}", outputs=("done",)),
+    )
+    output = "{question} {answer} {done}"
+    app = HeadlessApp(BaseAppConfig(workflow=config, output=output))
+    assert app.output_template.fields == {"question", "answer", "done"}
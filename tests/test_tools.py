@@ -0,0 +1,67 @@
+import json
+
+from config2llmworkflow.nodes.context import RunContext
+from config2llmworkflow.utils.factory import WorkflowFactory
+
+from tests.conftest import agent, run, workflow
+
+SPEE = "calculate_spee_space"
+
+
+def tool_call(index: int, name: str = SPEE, **arguments):
+    arguments = arguments or {"left_spee_depth": 1, "right_spee_depth": 2}
+    return {"id": f"call_{index}", "name": name, "arguments": json.dumps(arguments)}
+
+
+def calls(*tool_calls):
+    return {"content": "", "tool_calls": list(tool_calls)}
+
+
+def run_agent(**config):
+    node = agent("worker", tools=[SPEE], **config)
+    context = RunContext()
+    wf = WorkflowFactory.create(config=workflow([node]))
+    outputs = run(context.arun(wf, {"question": "q"}))
+    return outputs, context.logs(wf)["nodes"][0]
+
+
+def test_empty_reply_is_the_answer(fake_llm):
+    fake_llm("")
+    outputs, logs = run_agent()
+    # 空回复不能把用户的 prompt 当作回答
+    assert outputs["answer"] == ""
+    assert logs["messages"][-1] == {"role": "assistant", "content": ""}
+
+
+def test_tool_results_are_sent_back_in_one_round(fake_llm):
+    second = tool_call(1, left_spee_depth=3, right_spee_depth=3)
+    llm = fake_llm(calls(tool_call(0), second), "done")
+    outputs, logs = run_agent()
+
+    assert outputs["answer"] == "done"
+    assert len(llm.calls) == 2
+    sent = llm.calls[1][1]
+    assert [message["role"] for message in sent[-3:]] == ["assistant", "tool", "tool"]
+    assert [message["tool_call_id"] for message in sent[-2:]] == ["call_0", "call_1"]
+    assert [json.loads(message["content"]) for message in sent[-2:]] == [2.0, 3.5]
+    assert [call["ok"] for call in logs["tool_call"]] == [True, True]
+
+
+def test_tool_errors_are_reported_to_the_model(fake_llm):
+    llm = fake_llm(calls(tool_call(0, name="missing_tool", x=1)), "done")
+    outputs, logs = run_agent()
+
+    assert outputs["answer"] == "done"
+    assert "missing_tool" in llm.calls[1][1][-1]["content"]
+    assert logs["tool_call"][0]["ok"] is False
+
+
+def test_tool_rounds_are_bounded(fake_llm):
+    llm = fake_llm({"content": "still working", "tool_calls": [tool_call(0)]})
+    outputs, logs = run_agent(max_tool_rounds=2)
+
+    # 第一次回复加上两轮工具调用
+    assert len(llm.calls) == 3
+    assert outputs["answer"] == "still working"
+    last = logs["messages"][-1]
+    assert last == {"role": "assistant", "content": "still working"}
@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from config2llmworkflow.utils.factory import WorkflowFactory
+from config2llmworkflow.utils.tracing import _otel_value, configure_tracing
+
+from tests.conftest import agent, workflow
+
+
+class ServerError(Exception):
+    status_code = 503
+
+
+@pytest.fixture
+def traces(tmp_path):
+    path = tmp_path / "spans.jsonl"
+
+    def enable(**config):
+        configure_tracing({"enabled": True, "path": str(path), **config})
+
+    def read():
+        # 关闭导出器，等待后台线程写完所有 span
+        configure_tracing({"enabled": False})
+        if not path.exists():
+            return {}
+        spans = [
+            span
+            for line in path.read_text("utf-8").splitlines()
+            for resource in json.loads(line)["resourceSpans"]
+            for scope in resource["scopeSpans"]
+            for span in scope["spans"]
+        ]
+        return {span["spanId"]: span for span in spans}
+
+    yield enable, read
+    configure_tracing({"enabled": False})
+
+
+def attributes(span):
+    return {item["key"]: list(item["value"].values())[0] for item in span["attributes"]}
+
+
+def test_spans_nest_workflow_node_and_llm_call(fake_llm, traces):
+    enable, read = traces
+    fake_llm("ok")
+    enable()
+    nodes = [agent("first"), agent("second", "{answer}", outputs=("summary",))]
+    WorkflowFactory.create(config=workflow(nodes)).run({"question": "q"})
+
+    spans = read()
+    by_name = {span["name"]: span for span in spans.values()}
+
+    root = by_name["workflow wf"]
+    assert "parentSpanId" not in root
+    assert len({span["traceId"] for span in spans.values()}) == 1
+    for name in ("first", "second"):
+        node = by_name[f"node {name}"]
+        assert node["parentSpanId"] == root["spanId"]
+        calls = [
+            span
+            for span in spans.values()
+            if span["name"].startswith("llm ")
+            and span["parentSpanId"] == node["spanId"]
+        ]
+        assert len(calls) == 1
+        assert attributes(calls[0])["node.name"] == name
+    requests = [span for span in spans.values() if span["name"] == "llm.request"]
+    assert len(requests) == 2
+    for request in requests:
+        assert spans[request["parentSpanId"]]["name"].startswith("llm ")
+
+
+def test_retried_requests_get_their_own_spans(fake_llm, traces):
+    enable, read = traces
+
+    def unavailable(messages):
+        raise ServerError("unavailable")
+
+    fake_llm(unavailable, "ok")
+    enable()
+    resilience = {"max_retries": 1, "retry_base_delay": 0.0}
+    config = workflow([agent("worker", resilience=resilience)])
+    WorkflowFactory.create(config=config).run({"question": "q"})
+
+    requests = sorted(
+        (span for span in read().values() if span["name"] == "llm.request"),
+        key=lambda span: int(attributes(span)["llm.attempt"]),
+    )
+    assert [span["status"]["code"] for span in requests] == [
+        "STATUS_CODE_ERROR",
+        "STATUS_CODE_UNSET",
+    ]
+    assert requests[0]["events"][0]["name"] == "exception"
+    assert requests[0]["parentSpanId"] == requests[1]["parentSpanId"]
+
+
+def test_unsampled_runs_write_no_spans(fake_llm, traces):
+    enable, read = traces
+    fake_llm("ok")
+    enable(sample_rate=0)
+    WorkflowFactory.create(config=workflow([agent("worker")])).run({"question": "q"})
+
+    assert read() == {}
+
+
+def test_attribute_values_follow_otlp_json():
+    assert _otel_value(2**40, 10) == {"intValue": str(2**40)}
+    assert _otel_value(True, 10) == {"boolValue": True}
+    assert _otel_value("x" * 12, 10) == {
+        "stringValue": "x" * 10 + "...[2 chars truncated]"
+    }
+    assert _otel_value({"a": 1}, 10) == {"stringValue": '{"a": 1}'}